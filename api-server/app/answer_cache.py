@@ -0,0 +1,164 @@
+import copy
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Sequence
+from .vector_index import VectorMatrix
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class SemanticAnswerCache:
+    """
+    의미 기반 답변 캐시 - 질문 임베딩이 충분히 가까운 이전 답변을 재사용
+
+    각 항목은 (질문 임베딩, 응답, 코퍼스 버전)으로 저장되며,
+    문서 코퍼스 버전이 바뀌면 이전 버전의 항목은 모두 무효화됩니다.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 512, ttl_seconds: float = 3600.0):
+        """
+        SemanticAnswerCache 초기화
+
+        Parameters:
+        - threshold: 캐시 적중으로 판단할 최소 코사인 유사도
+        - max_entries: 최대 항목 수 (초과 시 가장 오래 사용하지 않은 항목 제거)
+        - ttl_seconds: 항목 유효 시간(초, 0 이하이면 만료 없음)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: List[Dict[str, Any]] = []
+        self._matrix: Optional[VectorMatrix] = None
+        self._corpus_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _rebuild(self) -> None:
+        """항목 목록에서 검색 행렬 재생성 (락을 잡은 상태에서 호출)"""
+        self._matrix = VectorMatrix.from_embeddings([entry["embedding"] for entry in self._entries]) if self._entries else None
+
+    def _sync_version(self, corpus_version: str) -> None:
+        """코퍼스 버전이 바뀌었으면 모든 항목 무효화 (락을 잡은 상태에서 호출)"""
+        if corpus_version == self._corpus_version:
+            return
+        if self._entries:
+            logger.info(f"코퍼스 버전 변경으로 답변 캐시 {len(self._entries)}개 항목 무효화")
+            self.invalidations += len(self._entries)
+        self._entries = []
+        self._matrix = None
+        self._corpus_version = corpus_version
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry["created_at"] > self.ttl_seconds
+
+    def lookup(self, query_embedding: Sequence[float], corpus_version: str) -> Optional[Dict[str, Any]]:
+        """
+        가장 가까운 이전 질문의 답변 조회
+
+        Parameters:
+        - query_embedding: 질문 임베딩
+        - corpus_version: 현재 문서 코퍼스 버전
+
+        Returns:
+        - 캐시된 응답 사본 또는 None
+        """
+        if not any(query_embedding):
+            return None
+
+        with self._lock:
+            self._sync_version(corpus_version)
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            ids, scores = self._matrix.search(query_embedding, 1)
+            if not ids or scores[0] < self.threshold:
+                self.misses += 1
+                return None
+
+            entry = self._entries[ids[0]]
+            now = time.monotonic()
+            if self._expired(entry, now):
+                # 만료 항목 정리 후 미스 처리
+                self._entries = [e for e in self._entries if not self._expired(e, now)]
+                self._rebuild()
+                self.misses += 1
+                return None
+
+            entry["last_used"] = now
+            entry["hits"] += 1
+            self.hits += 1
+            logger.info(f"답변 캐시 적중 (유사도: {scores[0]:.4f}, 이전 질문: '{entry['question'][:30]}...')")
+            return copy.deepcopy(entry["response"])
+
+    def store(self, question: str, query_embedding: Sequence[float], response: Dict[str, Any],
+              corpus_version: str) -> None:
+        """
+        답변 저장
+
+        Parameters:
+        - question: 원본 질문 (로그용)
+        - query_embedding: 질문 임베딩
+        - response: 반환할 응답 데이터
+        - corpus_version: 답변 생성에 사용한 문서 코퍼스 버전
+        """
+        if self.max_entries <= 0 or not any(query_embedding):
+            return
+
+        # 요청별 디버그 정보는 저장하지 않음
+        response = {key: value for key, value in response.items() if not key.startswith("_")}
+        now = time.monotonic()
+
+        with self._lock:
+            self._sync_version(corpus_version)
+            self._entries.append({
+                "question": question,
+                "embedding": list(query_embedding),
+                "response": copy.deepcopy(response),
+                "corpus_version": corpus_version,
+                "created_at": now,
+                "last_used": now,
+                "hits": 0
+            })
+
+            if len(self._entries) > self.max_entries:
+                self._entries = [e for e in self._entries if not self._expired(e, now)]
+                while len(self._entries) > self.max_entries:
+                    oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]["last_used"])
+                    del self._entries[oldest]
+                    self.evictions += 1
+                self._rebuild()
+            elif self._matrix is None:
+                self._rebuild()
+            else:
+                self._matrix.extend([query_embedding])
+
+    def clear(self) -> None:
+        """모든 항목 제거"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries = []
+            self._matrix = None
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중/미스 통계"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "corpus_version": self._corpus_version
+            }
@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+import botocore.config
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 연결 풀 크기를 정할 때 참고하는 동시성 설정 (환경 변수, 기본값)
+_CONCURRENCY_SETTINGS = (
+    ("EMBEDDING_MAX_CONCURRENCY", "16"),
+    ("INGEST_DOWNLOAD_WORKERS", "8"),
+    ("RAG_MAX_CONCURRENCY", "8"),
+    ("CHAT_PIPELINE_WORKERS", "4")
+)
+
+_lock = threading.Lock()
+# 자격 증명별 boto3 세션 - 서비스 모델과 자격 증명 조회를 한 번만 수행
+_sessions: Dict[Tuple[Optional[str], Optional[str]], boto3.Session] = {}
+# (서비스, 리전, 자격 증명, 재시도 횟수) -> 클라이언트
+_clients: Dict[Tuple[Any, ...], Any] = {}
+_client_info: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+_cache_hits = 0
+
+
+def default_pool_size() -> int:
+    """
+    기본 연결 풀 크기 - AWS_MAX_POOL_CONNECTIONS가 없으면 동시성 설정 중 가장 큰 값 (최소 10)
+
+    PDF 범위 GET은 다운로드 스레드마다 여러 연결을 쓰므로 두 값을 곱해 반영합니다.
+    """
+    configured = int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "0"))
+    if configured > 0:
+        return configured
+    sizes = [int(os.environ.get(name, default)) for name, default in _CONCURRENCY_SETTINGS]
+    sizes.append(int(os.environ.get("INGEST_DOWNLOAD_WORKERS", "8")) * int(os.environ.get("PDF_RANGE_GET_WORKERS", "4")))
+    return max([10] + sizes)
+
+
+def _build_config(pool_size: int, max_attempts: int, read_timeout: float) -> botocore.config.Config:
+    """연결 풀, TCP keepalive, 타임아웃, 적응형 재시도를 설정한 botocore Config"""
+    return botocore.config.Config(
+        max_pool_connections=pool_size,
+        tcp_keepalive=True,
+        connect_timeout=float(os.environ.get("AWS_CONNECT_TIMEOUT", "3")),
+        read_timeout=read_timeout,
+        retries={
+            "mode": os.environ.get("AWS_RETRY_MODE", "adaptive"),
+            "total_max_attempts": max_attempts
+        }
+    )
+
+
+def _get_session(aws_access_key_id: Optional[str], aws_secret_access_key: Optional[str]) -> boto3.Session:
+    """자격 증명별 공유 세션 (호출자가 _lock을 잡은 상태)"""
+    key = (aws_access_key_id, aws_secret_access_key)
+    session = _sessions.get(key)
+    if session is None:
+        session = boto3.Session(aws_access_key_id=aws_access_key_id, aws_secret_access_key=aws_secret_access_key)
+        _sessions[key] = session
+    return session
+
+
+def get_client(service_name: str, region_name: str, max_pool_connections: Optional[int] = None,
+               max_attempts: Optional[int] = None, read_timeout: Optional[float] = None,
+               aws_access_key_id: Optional[str] = None, aws_secret_access_key: Optional[str] = None) -> Any:
+    """
+    공유 boto3 클라이언트 반환 (없으면 생성)
+
+    같은 서비스/리전/자격 증명의 클라이언트는 프로세스 안에서 하나만 만들어 연결 풀과
+    TLS 연결을 재사용합니다. boto3 클라이언트는 스레드 안전하므로 여러 스레드가 함께 사용해도 됩니다.
+
+    Parameters:
+    - service_name: AWS 서비스 이름 (s3, bedrock-runtime 등)
+    - region_name: 리전
+    - max_pool_connections: 필요한 최소 연결 풀 크기 (기본 풀보다 크면 더 크게 생성)
+    - max_attempts: 첫 시도를 포함한 최대 시도 횟수 (자체 재시도 루프가 있는 호출자는 1)
+    - read_timeout: 읽기 타임아웃(초, None이면 AWS_READ_TIMEOUT)
+    - aws_access_key_id: 명시적 자격 증명 (None이면 기본 자격 증명 체인)
+    - aws_secret_access_key: 명시적 자격 증명
+
+    Returns:
+    - boto3 클라이언트
+    """
+    global _cache_hits
+    if max_attempts is None:
+        max_attempts = int(os.environ.get("AWS_MAX_ATTEMPTS", "3"))
+    if read_timeout is None:
+        read_timeout = float(os.environ.get("AWS_READ_TIMEOUT", "60"))
+    pool_size = max(default_pool_size(), max_pool_connections or 0)
+    key = (service_name, region_name, aws_access_key_id, aws_secret_access_key, max_attempts, read_timeout)
+
+    with _lock:
+        client = _clients.get(key)
+        if client is not None and _client_info[key]["max_pool_connections"] >= pool_size:
+            _cache_hits += 1
+            return client
+
+        # 세션 생성과 session.client는 스레드 안전하지 않으므로 락 안에서 생성
+        start_time = time.time()
+        session = _get_session(aws_access_key_id, aws_secret_access_key)
+        client = session.client(
+            service_name,
+            region_name=region_name,
+            config=_build_config(pool_size, max_attempts, read_timeout)
+        )
+        created_ms = (time.time() - start_time) * 1000
+        _clients[key] = client
+        _client_info[key] = {
+            "service": service_name,
+            "region": region_name,
+            "max_pool_connections": pool_size,
+            "max_attempts": max_attempts,
+            "read_timeout": read_timeout,
+            "created_ms": round(created_ms, 1)
+        }
+    logger.info(f"AWS 클라이언트 생성: {service_name} (리전: {region_name}, 연결 풀: {pool_size}, "
+                f"최대 시도: {max_attempts}) - {created_ms:.1f}ms")
+    return client
+
+
+def client_stats() -> Dict[str, Any]:
+    """
+    생성된 클라이언트 통계
+
+    Returns:
+    - {sessions, clients, cache_hits, total_created_ms, details}
+    """
+    with _lock:
+        details: List[Dict[str, Any]] = [dict(info) for info in _client_info.values()]
+        return {
+            "sessions": len(_sessions),
+            "clients": len(_clients),
+            "cache_hits": _cache_hits,
+            "total_created_ms": round(sum(info["created_ms"] for info in details), 1),
+            "details": details
+        }
+
+
+def clear_clients() -> None:
+    """공유 세션과 클라이언트 초기화 (자격 증명 교체 등)"""
+    global _cache_hits
+    with _lock:
+        _sessions.clear()
+        _clients.clear()
+        _client_info.clear()
+        _cache_hits = 0
@@ -1,12 +1,12 @@
 import json
 import logging
-import boto3
 import botocore.config
 import time
 import random
 import os
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from botocore.exceptions import ClientError, ConnectionError
+from .aws_clients import get_client
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -73,9 +73,9 @@ class BedrockClient:
         - Bedrock 클라이언트
         """
         try:
-            # 단순한 클라이언트 생성
+            # 공유 클라이언트 - 재시도와 폴백 모델 전환은 generate_response에서 처리
             logger.info(f"bedrock-runtime 서비스 클라이언트 생성 시도: 리전={aws_region}")
-            bedrock_client = boto3.client('bedrock-runtime', region_name=aws_region)
+            bedrock_client = get_client('bedrock-runtime', aws_region, max_attempts=1)
             logger.info("bedrock-runtime 클라이언트 생성 성공")
             return bedrock_client
         except Exception as e:
@@ -312,6 +312,117 @@ class BedrockClient:
         fallback_response = "죄송합니다. 현재 응답을 생성할 수 없습니다. 질문을 다시 작성해 주시거나 나중에 다시 시도해 주세요."
         return fallback_response, {"input_tokens": 0, "output_tokens": 0, "model_id": use_model_id}
 
+    def generate_response_stream(self, system_prompt: str,
+                                 conversation_history: List[Dict[str, str]],
+                                 max_tokens: int = None,
+                                 token_usage: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """
+        LLM 응답을 스트리밍으로 생성 (invoke_model_with_response_stream)
+
+        스트림을 여는 호출이 실패하면 generate_response와 같이 폴백 모델과 백오프로 재시도하지만,
+        첫 청크를 받은 뒤의 오류는 이미 보낸 텍스트를 되돌릴 수 없으므로 BedrockClientError로 전달합니다.
+        제너레이터가 닫히면 Bedrock 이벤트 스트림도 닫습니다.
+
+        Parameters:
+        - system_prompt: 시스템 프롬프트
+        - conversation_history: 대화 기록
+        - max_tokens: 최대 토큰 수 (기본값 사용 시 None)
+        - token_usage: 토큰 사용량을 채울 dict {input_tokens, output_tokens, model_id} (선택)
+
+        Returns:
+        - 응답 텍스트 조각 제너레이터
+        """
+        self._update_model_from_env()
+
+        max_tokens = max_tokens or self.max_tokens
+        if token_usage is None:
+            token_usage = {}
+        token_usage.update({"input_tokens": 0, "output_tokens": 0, "model_id": ""})
+
+        if self.bedrock_runtime is None:
+            logger.error("Bedrock 클라이언트가 초기화되지 않았습니다.")
+            yield "죄송합니다. 현재 서비스에 일시적인 문제가 발생했습니다. 잠시 후 다시 시도해 주세요."
+            return
+
+        logger.info(f"스트리밍 응답 생성 요청 - 대화 길이: {len(conversation_history)}, 시스템 프롬프트 길이: {len(system_prompt)}")
+
+        request_body = json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "system": system_prompt,
+            "messages": conversation_history,
+            "temperature": 0.5,
+            "top_p": 0.9,
+            "top_k": 50
+        })
+
+        # 스트림 열기 - 아직 아무것도 보내지 않았으므로 폴백/재시도 가능
+        use_model_id = self.model_id
+        retry_attempt = 0
+        tried_fallback = False
+        response = None
+        while response is None:
+            try:
+                response = self.bedrock_runtime.invoke_model_with_response_stream(
+                    modelId=use_model_id,
+                    contentType="application/json",
+                    accept="application/json",
+                    body=request_body
+                )
+            except (ClientError, ConnectionError) as e:
+                error_code = e.response.get('Error', {}).get('Code', '') if isinstance(e, ClientError) else "ConnectionError"
+                logger.error(f"Bedrock 스트리밍 호출 오류 (시도 {retry_attempt+1}/{self.max_retries+1}) - 코드: {error_code}, 메시지: {str(e)}")
+
+                if not tried_fallback and use_model_id != self.fallback_model_id:
+                    use_model_id = self.fallback_model_id
+                    logger.info(f"폴백 모델로 전환: {use_model_id}")
+                    tried_fallback = True
+                    continue
+                if retry_attempt >= self.max_retries:
+                    raise BedrockClientError(f"Bedrock 스트리밍 API 오류: {str(e)}")
+
+                wait_time = self._exponential_backoff(retry_attempt)
+                logger.info(f"{wait_time:.2f}초 후 재시도")
+                time.sleep(wait_time)
+                retry_attempt += 1
+
+        token_usage["model_id"] = use_model_id
+        event_stream = response['body']
+        output_length = 0
+        try:
+            for event in event_stream:
+                chunk = event.get('chunk')
+                if chunk is None:
+                    # 스트림 중간 오류 이벤트 (modelStreamErrorException, throttlingException 등)
+                    error_name = next(iter(event), "unknown")
+                    raise BedrockClientError(f"Bedrock 스트림 오류: {error_name} {event.get(error_name)}")
+
+                payload = json.loads(chunk['bytes'])
+                payload_type = payload.get('type')
+                if payload_type == 'content_block_delta':
+                    text = payload.get('delta', {}).get('text', '')
+                    if text:
+                        output_length += len(text)
+                        yield text
+                elif payload_type == 'message_start':
+                    usage = payload.get('message', {}).get('usage', {})
+                    token_usage["input_tokens"] = usage.get("input_tokens", token_usage["input_tokens"])
+                elif payload_type == 'message_delta':
+                    usage = payload.get('usage', {})
+                    token_usage["output_tokens"] = usage.get("output_tokens", token_usage["output_tokens"])
+
+                # 마지막 이벤트에 붙는 호출 지표가 있으면 우선 사용
+                metrics = payload.get('amazon-bedrock-invocationMetrics')
+                if metrics:
+                    token_usage["input_tokens"] = metrics.get("inputTokenCount", token_usage["input_tokens"])
+                    token_usage["output_tokens"] = metrics.get("outputTokenCount", token_usage["output_tokens"])
+        finally:
+            close = getattr(event_stream, 'close', None)
+            if close is not None:
+                close()
+
+        logger.info(f"LLM 스트리밍 응답 완료 - 모델: {use_model_id}, 응답 길이: {output_length} 글자, 토큰: {token_usage}")
+
     def _update_model_from_env(self):
         """
         환경 변수 변경을 감지하여 모델 설정 업데이트
@@ -0,0 +1,108 @@
+"""
+오프라인 인덱스 번들 생성 CLI
+
+S3 버킷의 PDF를 수집/임베딩해 문서, 임베딩 행렬, BM25/IVF 색인과 매니페스트를
+하나의 인덱스 번들로 만들고 S3에 업로드합니다. Lambda와 FastAPI 서버는
+INDEX_BUNDLE_S3_KEY로 이 번들을 지정하면 런타임 수집 없이 바로 로드합니다.
+
+사용 예:
+    python -m app.build_index --bucket garden-rag-01 --key index/bundle.idx
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Tuple
+from .embeddings import EmbeddingService
+from .document_store import DocumentStore
+from .retriever import Retriever
+from .index_artifact import upload_artifact
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="S3 PDF로 인덱스 번들을 만들어 업로드합니다.")
+    parser.add_argument("--bucket", default=os.environ.get("S3_BUCKET_NAME", ""),
+                        help="PDF가 저장된 S3 버킷 (기본: S3_BUCKET_NAME)")
+    parser.add_argument("--region", default=os.environ.get("AWS_REGION", "ap-northeast-2"),
+                        help="S3 버킷 리전 (기본: AWS_REGION)")
+    parser.add_argument("--key", default=os.environ.get("INDEX_BUNDLE_S3_KEY", "index/bundle.idx"),
+                        help="업로드할 번들 S3 키 (기본: INDEX_BUNDLE_S3_KEY)")
+    parser.add_argument("--output", default="",
+                        help="번들을 저장할 로컬 경로 (기본: 임시 파일)")
+    parser.add_argument("--ivf", action="store_true",
+                        help="IVF 근사 검색 인덱스를 번들에 포함")
+    parser.add_argument("--no-upload", action="store_true",
+                        help="S3에 업로드하지 않고 로컬에만 저장")
+    return parser.parse_args(argv)
+
+
+def build_bundle(bucket: str, region: str, output: Path, ivf: bool = False) -> Tuple[Dict[str, Any], DocumentStore]:
+    """
+    S3 PDF를 수집하고 임베딩해 인덱스 번들 생성
+
+    Parameters:
+    - bucket: PDF가 저장된 S3 버킷 이름
+    - region: S3 버킷 리전
+    - output: 번들을 저장할 로컬 경로
+    - ivf: IVF 인덱스 포함 여부
+
+    Returns:
+    - 번들 헤더 메타데이터, 사용한 DocumentStore
+    """
+    if ivf:
+        os.environ["VECTOR_INDEX_MODE"] = "ivf"
+
+    embedding_service = EmbeddingService(region)
+    # 기존 번들을 읽지 않고 S3 원본에서 다시 수집
+    document_store = DocumentStore(bucket, region, embedding_model_id=embedding_service.model_id, use_bundle=False)
+
+    embedding_cache_s3_key = os.environ.get("EMBEDDING_CACHE_S3_KEY", "")
+    needs_embedding = not document_store.has_embeddings()
+    if needs_embedding and embedding_cache_s3_key and embedding_service.cache:
+        embedding_service.cache.seed_from_s3(document_store.s3_client, bucket, embedding_cache_s3_key)
+
+    # Retriever 초기화 시 임베딩이 없는 문서를 임베딩해 저장소에 반영
+    Retriever(document_store, embedding_service)
+    if needs_embedding and embedding_cache_s3_key and embedding_service.cache:
+        embedding_service.cache.flush_to_s3(document_store.s3_client, bucket, embedding_cache_s3_key)
+
+    return document_store.export_bundle(output), document_store
+
+
+def main(argv=None) -> int:
+    """CLI 진입점"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args = parse_args(argv)
+    if not args.bucket:
+        logger.error("S3 버킷을 지정하세요. (--bucket 또는 S3_BUCKET_NAME)")
+        return 2
+
+    start_time = time.time()
+    output = Path(args.output) if args.output else Path(tempfile.mkdtemp(prefix="index_bundle_")) / "bundle.idx"
+    try:
+        header, document_store = build_bundle(args.bucket, args.region, output, ivf=args.ivf)
+    except Exception as e:
+        logger.error(f"인덱스 번들 생성 실패: {str(e)}")
+        return 1
+
+    size_mb = output.stat().st_size / 1024 / 1024
+    logger.info(f"인덱스 번들 생성 완료: {output} ({size_mb:.1f}MB, 문서 {header['count']}개, "
+                f"{header['dimension']}차원, {time.time() - start_time:.1f}초 소요)")
+
+    if not args.no_upload:
+        if not upload_artifact(document_store.s3_client, args.bucket, args.key, output):
+            return 1
+        logger.info(f"런타임에서 INDEX_BUNDLE_S3_KEY={args.key} 로 설정하면 이 번들을 사용합니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
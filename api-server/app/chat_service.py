@@ -1,13 +1,19 @@
 import json
+import time
+import asyncio
 import logging
 import boto3
 import os
+import threading
 import traceback
-from typing import Dict, List, Any, Optional, Tuple
+from concurrent.futures import Executor
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from .embeddings import EmbeddingService
-from .document_store import DocumentStore
-from .retriever import Retriever
+from .document_store import DocumentStore, DocumentSnapshot
+from .retriever import Retriever, RetrievalContext, RetrieverError
+from .index_refresher import IndexRefresher, IndexGeneration
 from .bedrock_client import BedrockClient
+from .answer_cache import SemanticAnswerCache
 from .utils.cost_tracker import CostTracker
 
 # 로깅 설정
@@ -28,6 +34,8 @@ class ChatService:
         - aws_region: AWS 리전
         """
         self.s3_bucket_name = s3_bucket_name
+        # S3는 원래 리전 사용
+        self.s3_region = aws_region
         # Bedrock은 무조건 us-east-1 리전 사용
         self.aws_region = "us-east-1"
         self.conversations: Dict[str, List[Dict[str, str]]] = {}
@@ -47,18 +55,30 @@ class ChatService:
             logger.info("EmbeddingService 초기화 중...")
             self.embedding_service = EmbeddingService(self.aws_region)
             
-            # 문서 저장소 초기화 (S3는 원래 리전 사용)
-            logger.info("DocumentStore 초기화 중...")
-            self.document_store = DocumentStore(s3_bucket_name, aws_region)
-            
-            # 검색기 초기화
-            logger.info("Retriever 초기화 중...")
-            self.retriever = Retriever(self.document_store, self.embedding_service)
+            # 검색 인덱스 세대(문서 저장소 + 검색기) 초기화 - 원본이 바뀌면 새 세대를 만들어 교체
+            self.embedding_cache_s3_key = os.environ.get("EMBEDDING_CACHE_S3_KEY", "")
+            self.index_refresher = IndexRefresher(
+                self._build_generation(1),
+                self._build_generation,
+                lambda generation: generation.document_store.has_source_changed(),
+                interval_seconds=float(os.environ.get("INDEX_REFRESH_INTERVAL", "0")),
+                name="검색 인덱스"
+            )
+            self.index_refresher.start()
             
             # LLM 클라이언트 초기화
             logger.info("BedrockClient 초기화 중...")
             self.llm = BedrockClient(self.aws_region)
             
+            # 의미 기반 답변 캐시 - 거의 같은 질문은 LLM 호출 없이 이전 답변 재사용
+            self.answer_cache: Optional[SemanticAnswerCache] = None
+            if os.environ.get("ANSWER_CACHE_ENABLED", "true").lower() == "true":
+                self.answer_cache = SemanticAnswerCache(
+                    threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95")),
+                    max_entries=int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "512")),
+                    ttl_seconds=float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", "3600"))
+                )
+            
             # 모든 컴포넌트 초기화 확인
             self._check_components()
             
@@ -68,6 +88,79 @@ class ChatService:
             logger.error(traceback.format_exc())
             raise
     
+    @property
+    def document_store(self) -> DocumentStore:
+        """현재 세대의 문서 저장소"""
+        return self.index_refresher.current.document_store
+    
+    @property
+    def retriever(self) -> Retriever:
+        """현재 세대의 검색기"""
+        return self.index_refresher.current.retriever
+    
+    def _build_generation(self, number: int) -> IndexGeneration:
+        """
+        새 검색 인덱스 세대 생성 (서비스 중인 세대와 별도로 빌드)
+        
+        Parameters:
+        - number: 세대 번호
+        
+        Returns:
+        - IndexGeneration 인스턴스
+        """
+        # 문서 저장소 초기화 - 매니페스트와 임베딩 캐시 덕분에 변경분만 다시 처리
+        logger.info(f"DocumentStore 초기화 중... (세대 {number})")
+        document_store = DocumentStore(
+            self.s3_bucket_name,
+            self.s3_region,
+            embedding_model_id=self.embedding_service.model_id
+        )
+        if number > 1 and document_store.load_error:
+            # 갱신 중 S3 오류로 문서를 읽지 못한 (빈) 세대는 교체하지 않음
+            raise RetrieverError(f"새 세대의 문서 로드에 실패했습니다: {document_store.load_error}")
+        
+        # 인덱스를 새로 만들어야 하면 S3에 공유된 임베딩 캐시로 먼저 시드
+        needs_embedding = not document_store.has_embeddings()
+        if needs_embedding and self.embedding_cache_s3_key and self.embedding_service.cache:
+            self.embedding_service.cache.seed_from_s3(
+                document_store.s3_client, self.s3_bucket_name, self.embedding_cache_s3_key
+            )
+        
+        # 검색기 초기화
+        logger.info("Retriever 초기화 중...")
+        retriever = Retriever(document_store, self.embedding_service)
+        
+        if needs_embedding and self.embedding_service.cache:
+            logger.info(f"임베딩 캐시 통계: {self.embedding_service.cache_stats()}")
+            # 새로 임베딩한 항목을 S3에 반영해 다른 컨테이너가 재사용
+            if self.embedding_cache_s3_key:
+                self.embedding_service.cache.flush_to_s3(
+                    document_store.s3_client, self.s3_bucket_name, self.embedding_cache_s3_key
+                )
+        
+        if number > 1 and document_store.documents and not retriever.is_embedding_initialized:
+            # 갱신 중 임베딩에 실패한 세대는 교체하지 않음
+            raise RetrieverError("새 세대의 임베딩 초기화에 실패했습니다.")
+        
+        return IndexGeneration(
+            number=number,
+            document_store=document_store,
+            retriever=retriever,
+            version=document_store.corpus_version
+        )
+    
+    def refresh_index(self, force: bool = False) -> Dict[str, Any]:
+        """
+        S3 원본이 바뀌었으면 새 인덱스 세대를 만들어 교체
+        
+        Parameters:
+        - force: 변경 여부와 관계없이 다시 빌드
+        
+        Returns:
+        - 갱신 결과 {status, generation, elapsed_seconds}
+        """
+        return self.index_refresher.refresh(force=force)
+    
     def _check_components(self):
         """서비스 컴포넌트 유효성 검사"""
         if not hasattr(self, 'embedding_service') or self.embedding_service.bedrock_runtime is None:
@@ -85,8 +178,8 @@ class ChatService:
         content_lines = []
         
         try:
-            # 메타데이터에서 정보 추출
-            metadata = doc.get('metadata', {})
+            # 메타데이터에서 정보 추출 (DocumentStore 문서는 메타데이터가 최상위에 있음)
+            metadata = doc.get('metadata') or doc
             source = metadata.get('source', '')
             file = metadata.get('file', '')
             page = metadata.get('page', '')
@@ -102,8 +195,16 @@ class ChatService:
                 source_parts.append(f"파일: {file}")
             if page:
                 source_parts.append(f"페이지: {page}")
+            if metadata.get('line_start'):
+                # 청크 문서는 페이지 원문 기준 줄 범위 표시
+                source_parts.append(f"줄: {metadata['line_start']}-{metadata.get('line_end', metadata['line_start'])}")
             if source:
                 source_parts.append(f"출처: {source}")
+            duplicates = doc.get('duplicates') or []
+            if duplicates:
+                # 같은 내용이 여러 곳에 있으면 함께 표시
+                source_parts.append(f"동일 내용: {', '.join(dup.get('source', '') for dup in duplicates[:3])}"
+                                    + (f" 외 {len(duplicates) - 3}곳" if len(duplicates) > 3 else ""))
             
             if source_parts:
                 source_display = " | ".join(source_parts)
@@ -149,6 +250,10 @@ class ChatService:
         
         logger.info(f"사용자 메시지 처리 - 세션: {session_id}")
         
+        # 요청 내내 같은 인덱스 세대 사용 (처리 중 교체되어도 이전 세대에서 완료)
+        generation = self.index_refresher.current
+        corpus_version = generation.document_store.corpus_version
+        
         # 메시지 유효성 검사
         if not user_message or not user_message.strip():
             logger.warning(f"세션 {session_id}에서 빈 메시지 수신")
@@ -170,39 +275,158 @@ class ChatService:
             "content": user_message
         })
         
+        # 의미 기반 답변 캐시 확인 - 대화 기록이 답변에 영향을 주지 않는 첫 질문만 대상
+        cached_response, cache_embedding = self._lookup_cached_answer(user_message, session_id, corpus_version)
+        if cached_response is not None:
+            return self._cached_answer_response(session_id, cached_response)
+        
+        # 요청 단위 검색 컨텍스트 - 검색은 요청당 한 번만 수행
+        retrieval = self._retrieve(generation, user_message, cache_embedding)
+        return self._respond(user_message, session_id, retrieval, cache_embedding, corpus_version)
+    
+    async def aprocess_message(self, user_message: str, session_id: str,
+                               executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """
+        사용자 메시지 처리 및 응답 생성 (비동기 - 독립적인 단계를 동시에 실행)
+        
+        process_message와 같은 결과를 반환하지만, 블로킹 boto3 호출과 검색은 executor에서 실행하고
+        서로 의존하지 않는 쿼리 임베딩(Bedrock 호출)과 BM25 후보 검색을 같은 스냅샷에서 동시에 실행합니다.
+        임베딩이 끝나면 답변 캐시 조회, 벡터 검색과 RRF 결합, LLM 응답 생성 순으로 진행합니다.
+        Lambda 핸들러(asyncio.run)와 FastAPI 라우트(이벤트 루프에서 await) 모두에서 호출할 수 있습니다.
+        
+        Parameters:
+        - user_message: 사용자 메시지
+        - session_id: 세션 ID
+        - executor: 블로킹 작업을 실행할 Executor (None이면 이벤트 루프 기본 스레드 풀)
+        
+        Returns:
+        - 응답 내용
+        """
+        loop = asyncio.get_running_loop()
+        
+        # 비용 추적 시작
+        self.cost_tracker.start(self.lambda_memory_mb)
+        
+        logger.info(f"사용자 메시지 비동기 처리 - 세션: {session_id}")
+        
+        # 요청 내내 같은 인덱스 세대와 스냅샷 사용
+        generation = self.index_refresher.current
+        corpus_version = generation.document_store.corpus_version
+        snapshot = generation.document_store.snapshot()
+        
+        # 메시지 유효성 검사
+        if not user_message or not user_message.strip():
+            logger.warning(f"세션 {session_id}에서 빈 메시지 수신")
+            self.cost_tracker.stop()
+            self.cost_tracker.log_costs(request_id=session_id, request_type="chat_empty")
+            return {
+                "response": "메시지가 비어 있습니다. 질문을 입력해 주세요.",
+                "sources": []
+            }
+        
+        if session_id not in self.conversations:
+            self.conversations[session_id] = []
+        self.conversations[session_id].append({
+            "role": "user",
+            "content": user_message
+        })
+        
+        # 1단계: 쿼리 임베딩과 BM25 후보 검색을 동시에 실행
+        retriever = generation.retriever
+        use_answer_cache = self.answer_cache is not None and len(self.conversations[session_id]) == 1
+        stages = {}
+        if retriever is not None and (retriever.is_embedding_initialized or use_answer_cache):
+            stages["embedding"] = loop.run_in_executor(executor, self.embedding_service.embed_query, user_message)
+        if retriever is not None:
+            stages["lexical"] = loop.run_in_executor(executor, retriever.prefetch_lexical, user_message, 3, snapshot)
+        
+        prefetch_start = time.time()
+        results = dict(zip(stages, await asyncio.gather(*stages.values(), return_exceptions=True)))
+        prefetch_ms = (time.time() - prefetch_start) * 1000
+        for stage, result in results.items():
+            if isinstance(result, Exception):
+                # 실패한 단계는 검색 단계에서 다시 시도하거나 폴백
+                logger.error(f"동시 실행 단계 '{stage}' 오류: {str(result)}")
+                results[stage] = None
+        query_embedding = results.get("embedding")
+        lexical = results.get("lexical")
+        
+        # 2단계: 의미 기반 답변 캐시 확인 (임베딩 재사용, 네트워크 호출 없음)
+        cache_embedding = None
+        if use_answer_cache and query_embedding is not None:
+            cached_response, cache_embedding = self._lookup_cached_answer(
+                user_message, session_id, corpus_version, query_embedding=query_embedding
+            )
+            if cached_response is not None:
+                return self._cached_answer_response(session_id, cached_response)
+        
+        # 3단계: 벡터 검색 + 미리 가져온 BM25 후보 결합
+        retrieval = await loop.run_in_executor(
+            executor, self._retrieve, generation, user_message, query_embedding, snapshot, lexical
+        )
+        retrieval.timings["prefetch_ms"] = prefetch_ms
+        
+        # 4단계: LLM 응답 생성 및 후처리
+        return await loop.run_in_executor(
+            executor, self._respond, user_message, session_id, retrieval, cache_embedding, corpus_version
+        )
+    
+    def _cached_answer_response(self, session_id: str, cached_response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        답변 캐시 적중 응답 - 대화 기록과 비용 기록 후 캐시된 응답 반환
+        
+        Parameters:
+        - session_id: 세션 ID
+        - cached_response: 캐시된 응답
+        
+        Returns:
+        - 응답 내용
+        """
+        self.conversations[session_id].append({
+            "role": "assistant",
+            "content": cached_response.get("answer", "")
+        })
+        
+        # 비용 추적 완료 및 로깅
+        self.cost_tracker.stop()
+        cost_info = self.cost_tracker.log_costs(request_id=session_id, request_type="chat_cache")
+        
+        # 응답에 비용 정보 추가 (개발용)
+        if os.environ.get("COST_DEBUG", "").lower() == "true":
+            cached_response["_debug_cost"] = cost_info
+        
+        return cached_response
+    
+    def _respond(self, user_message: str, session_id: str, retrieval: RetrievalContext,
+                 cache_embedding: Optional[List[float]], corpus_version: str) -> Dict[str, Any]:
+        """
+        검색 결과로 LLM 응답을 생성하고 응답 형식 정리, 대화 기록, 답변 캐시, 비용 기록까지 처리
+        
+        Parameters:
+        - user_message: 사용자 메시지
+        - session_id: 세션 ID (사용자 메시지가 이미 대화 기록에 추가된 상태)
+        - retrieval: 검색 컨텍스트
+        - cache_embedding: 답변 캐시 조회에 사용한 질문 임베딩 (없으면 None)
+        - corpus_version: 검색에 사용한 세대의 코퍼스 버전
+        
+        Returns:
+        - 응답 내용
+        """
+        relevant_docs = retrieval.documents
+        context = ""
+        sources: List[str] = []
+        
         try:
-            # 관련 문서 검색 시도
-            relevant_docs = []
-            embedding_token_usage = {"input_tokens": 0, "model_id": ""}
-            try:
-                if hasattr(self, 'retriever'):
-                    relevant_docs, retrieval_token_usage = self.retriever.retrieve_with_usage(user_message)
-                    # 임베딩 토큰 사용량 추적
-                    embedding_token_usage = retrieval_token_usage
-                    if embedding_token_usage["model_id"]:
-                        self.cost_tracker.add_bedrock_cost(
-                            embedding_token_usage["model_id"],
-                            embedding_token_usage["input_tokens"],
-                            0  # 임베딩은 출력 토큰 없음
-                        )
-            except Exception as retriever_error:
-                logger.error(f"문서 검색 중 오류: {str(retriever_error)}")
-            
-            # 검색 결과 확인
-            if not relevant_docs:
-                logger.warning(f"쿼리 '{user_message[:30]}...'에 대한 관련 문서를 찾지 못했습니다.")
-            else:
-                # S3 비용 추적 (PDF 접근)
-                s3_requests = 1 if relevant_docs else 0
-                s3_data_size = sum(len(doc.get('content', '')) for doc in relevant_docs) / 1024  # KB 단위
-                self.cost_tracker.add_s3_cost(get_requests=s3_requests, data_size_kb=s3_data_size)
-            
             # 컨텍스트 구성
-            context = "\n\n".join([doc['content'] for doc in relevant_docs]) if relevant_docs else ""
-            sources = [doc['source'] for doc in relevant_docs] if relevant_docs else []
+            context = retrieval.context_text
+            sources = retrieval.sources
+            
+            # 응답에 표시할 출처 정보를 미리 계산
+            self._prepare_display_sources(retrieval)
             
             # 프롬프트 구성 및 응답 생성
-            response, llm_token_usage = self._generate_response(user_message, context, session_id)
+            response, llm_token_usage = self._generate_response(user_message, retrieval, session_id)
+            logger.info(f"단계별 소요 시간(ms): {', '.join(f'{k}={v:.1f}' for k, v in retrieval.timings.items())}")
             
             # LLM 토큰 사용량 추적
             if llm_token_usage["model_id"]:
@@ -251,6 +475,9 @@ class ChatService:
                         # 원본 JSON 응답 반환
                         response_data = json_response
                         
+                        if llm_token_usage["model_id"] and relevant_docs:
+                            self._store_cached_answer(user_message, cache_embedding, response_data, corpus_version)
+                        
                         # 비용 추적 완료 및 로깅
                         self.cost_tracker.stop()
                         cost_info = self.cost_tracker.log_costs(request_id=session_id, request_type="chat_json")
@@ -311,6 +538,9 @@ class ChatService:
                 "sources": default_sources
             }
             
+            if llm_token_usage["model_id"] and relevant_docs:
+                self._store_cached_answer(user_message, cache_embedding, response_data, corpus_version)
+            
             # 비용 추적 완료 및 로깅
             self.cost_tracker.stop()
             cost_info = self.cost_tracker.log_costs(request_id=session_id, request_type="chat_text")
@@ -377,58 +607,221 @@ class ChatService:
                 "error": str(e)
             }
     
-    def _generate_response(self, user_message: str, context: str, session_id: str) -> Tuple[str, Dict[str, Any]]:
+    def stream_message(self, user_message: str, session_id: str,
+                       cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
         """
-        LLM을 사용하여 응답 생성
-        
+        사용자 메시지를 처리하고 응답을 스트리밍으로 생성
+
+        검색과 답변 캐시 확인은 process_message와 같고, 답변은 Bedrock 스트리밍으로 받아
+        조각 단위로 내보낸 뒤 출처 정보를 마지막에 붙입니다. cancel_event가 설정되거나
+        제너레이터가 닫히면 Bedrock 스트림을 닫고, 완료되지 않은 답변은 대화 기록에 남기지 않습니다.
+
         Parameters:
         - user_message: 사용자 메시지
-        - context: 검색된 문서 컨텍스트
         - session_id: 세션 ID
-        
+        - cancel_event: 클라이언트 연결 종료 등으로 생성을 중단할 때 설정하는 이벤트
+
         Returns:
-        - LLM 응답, 토큰 사용량 {input_tokens, output_tokens, model_id}
+        - 이벤트 제너레이터 {event: token|sources|done|error, data}
         """
-        # LLM 클라이언트가 초기화되지 않은 경우
-        if not hasattr(self, 'llm') or self.llm.bedrock_runtime is None:
-            logger.warning("LLM 클라이언트가 초기화되지 않아 기본 응답 반환")
-            if context:
-                return "이 질문에 관련된 정보를 찾았으나, 현재 AI 응답 생성에 문제가 있습니다. 잠시 후 다시 시도해 주세요.", {"input_tokens": 0, "output_tokens": 0, "model_id": ""}
+        self.cost_tracker.start(self.lambda_memory_mb)
+        start_time = time.time()
+        logger.info(f"사용자 메시지 스트리밍 처리 - 세션: {session_id}")
+
+        generation = self.index_refresher.current
+        corpus_version = generation.document_store.corpus_version
+
+        if not user_message or not user_message.strip():
+            logger.warning(f"세션 {session_id}에서 빈 메시지 수신")
+            self.cost_tracker.stop()
+            self.cost_tracker.log_costs(request_id=session_id, request_type="chat_stream_empty")
+            yield {"event": "token", "data": {"text": "메시지가 비어 있습니다. 질문을 입력해 주세요."}}
+            yield {"event": "sources", "data": {"sources": []}}
+            yield {"event": "done", "data": {"elapsed_seconds": time.time() - start_time}}
+            return
+
+        if session_id not in self.conversations:
+            self.conversations[session_id] = []
+        history = self.conversations[session_id]
+        history.append({"role": "user", "content": user_message})
+
+        # 캐시된 답변은 한 번에 보냄
+        cached_response, cache_embedding = self._lookup_cached_answer(user_message, session_id, corpus_version)
+        if cached_response is not None:
+            answer = cached_response.get("answer", "")
+            history.append({"role": "assistant", "content": answer})
+            self.cost_tracker.stop()
+            self.cost_tracker.log_costs(request_id=session_id, request_type="chat_stream_cache")
+            yield {"event": "token", "data": {"text": answer}}
+            yield {"event": "sources", "data": {"sources": cached_response.get("sources", [])}}
+            yield {"event": "done", "data": {"cached": True, "elapsed_seconds": time.time() - start_time}}
+            return
+
+        token_usage: Dict[str, Any] = {}
+        chunks: List[str] = []
+        first_token_at = None
+        completed = False
+        try:
+            retrieval = self._retrieve(generation, user_message, cache_embedding)
+            self._prepare_display_sources(retrieval)
+
+            if not hasattr(self, 'llm') or self.llm.bedrock_runtime is None:
+                logger.warning("LLM 클라이언트가 초기화되지 않아 기본 응답 반환")
+                stream = iter(["죄송합니다. 현재 AI 응답 생성에 문제가 있습니다. 잠시 후 다시 시도해 주세요."])
             else:
-                return "죄송합니다. 현재 AI 응답 생성에 문제가 있습니다. 잠시 후 다시 시도해 주세요.", {"input_tokens": 0, "output_tokens": 0, "model_id": ""}
-                
-        # 빠른 응답을 위해 대화 기록 제한 (최근 5개만 사용)
-        conversation_history = self.conversations[session_id][-5:]
-        
-        # 원본 문서 정보 및 출처 가져오기
-        doc_sources = []
-        if context:
+                stream = self.llm.generate_response_stream(
+                    system_prompt=self._build_system_prompt(retrieval.context_text, json_format=False),
+                    conversation_history=history[-5:],
+                    token_usage=token_usage
+                )
+
+            generation_start = time.time()
             try:
-                # 검색된 문서의 원본 정보 추출
-                for doc in self.retriever.retrieve(user_message):
-                    source_display, content_lines = self._extract_detailed_source_info(doc)
-                    doc_sources.append({
-                        'source': source_display,
-                        'contents': content_lines
-                    })
-            except Exception as e:
-                logger.error(f"문서 원본 정보 추출 중 오류: {str(e)}")
-                # 기본 소스 정보라도 추가
-                if context:
-                    doc_sources.append({
-                        'source': "문서",
-                        'contents': ["관련 문서 내용"]
-                    })
+                for text in stream:
+                    if cancel_event is not None and cancel_event.is_set():
+                        logger.info(f"스트리밍 취소 - 세션: {session_id}")
+                        break
+                    if first_token_at is None:
+                        first_token_at = time.time()
+                    chunks.append(text)
+                    yield {"event": "token", "data": {"text": text}}
+                else:
+                    completed = True
+            finally:
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+            retrieval.record("generation", generation_start)
+
+            if token_usage.get("model_id"):
+                self.cost_tracker.add_bedrock_cost(
+                    token_usage["model_id"],
+                    token_usage["input_tokens"],
+                    token_usage["output_tokens"]
+                )
+
+            if not completed:
+                # 중단된 답변은 기록하지 않고 질문도 되돌림
+                history.pop()
+                self.cost_tracker.stop()
+                self.cost_tracker.log_costs(request_id=session_id, request_type="chat_stream_cancelled")
+                return
+
+            response_data = {"answer": "".join(chunks), "sources": retrieval.display_sources}
+            history.append({"role": "assistant", "content": response_data["answer"]})
+            if token_usage.get("model_id") and retrieval.documents:
+                self._store_cached_answer(user_message, cache_embedding, response_data, corpus_version)
+
+            self.cost_tracker.stop()
+            self.cost_tracker.log_costs(request_id=session_id, request_type="chat_stream")
+            logger.info(f"단계별 소요 시간(ms): {', '.join(f'{k}={v:.1f}' for k, v in retrieval.timings.items())}")
+
+            yield {"event": "sources", "data": {"sources": response_data["sources"]}}
+            yield {"event": "done", "data": {
+                "usage": token_usage,
+                "elapsed_seconds": time.time() - start_time,
+                "time_to_first_token_seconds": first_token_at - start_time if first_token_at is not None else None
+            }}
+        except GeneratorExit:
+            # 소비자가 제너레이터를 닫음 (연결 종료) - 취소와 같이 질문을 되돌림
+            if not completed:
+                history.pop()
+                self.cost_tracker.stop()
+                self.cost_tracker.log_costs(request_id=session_id, request_type="chat_stream_cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"스트리밍 메시지 처리 중 오류: {str(e)}")
+            logger.error(traceback.format_exc())
+
+            fallback_response = "죄송합니다. 요청을 처리하는 중에 문제가 발생했습니다."
+            history.append({"role": "assistant", "content": "".join(chunks) or fallback_response})
+            self.cost_tracker.stop()
+            self.cost_tracker.log_costs(request_id=session_id, request_type="chat_stream_error")
+            yield {"event": "error", "data": {"message": fallback_response, "error": str(e)}}
+
+    def _lookup_cached_answer(self, user_message: str, session_id: str, corpus_version: str,
+                              query_embedding: Optional[List[float]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        의미 기반 답변 캐시 조회 (세션의 첫 질문만 대상)
         
-        # 빈 문서 소스 배열이라도 생성
-        if not doc_sources and context:
-            doc_sources = [{
-                'source': "문서",
-                'contents': ["관련 문서 내용"]
-            }]
+        Parameters:
+        - user_message: 사용자 메시지
+        - session_id: 세션 ID (사용자 메시지가 이미 대화 기록에 추가된 상태)
+        - corpus_version: 현재 세대의 코퍼스 버전
+        - query_embedding: 이미 계산한 질문 임베딩 (None이면 여기서 생성)
+        
+        Returns:
+        - 캐시된 응답 (없으면 None), 조회에 사용한 질문 임베딩 (조회하지 않았으면 None)
+        """
+        if self.answer_cache is None or len(self.conversations[session_id]) != 1:
+            return None, None
+        try:
+            # 쿼리 임베딩은 캐시되므로 이후 검색에서 다시 호출하지 않음
+            cache_embedding = query_embedding if query_embedding is not None else self.embedding_service.embed_query(user_message)
+            return self.answer_cache.lookup(cache_embedding, corpus_version), cache_embedding
+        except Exception as cache_error:
+            logger.error(f"답변 캐시 조회 중 오류: {str(cache_error)}")
+            return None, None
+    
+    def _retrieve(self, generation: IndexGeneration, user_message: str,
+                  query_embedding: Optional[List[float]], snapshot: Optional[DocumentSnapshot] = None,
+                  lexical: Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]] = None) -> RetrievalContext:
+        """
+        관련 문서 검색 및 임베딩/S3 비용 기록 (검색 실패 시 빈 컨텍스트)
+        
+        Parameters:
+        - generation: 요청에 사용할 인덱스 세대
+        - user_message: 사용자 메시지
+        - query_embedding: 이미 계산한 질문 임베딩 (없으면 None)
+        - snapshot: 검색할 문서 스냅샷 (None이면 현재 스냅샷)
+        - lexical: 같은 스냅샷에서 미리 검색한 BM25 후보 (없으면 None)
+        
+        Returns:
+        - 검색 컨텍스트
+        """
+        retrieval = RetrievalContext(query=user_message)
+        try:
+            if generation.retriever is not None:
+                retrieval = generation.retriever.retrieve_context(
+                    user_message, query_embedding=query_embedding, snapshot=snapshot, lexical=lexical
+                )
+                # 임베딩 토큰 사용량 추적
+                embedding_token_usage = retrieval.usage
+                if embedding_token_usage.get("model_id"):
+                    self.cost_tracker.add_bedrock_cost(
+                        embedding_token_usage["model_id"],
+                        embedding_token_usage["input_tokens"],
+                        0  # 임베딩은 출력 토큰 없음
+                    )
+        except Exception as retriever_error:
+            logger.error(f"문서 검색 중 오류: {str(retriever_error)}")
+        
+        relevant_docs = retrieval.documents
+        
+        # 검색 결과 확인
+        if not relevant_docs:
+            logger.warning(f"쿼리 '{user_message[:30]}...'에 대한 관련 문서를 찾지 못했습니다.")
+        else:
+            # S3 비용 추적 (PDF 접근)
+            s3_data_size = sum(len(doc.get('content', '')) for doc in relevant_docs) / 1024  # KB 단위
+            self.cost_tracker.add_s3_cost(get_requests=1, data_size_kb=s3_data_size)
+        return retrieval
+    
+    def _build_system_prompt(self, context: str, json_format: bool = True) -> str:
+        """
+        문서 컨텍스트로 시스템 프롬프트 구성
         
-        # JSON 응답 형식 지시사항 추가 - 중첩 JSON 문제 해결을 위한 명확한 지시
-        json_format_instruction = """
+        Parameters:
+        - context: 검색된 문서 컨텍스트
+        - json_format: JSON 응답 형식({answer, sources}) 지시 포함 여부
+          (스트리밍은 답변 텍스트를 그대로 보내고 출처를 마지막에 따로 붙이므로 False)
+        
+        Returns:
+        - 시스템 프롬프트
+        """
+        if json_format:
+            # JSON 응답 형식 지시사항 추가 - 중첩 JSON 문제 해결을 위한 명확한 지시
+            json_format_instruction = """
 반드시 다음 형식으로만 JSON 응답을 제공하세요. 중첩된 JSON이나 이스케이프된 따옴표를 사용하지 마세요:
 {
   "answer": "답변 내용을 여기에 작성",
@@ -441,9 +834,11 @@ class ChatService:
 }
 JSON 문법을 정확히 준수하고, 답변은 "answer" 필드에 직접 작성하세요. 절대로 JSON 안에 또 다른 JSON을 포함시키지 마세요.
 """
+        else:
+            # 스트리밍 응답은 텍스트를 그대로 전송하므로 JSON으로 감싸지 않음
+            json_format_instruction = "답변 본문만 작성하세요. 출처 목록은 시스템이 답변 뒤에 따로 표시하므로 JSON 형식을 사용하지 마세요."
         
-        # 프롬프트 간소화하여 처리 속도 향상
-        system_prompt = f"""당신은 문서 기반 질의응답 AI입니다.
+        return f"""당신은 문서 기반 질의응답 AI입니다.
 주어진 컨텍스트 정보만 사용하여 사용자 질문에 답변하세요.
 컨텍스트에 없는 내용은 '이 정보는 제공된 문서에 포함되어 있지 않습니다'라고 답하세요.
 반드시 관련 문서 출처 정보(파일명, 페이지, 줄 번호)를 포함해 주세요.
@@ -455,6 +850,81 @@ JSON 문법을 정확히 준수하고, 답변은 "answer" 필드에 직접 작
 
 {json_format_instruction}
 """
+    
+    def _store_cached_answer(self, user_message: str, cache_embedding: Optional[List[float]],
+                             response_data: Dict[str, Any], corpus_version: str) -> None:
+        """
+        성공한 답변을 의미 기반 답변 캐시에 저장
+        
+        Parameters:
+        - user_message: 사용자 메시지
+        - cache_embedding: 캐시 조회에 사용한 질문 임베딩 (None이면 저장하지 않음)
+        - response_data: 반환할 응답 데이터
+        - corpus_version: 답변 생성에 사용한 세대의 코퍼스 버전
+        """
+        if self.answer_cache is None or cache_embedding is None:
+            return
+        try:
+            self.answer_cache.store(user_message, cache_embedding, response_data, corpus_version)
+        except Exception as e:
+            logger.error(f"답변 캐시 저장 중 오류: {str(e)}")
+    
+    def _prepare_display_sources(self, retrieval: RetrievalContext) -> None:
+        """
+        검색된 문서의 출처 표시 정보를 검색 컨텍스트에 저장
+        
+        Parameters:
+        - retrieval: 검색 컨텍스트
+        """
+        display_sources = []
+        for doc in retrieval.documents:
+            try:
+                source_display, content_lines = self._extract_detailed_source_info(doc)
+                display_sources.append({
+                    'source': source_display,
+                    'contents': content_lines
+                })
+            except Exception as e:
+                logger.error(f"문서 원본 정보 추출 중 오류: {str(e)}")
+        
+        # 기본 소스 정보라도 추가
+        if not display_sources and retrieval.documents:
+            display_sources = [{
+                'source': "문서",
+                'contents': ["관련 문서 내용"]
+            }]
+        retrieval.display_sources = display_sources
+    
+    def _generate_response(self, user_message: str, retrieval: RetrievalContext, session_id: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        LLM을 사용하여 응답 생성
+        
+        Parameters:
+        - user_message: 사용자 메시지
+        - retrieval: 검색 컨텍스트 (문서, 출처 표시 정보, 단계별 소요 시간)
+        - session_id: 세션 ID
+        
+        Returns:
+        - LLM 응답, 토큰 사용량 {input_tokens, output_tokens, model_id}
+        """
+        context = retrieval.context_text
+        
+        # LLM 클라이언트가 초기화되지 않은 경우
+        if not hasattr(self, 'llm') or self.llm.bedrock_runtime is None:
+            logger.warning("LLM 클라이언트가 초기화되지 않아 기본 응답 반환")
+            if context:
+                return "이 질문에 관련된 정보를 찾았으나, 현재 AI 응답 생성에 문제가 있습니다. 잠시 후 다시 시도해 주세요.", {"input_tokens": 0, "output_tokens": 0, "model_id": ""}
+            else:
+                return "죄송합니다. 현재 AI 응답 생성에 문제가 있습니다. 잠시 후 다시 시도해 주세요.", {"input_tokens": 0, "output_tokens": 0, "model_id": ""}
+                
+        # 빠른 응답을 위해 대화 기록 제한 (최근 5개만 사용)
+        conversation_history = self.conversations[session_id][-5:]
+        
+        # 검색 단계에서 계산한 출처 정보 사용 (재검색하지 않음)
+        doc_sources = retrieval.display_sources
+        
+        # 프롬프트 간소화하여 처리 속도 향상 (JSON 응답 형식 지시 포함)
+        system_prompt = self._build_system_prompt(context, json_format=True)
         
         # 문서 소스 정보 로그 추가
         if doc_sources:
@@ -462,10 +932,12 @@ JSON 문법을 정확히 준수하고, 답변은 "answer" 필드에 직접 작
         
         # LLM에 요청 보내기
         try:
+            generation_start = time.time()
             response, token_usage = self.llm.generate_response(
                 system_prompt=system_prompt,
                 conversation_history=conversation_history
             )
+            retrieval.record("generation", generation_start)
             
             # JSON 응답인지 확인
             if response.strip().startswith("{") and response.strip().endswith("}"):
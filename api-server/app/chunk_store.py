@@ -0,0 +1,283 @@
+import json
+import logging
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 정수 열 (값이 없으면 _MISSING)
+INT_FIELDS = ("page", "chunk", "char_start", "char_end", "line_start", "line_end")
+_MISSING = -1
+# 열로 저장하는 키 (그 외 키는 희소 extras에 저장)
+_COLUMN_KEYS = frozenset(("content", "source", "file") + INT_FIELDS)
+
+
+def _copy_array(typecode: str, source) -> array:
+    """배열 또는 memoryview를 새 array로 복사 (바이트 단위 복사)"""
+    copied = array(typecode)
+    copied.frombytes(memoryview(source).cast('B'))
+    return copied
+
+
+def default_source(file: str, page: int) -> str:
+    """PDF 페이지 문서의 기본 출처 표기 (pdf_extract와 같은 형식)"""
+    return f"{file} (페이지 {page})"
+
+
+class ChunkView(Mapping):
+    """
+    ChunkStore의 한 청크를 dict처럼 읽는 가벼운 뷰
+
+    인스턴스에는 저장소 참조와 행 번호만 있고, 값은 접근할 때 열에서 읽습니다.
+    """
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "ChunkStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self._store.value(self._index, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.keys(self._index))
+
+    def __len__(self) -> int:
+        return len(self._store.keys(self._index))
+
+    def __repr__(self) -> str:
+        return f"ChunkView({self.to_dict()!r})"
+
+    @property
+    def index(self) -> int:
+        """저장소 내 행 번호"""
+        return self._index
+
+    def to_dict(self) -> Dict[str, Any]:
+        """일반 dict 사본"""
+        return {key: self[key] for key in self}
+
+
+class ChunkStore(Sequence):
+    """
+    열 기반 청크 저장소 - 모든 청크 텍스트를 하나의 UTF-8 아레나에 두고 오프셋 배열로 접근
+
+    파일 이름은 한 번만 저장하고 청크에는 정수 ID만 두며, 페이지/청크 번호와 문자/줄 오프셋은
+    정수 배열로 저장합니다. 출처 문자열은 기본 형식과 다를 때만, 그 외 키(duplicates 등)는
+    있는 청크만 희소하게 저장합니다. 생성 후에는 변경하지 않으므로 스냅샷 간에 복사 없이 공유되고,
+    to_sections/from_sections로 인덱스 아티팩트 섹션에 그대로 쓰고 mmap 위에서 바로 읽습니다.
+    """
+
+    def __init__(self):
+        """빈 ChunkStore 생성 (from_documents 또는 from_sections 사용)"""
+        self._arena = b""
+        self._offsets = array('Q', [0])
+        self._file_ids = array('i')
+        self._files: List[str] = []
+        self._columns: Dict[str, Any] = {name: array('i') for name in INT_FIELDS}
+        # 기본 형식과 다른 출처 문자열 (행 번호 -> 출처)
+        self._sources: Dict[int, str] = {}
+        # 열이 없는 추가 키 (행 번호 -> {키: 값})
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Mapping]) -> "ChunkStore":
+        """
+        문서 dict(또는 ChunkView) 목록으로 저장소 생성
+
+        Parameters:
+        - documents: 문서 목록 {content, source, page, file, chunk, char_start, ...}
+
+        Returns:
+        - ChunkStore 인스턴스
+        """
+        return cls()._with_documents(documents)
+
+    def appended(self, documents: Iterable[Mapping]) -> "ChunkStore":
+        """
+        문서를 추가한 새 저장소 생성 (기존 저장소는 그대로 유지)
+
+        Parameters:
+        - documents: 추가할 문서 목록
+
+        Returns:
+        - 새 ChunkStore
+        """
+        return self._with_documents(documents)
+
+    def _with_documents(self, documents: Iterable[Mapping]) -> "ChunkStore":
+        """현재 행 뒤에 문서를 이어 붙인 새 저장소"""
+        store = ChunkStore()
+        store._files = list(self._files)
+        store._file_ids = _copy_array('i', self._file_ids)
+        store._offsets = _copy_array('Q', self._offsets)
+        store._columns = {name: _copy_array('i', column) for name, column in self._columns.items()}
+        store._sources = dict(self._sources)
+        store._extras = dict(self._extras)
+
+        file_index = {name: file_id for file_id, name in enumerate(store._files)}
+        parts = [bytes(self._arena)]
+        position = store._offsets[-1]
+        index = len(self)
+        for doc in documents:
+            encoded = doc.get('content', '').encode("utf-8")
+            parts.append(encoded)
+            position += len(encoded)
+            store._offsets.append(position)
+
+            file = doc.get('file')
+            if file is None:
+                store._file_ids.append(_MISSING)
+            else:
+                file_id = file_index.get(file)
+                if file_id is None:
+                    file_id = file_index[file] = len(store._files)
+                    store._files.append(file)
+                store._file_ids.append(file_id)
+
+            for name in INT_FIELDS:
+                value = doc.get(name)
+                store._columns[name].append(_MISSING if value is None else int(value))
+
+            source = doc.get('source')
+            if source is not None and (file is None or doc.get('page') is None
+                                       or source != default_source(file, doc.get('page'))):
+                store._sources[index] = source
+
+            extras = {key: value for key, value in doc.items() if key not in _COLUMN_KEYS}
+            if extras:
+                store._extras[index] = extras
+            index += 1
+
+        store._arena = b"".join(parts)
+        return store
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ChunkStore.from_documents(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("청크 인덱스 범위를 벗어났습니다.")
+        return ChunkView(self, index)
+
+    def content(self, index: int) -> str:
+        """청크 텍스트 (아레나에서 필요한 구간만 디코딩)"""
+        return str(self._arena[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def file(self, index: int) -> Optional[str]:
+        """청크의 파일 이름 (없으면 None)"""
+        file_id = self._file_ids[index]
+        return None if file_id == _MISSING else self._files[file_id]
+
+    def value(self, index: int, key: str) -> Any:
+        """
+        한 청크의 키 값
+
+        Parameters:
+        - index: 행 번호
+        - key: 문서 키
+
+        Returns:
+        - 값 (없으면 KeyError)
+        """
+        if key == 'content':
+            return self.content(index)
+        if key == 'file':
+            file = self.file(index)
+            if file is not None:
+                return file
+        elif key == 'source':
+            source = self._sources.get(index)
+            if source is not None:
+                return source
+            file, page = self.file(index), self._columns['page'][index]
+            if file is not None and page != _MISSING:
+                return default_source(file, page)
+        elif key in self._columns:
+            value = self._columns[key][index]
+            if value != _MISSING:
+                return value
+        else:
+            extras = self._extras.get(index)
+            if extras is not None and key in extras:
+                return extras[key]
+        raise KeyError(key)
+
+    def keys(self, index: int) -> List[str]:
+        """한 청크에 있는 키 목록 (content, source, page, file, 청크 필드, 추가 키 순)"""
+        keys = ['content']
+        file = self.file(index)
+        if index in self._sources or (file is not None and self._columns['page'][index] != _MISSING):
+            keys.append('source')
+        if self._columns['page'][index] != _MISSING:
+            keys.append('page')
+        if file is not None:
+            keys.append('file')
+        keys.extend(name for name in INT_FIELDS[1:] if self._columns[name][index] != _MISSING)
+        keys.extend(self._extras.get(index, ()))
+        return keys
+
+    @property
+    def nbytes(self) -> int:
+        """아레나와 열 배열의 크기(바이트, 희소 항목 제외)"""
+        columns = sum(len(column) * column.itemsize for column in self._columns.values())
+        return (len(self._arena) + len(self._offsets) * self._offsets.itemsize
+                + len(self._file_ids) * self._file_ids.itemsize + columns)
+
+    def to_sections(self) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+        """
+        인덱스 아티팩트 저장용 직렬화 - 아레나와 배열은 그대로, 파일 이름과 희소 항목은 JSON
+
+        Returns:
+        - 헤더 메타데이터 {count, fields}, 섹션 이름 -> 바이트
+        """
+        meta = {"count": len(self), "fields": list(INT_FIELDS)}
+        sections = {
+            "chunk_text": bytes(self._arena),
+            "chunk_offsets": bytes(self._offsets),
+            "chunk_files": json.dumps(self._files, ensure_ascii=False).encode("utf-8"),
+            "chunk_file_ids": bytes(self._file_ids),
+            "chunk_sparse": json.dumps({
+                "sources": self._sources,
+                "extras": self._extras
+            }, ensure_ascii=False).encode("utf-8")
+        }
+        for name in INT_FIELDS:
+            sections[f"chunk_{name}"] = bytes(self._columns[name])
+        return meta, sections
+
+    @classmethod
+    def from_sections(cls, meta: Dict[str, Any], sections: Dict[str, Any]) -> "ChunkStore":
+        """
+        to_sections 결과(또는 mmap된 섹션 뷰)로 저장소 복원 - 아레나와 배열은 복사 없이 뷰로 사용
+
+        Parameters:
+        - meta: to_sections의 헤더 메타데이터
+        - sections: 섹션 이름 -> 바이트 또는 memoryview
+
+        Returns:
+        - ChunkStore 인스턴스
+        """
+        store = cls()
+        count = meta["count"]
+        store._arena = memoryview(sections["chunk_text"]).cast('B')
+        store._offsets = memoryview(sections["chunk_offsets"]).cast('B').cast('Q')
+        store._file_ids = memoryview(sections["chunk_file_ids"]).cast('B').cast('i')
+        store._files = json.loads(bytes(sections["chunk_files"]).decode("utf-8"))
+        for name in meta.get("fields", INT_FIELDS):
+            store._columns[name] = memoryview(sections[f"chunk_{name}"]).cast('B').cast('i')
+        sparse = json.loads(bytes(sections["chunk_sparse"]).decode("utf-8"))
+        # JSON 객체 키는 문자열이므로 행 번호로 되돌림
+        store._sources = {int(index): source for index, source in sparse.get("sources", {}).items()}
+        store._extras = {int(index): extras for index, extras in sparse.get("extras", {}).items()}
+
+        if len(store._offsets) != count + 1:
+            raise ValueError(f"청크 오프셋 개수가 맞지 않습니다: {len(store._offsets) - 1} vs {count}")
+        return store
@@ -0,0 +1,184 @@
+import re
+import bisect
+import logging
+from typing import List, Dict, Any, Tuple, Sequence
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 문장 경계: 숫자 목록("1.")이 아닌 마침표/물음표/느낌표 뒤의 공백, 또는 줄바꿈
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[^\d\s][.!?。])\s+|\n+")
+# 한글 음절
+_HANGUL = re.compile(r"[가-힣]")
+# 공백이 아닌 문자
+_NON_SPACE = re.compile(r"\S")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 토큰 수 추정 - 한글 음절은 1토큰, 그 외 문자는 4자당 1토큰
+
+    Parameters:
+    - text: 텍스트
+
+    Returns:
+    - 추정 토큰 수
+    """
+    hangul = len(_HANGUL.findall(text))
+    others = len(_NON_SPACE.findall(text)) - hangul
+    return hangul + (others + 3) // 4
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    텍스트를 문장 단위 구간으로 분리 (한국어 종결 부호와 줄바꿈 기준)
+
+    Parameters:
+    - text: 원본 텍스트
+
+    Returns:
+    - 문장별 (시작, 끝) 문자 오프셋 목록 (앞뒤 공백 제외)
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        if match.start() > start:
+            spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text) and text[start:].strip():
+        spans.append((start, len(text.rstrip())))
+    return [(s, e) for s, e in spans if text[s:e].strip()]
+
+
+class TextChunker:
+    """
+    토큰 추정 기반 청커 - 문장 경계를 지키며 페이지를 겹치는 청크로 분할
+
+    각 청크는 원본 페이지 텍스트 기준 문자/줄 오프셋을 함께 저장해
+    출처 표시나 원문 하이라이트에 바로 사용할 수 있습니다.
+    """
+
+    def __init__(self, max_tokens: int = 500, overlap_tokens: int = 50):
+        """
+        TextChunker 초기화
+
+        Parameters:
+        - max_tokens: 청크당 최대 추정 토큰 수
+        - overlap_tokens: 인접 청크 사이에 겹칠 추정 토큰 수
+        """
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+
+    def config(self) -> Dict[str, Any]:
+        """코퍼스 지문에 포함할 청킹 설정"""
+        return {"max_tokens": self.max_tokens, "overlap_tokens": self.overlap_tokens}
+
+    def _split_long(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """한 문장이 최대 크기를 넘으면 공백 위치에서 강제로 분할"""
+        pieces = []
+        while start < end:
+            # 한 글자당 최소 0.25토큰이므로 max_tokens × 4자 이내에서 토큰 한도에 맞는 끝 위치를 이진 탐색
+            low, high = start + 1, min(end, start + self.max_tokens * 4)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if estimate_tokens(text[start:middle]) <= self.max_tokens:
+                    low = middle
+                else:
+                    high = middle - 1
+            stop = low
+            if stop < end:
+                space = text.rfind(" ", start + 1, stop)
+                if space > start + (stop - start) // 2:
+                    stop = space
+            pieces.append((start, stop))
+            start = stop
+            while start < end and text[start].isspace():
+                start += 1
+        return pieces
+
+    def split(self, text: str) -> List[Tuple[int, int]]:
+        """
+        텍스트를 청크 구간으로 분할
+
+        Parameters:
+        - text: 원본 텍스트
+
+        Returns:
+        - 청크별 (시작, 끝) 문자 오프셋 목록
+        """
+        units: List[Tuple[int, int, int]] = []
+        for start, end in split_sentences(text):
+            tokens = estimate_tokens(text[start:end])
+            if tokens > self.max_tokens:
+                units.extend((s, e, estimate_tokens(text[s:e])) for s, e in self._split_long(text, start, end))
+            else:
+                units.append((start, end, tokens))
+
+        chunks = []
+        first = 0
+        while first < len(units):
+            # 토큰 한도까지 문장을 채움
+            last = first
+            total = units[first][2]
+            while last + 1 < len(units) and total + units[last + 1][2] <= self.max_tokens:
+                last += 1
+                total += units[last][2]
+            chunks.append((units[first][0], units[last][1]))
+            if last + 1 >= len(units):
+                break
+
+            # 다음 청크는 끝부분 문장 일부를 겹쳐서 시작 (항상 한 문장 이상 전진)
+            next_first = last + 1
+            overlap = 0
+            while next_first - 1 > first and overlap + units[next_first - 1][2] <= self.overlap_tokens:
+                next_first -= 1
+                overlap += units[next_first][2]
+            first = next_first
+        return chunks
+
+    def chunk_page(self, page: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        페이지 문서를 청크 문서로 분할
+
+        Parameters:
+        - page: 페이지 문서 {content, source, page, file}
+
+        Returns:
+        - 청크 문서 목록 {content, source, page, file, chunk, char_start, char_end, line_start, line_end}
+        """
+        text = page.get('content', '')
+        # 줄 시작 오프셋을 미리 계산해 두고 이진 탐색으로 줄 번호 변환
+        line_starts = [0] + [i + 1 for i, ch in enumerate(text) if ch == "\n"]
+
+        chunks = []
+        for index, (start, end) in enumerate(self.split(text)):
+            chunk = dict(page)
+            chunk.update({
+                'content': text[start:end],
+                'chunk': index,
+                'char_start': start,
+                'char_end': end,
+                'line_start': bisect.bisect_right(line_starts, start),
+                'line_end': bisect.bisect_right(line_starts, max(start, end - 1))
+            })
+            chunks.append(chunk)
+        return chunks
+
+    def chunk_documents(self, pages: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        페이지 문서 목록을 청크 문서 목록으로 변환 (입력 순서 유지)
+
+        Parameters:
+        - pages: 페이지 문서 목록
+
+        Returns:
+        - 청크 문서 목록
+        """
+        chunks = []
+        for page in pages:
+            chunks.extend(self.chunk_page(page))
+        if pages:
+            logger.info(f"청킹 완료: 페이지 {len(pages)}개 -> 청크 {len(chunks)}개 "
+                        f"(최대 {self.max_tokens}토큰, 겹침 {self.overlap_tokens}토큰)")
+        return chunks
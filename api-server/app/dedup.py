@@ -0,0 +1,200 @@
+import re
+import zlib
+import bisect
+import hashlib
+import logging
+import unicodedata
+from typing import List, Dict, Any, Optional, Sequence, Set
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 32비트 shingle 해시를 64비트로 퍼뜨리는 곱셈 상수 (황금비)
+_MIX = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_for_dedup(text: str) -> str:
+    """중복 비교용 정규화 - NFKC, 소문자화, 공백 접기"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip()
+
+
+class MinHasher:
+    """
+    문자 n-gram 기반 MinHash 서명 계산기 (One Permutation Hashing)
+
+    해시 순열을 여러 번 적용하는 대신 해시 공간을 num_perm개 구간으로 나눠
+    구간별 최솟값을 서명으로 사용하므로, shingle당 한 번만 해시하면 됩니다.
+    빈 구간은 오른쪽으로 가장 가까운 구간 값을 회전 방식으로 채웁니다.
+    한글 문서는 띄어쓰기가 불규칙하므로 단어 대신 문자 shingle을 사용합니다.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5):
+        """
+        MinHasher 초기화
+
+        Parameters:
+        - num_perm: 서명 길이 (해시 구간 수)
+        - shingle_size: 문자 shingle 길이
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    def shingles(self, text: str) -> Set[int]:
+        """정규화된 텍스트의 64비트 shingle 해시 집합"""
+        size = self.shingle_size
+        if len(text) <= size:
+            windows = [text] if text else []
+        else:
+            windows = (text[i:i + size] for i in range(len(text) - size + 1))
+        return {zlib.crc32(window.encode("utf-8")) * _MIX & _MASK64 for window in windows}
+
+    def signature(self, text: str) -> List[int]:
+        """
+        정규화된 텍스트의 MinHash 서명
+
+        Parameters:
+        - text: normalize_for_dedup 결과
+
+        Returns:
+        - 길이 num_perm의 서명
+        """
+        count = self.num_perm
+        signature: List[Optional[int]] = [None] * count
+        for value in self.shingles(text):
+            # 상위 비트로 구간 결정 (곱셈 해시는 상위 비트가 잘 섞임)
+            slot = (value * count) >> 64
+            current = signature[slot]
+            if current is None or value < current:
+                signature[slot] = value
+
+        filled = [i for i, value in enumerate(signature) if value is not None]
+        if not filled:
+            return [_MASK64] * count
+        if len(filled) < count:
+            # 회전 채우기: 빈 구간은 오른쪽 첫 번째 채워진 구간 값 + 거리 오프셋
+            for i in range(count):
+                if signature[i] is None:
+                    position = bisect.bisect_left(filled, i)
+                    source = filled[position % len(filled)]
+                    distance = (source - i) % count
+                    signature[i] = signature[source] + distance * (_MASK64 + 1)
+        return signature
+
+
+def estimate_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """두 MinHash 서명의 일치 비율로 Jaccard 유사도 추정"""
+    if not first:
+        return 0.0
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class Deduplicator:
+    """
+    정확/근사 중복 청크 제거 - 내용 해시로 완전 중복을, MinHash LSH로 근사 중복을 찾음
+
+    먼저 나온 청크를 대표로 남기고, 중복 청크의 출처는 대표 청크의 duplicates 목록에 모읍니다.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 8,
+                 min_chars: int = 20):
+        """
+        Deduplicator 초기화
+
+        Parameters:
+        - threshold: 근사 중복으로 판단할 최소 Jaccard 유사도 추정치
+        - num_perm: MinHash 서명 길이
+        - bands: LSH 밴드 수 (num_perm을 나누어 떨어지게 설정)
+        - min_chars: 근사 중복 비교를 적용할 최소 글자 수 (짧은 청크는 완전 중복만 제거)
+        """
+        self.threshold = threshold
+        self.bands = max(1, bands)
+        self.rows = max(1, num_perm // self.bands)
+        self.min_chars = min_chars
+        self.hasher = MinHasher(num_perm=self.bands * self.rows)
+        self.last_stats: Dict[str, Any] = {}
+
+    def config(self) -> Dict[str, Any]:
+        """코퍼스 지문에 포함할 중복 제거 설정"""
+        return {
+            "threshold": self.threshold,
+            "num_perm": self.hasher.num_perm,
+            "bands": self.bands,
+            "shingle_size": self.hasher.shingle_size,
+            "min_chars": self.min_chars
+        }
+
+    def deduplicate(self, documents: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        중복 청크를 대표 청크로 합침 (입력 순서 유지)
+
+        Parameters:
+        - documents: 청크 문서 목록
+
+        Returns:
+        - 대표 청크 목록 (중복이 있으면 duplicates에 출처 목록 {source, file, page})
+        """
+        canonical: List[Dict[str, Any]] = []
+        exact_index: Dict[str, int] = {}
+        signatures: List[Optional[List[int]]] = []
+        buckets: Dict[tuple, List[int]] = {}
+        exact_duplicates = 0
+        near_duplicates = 0
+
+        for doc in documents:
+            text = normalize_for_dedup(doc.get('content', ''))
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+            match = exact_index.get(digest)
+            if match is not None:
+                exact_duplicates += 1
+                self._merge(canonical[match], doc)
+                continue
+
+            signature = None
+            if len(text) >= self.min_chars:
+                signature = self.hasher.signature(text)
+                band_keys = [
+                    (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                    for band in range(self.bands)
+                ]
+                # 같은 밴드를 공유하는 후보만 서명을 비교
+                candidates = sorted({i for key in band_keys for i in buckets.get(key, ())})
+                for candidate in candidates:
+                    if estimate_similarity(signature, signatures[candidate]) >= self.threshold:
+                        match = candidate
+                        break
+                if match is not None:
+                    near_duplicates += 1
+                    exact_index[digest] = match
+                    self._merge(canonical[match], doc)
+                    continue
+                for key in band_keys:
+                    buckets.setdefault(key, []).append(len(canonical))
+
+            exact_index[digest] = len(canonical)
+            canonical.append(dict(doc))
+            signatures.append(signature)
+
+        self.last_stats = {
+            "input": len(documents),
+            "output": len(canonical),
+            "exact_duplicates": exact_duplicates,
+            "near_duplicates": near_duplicates
+        }
+        if exact_duplicates or near_duplicates:
+            logger.info(f"중복 제거: 청크 {len(documents)}개 -> {len(canonical)}개 "
+                        f"(완전 중복 {exact_duplicates}개, 근사 중복 {near_duplicates}개)")
+        return canonical
+
+    @staticmethod
+    def _merge(target: Dict[str, Any], duplicate: Dict[str, Any]) -> None:
+        """중복 청크의 출처를 대표 청크에 추가"""
+        reference = {key: duplicate[key] for key in ('source', 'file', 'page') if key in duplicate}
+        if reference.get('source') == target.get('source'):
+            return
+        references = target.setdefault('duplicates', [])
+        if reference not in references:
+            references.append(reference)
@@ -1,51 +1,191 @@
 import os
 import json
+import hashlib
 import logging
 import boto3
 import botocore.config
-import tempfile
-from typing import List, Dict, Any, Optional
-import PyPDF2
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from pathlib import Path
 import time
 import threading
+import tempfile
+from dataclasses import dataclass, field, replace
 from botocore.exceptions import ClientError
+from .aws_clients import get_client
+from .vector_index import VectorMatrix, IVFIndex, HAS_NUMPY, QUANTIZATION_MODES
+from .lexical_index import BM25Index
+from .chunk_store import ChunkStore
+from .chunker import TextChunker
+from .dedup import Deduplicator
+from .s3_sync import DocumentSync, list_pdf_objects
+from .index_artifact import (
+    IndexArtifact, compute_fingerprint, write_artifact, open_artifact,
+    download_artifact, upload_artifact
+)
+from .index_bundle import BUNDLE_KIND, bundle_etag, fetch_bundle
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+
+@dataclass(frozen=True)
+class DocumentSnapshot:
+    """
+    문서 저장소의 불변 스냅샷 - 열 기반 청크 저장소, 읽기 전용 임베딩 행렬, 검색 색인을 한 버전으로 묶음
+
+    쓰기 쪽은 새 스냅샷을 만들어 참조 하나만 교체하고, 읽기 쪽은 스냅샷을 한 번 읽은 뒤
+    락 없이 검색합니다. 스냅샷에 담긴 객체는 게시 이후 변경하지 않습니다.
+    """
+    version: int = 0
+    documents: ChunkStore = field(default_factory=ChunkStore)
+    vector_matrix: Optional[VectorMatrix] = None
+    ann_index: Optional[IVFIndex] = None
+    lexical_index: Optional[BM25Index] = None
+    corpus_version: str = ""
+
+    def has_embeddings(self) -> bool:
+        """모든 문서에 대한 임베딩이 준비되어 있는지 여부"""
+        return bool(self.vector_matrix) and len(self.vector_matrix) == len(self.documents)
+
+
 class DocumentStore:
     """
     문서 저장소 클래스 - S3 버킷에서 PDF 문서를 로드하고 관리
     """
     
-    def __init__(self, s3_bucket_name: str, aws_region: str):
+    def __init__(self, s3_bucket_name: str, aws_region: str, embedding_model_id: Optional[str] = None,
+                 use_bundle: bool = True):
         """
         DocumentStore 초기화
         
         Parameters:
         - s3_bucket_name: PDF 문서가 저장된 S3 버킷 이름
         - aws_region: AWS 리전
+        - embedding_model_id: 임베딩 모델 ID (인덱스 캐시 키에 사용, 없으면 캐시 비활성화)
+        - use_bundle: INDEX_BUNDLE_S3_KEY가 설정된 경우 미리 만든 인덱스 번들 사용 여부
         """
         self.s3_bucket_name = s3_bucket_name
         self.aws_region = aws_region
+        self.embedding_model_id = embedding_model_id
         self.s3_client = self._create_s3_client(aws_region)
-        self.documents: List[Dict[str, Any]] = []
-        self.embeddings: List[List[float]] = []
-        
-        # 스레드 안전성을 위한 락
+        # 검색 경로가 읽는 현재 스냅샷 (문서, 정규화된 임베딩 행렬, IVF/BM25 색인, 코퍼스 버전)
+        self._snapshot = DocumentSnapshot()
+        # 쓰기 작업 직렬화용 락 (읽기 경로는 락을 잡지 않음)
         self._lock = threading.RLock()
         
-        # 캐시 디렉토리
-        self.cache_dir = Path("/tmp/document_cache")
+        # 검색 인덱스 모드 (exact: 전수 비교, ivf: 근사 최근접 이웃)
+        self.index_mode = os.environ.get("VECTOR_INDEX_MODE", "exact").lower()
+        self.ivf_nlist = int(os.environ.get("IVF_NLIST", "0"))
+        self.ivf_nprobe = int(os.environ.get("IVF_NPROBE", "8"))
+        self.ivf_min_vectors = int(os.environ.get("IVF_MIN_VECTORS", "2000"))
+        
+        # 임베딩 저장 방식 (none: float32, float16, int8: 벡터별 스케일 양자화)
+        self.quantization = os.environ.get("VECTOR_QUANTIZATION", "none").lower()
+        if self.quantization not in QUANTIZATION_MODES:
+            logger.warning(f"알 수 없는 양자화 모드 {self.quantization} - float32 저장을 사용합니다.")
+            self.quantization = "none"
+        elif self.quantization == "float16" and not HAS_NUMPY:
+            # array 백엔드는 float16을 지원하지 않음 - 저장된 float16 코드 대신 float32 원본 사용
+            logger.warning("NumPy가 없어 float16 양자화 대신 float32 저장을 사용합니다.")
+            self.quantization = "none"
+        self.rerank_factor = int(os.environ.get("QUANT_RERANK_FACTOR", "4"))
+        
+        # 페이지 청킹 (CHUNK_TOKENS=0이면 페이지 단위 문서 유지)
+        chunk_tokens = int(os.environ.get("CHUNK_TOKENS", "500"))
+        self.chunker: Optional[TextChunker] = None
+        if chunk_tokens > 0:
+            self.chunker = TextChunker(
+                max_tokens=chunk_tokens,
+                overlap_tokens=int(os.environ.get("CHUNK_OVERLAP_TOKENS", "50"))
+            )
+        
+        # 정확/근사 중복 청크 제거 (반복되는 머리말, 목차, 개정판 간 동일 조항)
+        self.deduplicator: Optional[Deduplicator] = None
+        if os.environ.get("DEDUP_ENABLED", "true").lower() == "true":
+            self.deduplicator = Deduplicator(threshold=float(os.environ.get("DEDUP_THRESHOLD", "0.9")))
+        
+        # BM25 역색인 (정확한 용어 검색 및 임베딩 실패 시 폴백)
+        self.lexical_enabled = os.environ.get("LEXICAL_INDEX_ENABLED", "true").lower() == "true"
+        
+        # 캐시 디렉토리 (매니페스트, 인덱스 아티팩트)
+        self.cache_dir = Path(os.environ.get("DOCUMENT_CACHE_DIR", "/tmp/document_cache"))
         os.makedirs(self.cache_dir, exist_ok=True)
         
-        # 초기 로딩
+        # 인덱스 아티팩트 캐시 (PDF ETag 집합 + 임베딩 모델 ID 기준)
+        self.corpus_fingerprint: Optional[str] = None
+        self.index_cache_s3_prefix = os.environ.get("INDEX_CACHE_S3_PREFIX", "")
+        self._artifact: Optional[IndexArtifact] = None
+        # 아티팩트를 저장하지 못했을 때 float32 재정렬 원본을 담은 임시 mmap 파일
+        self._spill: Optional[IndexArtifact] = None
+        # 증분 동기화 매니페스트 S3 키 (비어 있으면 /tmp에만 저장)
+        self.sync_manifest_s3_key = os.environ.get("SYNC_MANIFEST_S3_KEY", "")
+        # 마지막 동기화/PDF 수집 단계별 통계
+        self.ingestion_stats: Dict[str, Any] = {}
+        # 문서 로드 실패 사유 (버킷 접근/목록 조회 오류 등, 성공하면 None) - 빈 세대로 교체하지 않기 위해 사용
+        self.load_error: Optional[str] = None
+        # 코퍼스를 구성한 PDF 객체 상태 (키 -> ETag, 크기) - 인덱스 번들 매니페스트에 기록
+        self.source_files: Dict[str, Dict[str, Any]] = {}
+        # 오프라인 수집 CLI(app.build_index)가 만든 인덱스 번들 S3 키
+        self.index_bundle_s3_key = os.environ.get("INDEX_BUNDLE_S3_KEY", "") if use_bundle else ""
+        # 로드한 번들의 ETag (번들에서 로드하지 않았으면 None)
+        self.bundle_etag: Optional[str] = None
+        
+        # 초기 로딩 (번들에 BM25 색인이 포함되어 있으면 재생성하지 않음)
         self._load_documents()
+        if self.lexical_index is None:
+            self._build_lexical_index()
         
         logger.info(f"DocumentStore 초기화 완료 - 문서 {len(self.documents)}개 로드됨")
     
+    def snapshot(self) -> DocumentSnapshot:
+        """현재 스냅샷 (여러 검색을 같은 버전으로 수행할 때 한 번 읽어 전달)"""
+        return self._snapshot
+    
+    @property
+    def documents(self) -> ChunkStore:
+        """현재 스냅샷의 문서 (ChunkView를 돌려주는 읽기 전용 시퀀스)"""
+        return self._snapshot.documents
+    
+    @property
+    def vector_matrix(self) -> Optional[VectorMatrix]:
+        """현재 스냅샷의 정규화된 임베딩 행렬 (읽기 전용)"""
+        return self._snapshot.vector_matrix
+    
+    @property
+    def ann_index(self) -> Optional[IVFIndex]:
+        """현재 스냅샷의 IVF 인덱스"""
+        return self._snapshot.ann_index
+    
+    @property
+    def lexical_index(self) -> Optional[BM25Index]:
+        """현재 스냅샷의 BM25 색인"""
+        return self._snapshot.lexical_index
+    
+    @property
+    def corpus_version(self) -> str:
+        """문서 코퍼스 버전 - 답변 캐시 등 코퍼스에 의존하는 캐시 무효화에 사용"""
+        return self._snapshot.corpus_version
+    
+    def _publish(self, **changes) -> DocumentSnapshot:
+        """
+        변경 사항을 반영한 새 스냅샷을 게시 - 락을 잡은 상태에서 호출
+        
+        Parameters:
+        - changes: 바꿀 스냅샷 필드 (documents, vector_matrix, ann_index, lexical_index, corpus_version)
+        
+        Returns:
+        - 게시한 스냅샷
+        """
+        if 'documents' in changes and not isinstance(changes['documents'], ChunkStore):
+            changes['documents'] = ChunkStore.from_documents(changes['documents'])
+        if changes.get('vector_matrix') is not None:
+            changes['vector_matrix'].freeze()
+        snapshot = replace(self._snapshot, version=self._snapshot.version + 1, **changes)
+        # 참조 대입 한 번으로 교체 - 진행 중인 검색은 이전 스냅샷으로 끝까지 처리
+        self._snapshot = snapshot
+        return snapshot
+    
     def _create_s3_client(self, aws_region: str):
         """
         S3 클라이언트 생성
@@ -57,12 +197,9 @@ class DocumentStore:
         - boto3 S3 클라이언트
         """
         try:
-            # 간단한 클라이언트 생성
-            session = boto3.Session(region_name=aws_region)
-            
-            # 클라이언트 생성 시도
+            # 공유 클라이언트 - 세대를 새로 만들어도 연결 풀과 TLS 연결을 재사용
             logger.info(f"S3 클라이언트 생성 시도: 리전={aws_region}")
-            s3_client = session.client('s3', region_name=aws_region)
+            s3_client = get_client('s3', aws_region)
             logger.info("S3 클라이언트 생성 성공")
             return s3_client
         except Exception as e:
@@ -97,124 +234,557 @@ class DocumentStore:
     def _load_documents(self) -> None:
         """S3 버킷에서 PDF 문서 로드"""
         try:
+            # 미리 만든 인덱스 번들이 있으면 목록 조회와 PDF 파싱 없이 로드
+            if self.index_bundle_s3_key and self._load_bundle():
+                return
+            
             # 버킷 존재 여부 확인
             if not self._check_bucket_exists():
                 logger.warning(f"S3 버킷 {self.s3_bucket_name}에 접근할 수 없어 문서를 로드하지 못했습니다.")
+                self.load_error = f"S3 버킷 {self.s3_bucket_name}에 접근할 수 없습니다."
                 return
                 
-            # S3 버킷의 객체 목록 가져오기
-            response = self.s3_client.list_objects_v2(Bucket=self.s3_bucket_name)
+            # S3 버킷의 PDF 객체 전체 목록 가져오기 (페이지네이션)
+            pdf_objects = list_pdf_objects(self.s3_client, self.s3_bucket_name)
             
-            if 'Contents' not in response:
+            if not pdf_objects:
                 logger.warning(f"S3 버킷 {self.s3_bucket_name}에 문서가 없습니다.")
                 return
             
-            # PDF 문서만 필터링
-            pdf_objects = [obj for obj in response['Contents'] 
-                          if obj['Key'].lower().endswith('.pdf')]
-            
             logger.info(f"S3 버킷에서 {len(pdf_objects)}개의 PDF 문서 발견")
+            self.source_files = {
+                obj['Key']: {"etag": obj.get('ETag', '').strip('"'), "size": obj.get('Size', 0)}
+                for obj in pdf_objects
+            }
             
-            # 각 PDF 처리
-            for obj in pdf_objects:
-                pdf_key = obj['Key']
-                try:
-                    self._process_pdf(pdf_key)
-                except Exception as e:
-                    logger.error(f"PDF 처리 실패 ({pdf_key}): {str(e)}")
+            # 변경된 PDF가 없으면 저장된 인덱스 아티팩트 사용
+            corpus_version = compute_fingerprint(pdf_objects, self.embedding_model_id or "", self._corpus_settings())
+            with self._lock:
+                self._publish(corpus_version=corpus_version)
+            if self.embedding_model_id:
+                self.corpus_fingerprint = corpus_version
+                if self._load_index_artifact():
+                    return
+            
+            # 매니페스트와 비교해 추가/변경된 PDF만 다운로드와 페이지 추출 (삭제된 PDF는 제외)
+            document_sync = DocumentSync(
+                self.s3_client,
+                self.s3_bucket_name,
+                self.cache_dir,
+                manifest_s3_key=self.sync_manifest_s3_key
+            )
+            documents = document_sync.sync(pdf_objects)
+            self.ingestion_stats = document_sync.last_stats
+            if document_sync.last_failed_keys:
+                # 실패한 PDF가 있으면 실제로 반영된 객체로 지문을 계산 - 전체 목록의 지문과 달라지므로
+                # 다음 콜드 스타트와 변경 확인에서 아티팩트를 재사용하지 않고 실패한 PDF를 다시 수집
+                corpus_version = compute_fingerprint(document_sync.last_ingested_objects, self.embedding_model_id or "",
+                                                     self._corpus_settings())
+                with self._lock:
+                    self._publish(corpus_version=corpus_version)
+                if self.embedding_model_id:
+                    self.corpus_fingerprint = corpus_version
+                logger.warning(f"수집 실패한 PDF {len(document_sync.last_failed_keys)}개는 다음 로드 때 다시 시도합니다: "
+                               f"{', '.join(document_sync.last_failed_keys[:5])}")
+            
+            # 매니페스트에는 페이지 원문을 두고 청킹은 매번 적용 (청킹 설정만 바꿔도 재다운로드 없음)
+            if self.chunker is not None:
+                documents = self.chunker.chunk_documents(documents)
+            # 임베딩 전에 중복 청크를 대표 청크 하나로 합침
+            if self.deduplicator is not None:
+                documents = self.deduplicator.deduplicate(documents)
+                self.ingestion_stats["dedup"] = self.deduplicator.last_stats
+            with self._lock:
+                chunk_store = self._publish(documents=documents).documents
+            logger.info(f"청크 저장소 구성 완료 - 청크 {len(chunk_store)}개, {chunk_store.nbytes / 1024 / 1024:.1f}MB")
                 
         except ClientError as e:
             if e.response['Error']['Code'] == 'NoSuchBucket':
                 logger.error(f"S3 버킷 {self.s3_bucket_name}이 존재하지 않습니다.")
             else:
                 logger.error(f"S3 버킷 접근 중 오류 발생: {str(e)}")
+            self.load_error = str(e)
         except Exception as e:
             logger.error(f"문서 로드 중 오류 발생: {str(e)}")
+            self.load_error = str(e)
+    
+    def has_source_changed(self) -> bool:
+        """
+        로드 이후 S3 원본이 바뀌었는지 확인 (번들 모드는 HEAD, 그 외에는 목록 조회만 수행)
+        
+        Returns:
+        - 변경 여부
+        """
+        if self.bundle_etag is not None:
+            etag = bundle_etag(self.s3_client, self.s3_bucket_name, self.index_bundle_s3_key)
+            return etag is not None and etag != self.bundle_etag
+        
+        if self.index_bundle_s3_key and bundle_etag(self.s3_client, self.s3_bucket_name, self.index_bundle_s3_key):
+            # 시작할 때 없던 번들이 새로 올라온 경우
+            return True
+        
+        pdf_objects = list_pdf_objects(self.s3_client, self.s3_bucket_name)
+        if not pdf_objects:
+            return bool(self.corpus_version)
+        version = compute_fingerprint(pdf_objects, self.embedding_model_id or "", self._corpus_settings())
+        return version != self.corpus_version
+    
+    def _corpus_settings(self) -> Dict[str, Any]:
+        """코퍼스 지문에 포함할 문서 구성 설정 (바뀌면 인덱스를 다시 만듦)"""
+        return {
+            "chunking": self.chunker.config() if self.chunker is not None else None,
+            "dedup": self.deduplicator.config() if self.deduplicator is not None else None
+        }
+    
+    def _artifact_path(self) -> Path:
+        """현재 코퍼스 지문에 해당하는 로컬 아티팩트 경로"""
+        return self.cache_dir / f"index-{self.corpus_fingerprint}.idx"
+    
+    def _artifact_s3_key(self) -> str:
+        """현재 코퍼스 지문에 해당하는 S3 미러 키"""
+        return f"{self.index_cache_s3_prefix}index-{self.corpus_fingerprint}.idx"
+    
+    def _load_index_artifact(self) -> bool:
+        """
+        로컬(없으면 S3 미러)의 인덱스 아티팩트에서 문서와 임베딩 로드
+        
+        Returns:
+        - 로드 성공 여부
+        """
+        path = self._artifact_path()
+        if not path.exists() and self.index_cache_s3_prefix:
+            download_artifact(self.s3_client, self.s3_bucket_name, self._artifact_s3_key(), path)
+        
+        artifact = open_artifact(path, self.corpus_fingerprint)
+        if artifact is None:
+            return False
+        
+        try:
+            documents = self._read_chunk_store(artifact)
+            matrix = self._read_vector_matrix(artifact)
+        except Exception as e:
+            logger.warning(f"인덱스 아티팩트 로드 실패, 문서를 다시 처리합니다: {str(e)}")
+            artifact.close()
+            return False
+        
+        with self._lock:
+            if self._artifact is not None:
+                self._artifact.close()
+            self._artifact = artifact
+            self._publish(documents=documents, vector_matrix=matrix, ann_index=self._train_ann_index(matrix))
+        
+        logger.info(f"인덱스 아티팩트에서 문서 {len(documents)}개 로드 (mmap, 저장 방식: {matrix.quantization}, 상주 벡터 {matrix.nbytes / 1024 / 1024:.1f}MB): {path}")
+        return True
     
-    def _process_pdf(self, pdf_key: str) -> None:
+    @staticmethod
+    def _read_chunk_store(artifact: IndexArtifact) -> ChunkStore:
+        """아티팩트의 청크 섹션을 복사 없이 ChunkStore로 읽음 (아레나와 배열은 mmap 위의 뷰)"""
+        return ChunkStore.from_sections(artifact.header["chunks"], {
+            name: artifact.section(name) for name in artifact.header["sections"] if name.startswith("chunk_")
+        })
+    
+    def _read_vector_matrix(self, artifact: IndexArtifact) -> VectorMatrix:
         """
-        S3에서 PDF 다운로드하고 처리하기
+        아티팩트의 임베딩 섹션으로 검색 행렬 생성 (mmap 위의 뷰, 필요 시 양자화)
         
         Parameters:
-        - pdf_key: S3 버킷 내 PDF 객체 키
+        - artifact: 열린 인덱스 아티팩트 또는 번들
+        
+        Returns:
+        - VectorMatrix 인스턴스
+        """
+        header = artifact.header
+        exact = VectorMatrix.from_buffer(artifact.section("embeddings"), header["count"], header["dimension"])
+        if self.quantization == "none":
+            matrix = exact
+        elif header.get("quantization") == self.quantization and artifact.has_section("codes"):
+            # 저장된 양자화 코드를 그대로 사용 (float32 원본은 재정렬 시에만 페이지 인)
+            matrix = VectorMatrix.from_code_buffers(
+                artifact.section("codes"),
+                artifact.section("scales") if artifact.has_section("scales") else None,
+                header["count"], header["dimension"], self.quantization, exact=exact
+            )
+        else:
+            matrix = exact.quantized(self.quantization, exact=exact)
+        matrix.rerank_factor = self.rerank_factor
+        return matrix
+    
+    def _load_bundle(self) -> bool:
+        """
+        S3의 인덱스 번들(HEAD + GET 한 번, 로컬 ETag 캐시)에서 문서, 임베딩, BM25/IVF 색인 로드
+        
+        Returns:
+        - 로드 성공 여부
         """
+        start_time = time.time()
+        etag = bundle_etag(self.s3_client, self.s3_bucket_name, self.index_bundle_s3_key)
+        artifact = fetch_bundle(self.s3_client, self.s3_bucket_name, self.index_bundle_s3_key, self.cache_dir, etag=etag)
+        if artifact is None:
+            return False
+        
+        header = artifact.header
+        if self.embedding_model_id and header.get("model_id") != self.embedding_model_id:
+            logger.warning(f"인덱스 번들의 임베딩 모델({header.get('model_id')})이 현재 모델({self.embedding_model_id})과 달라 사용하지 않습니다.")
+            artifact.close()
+            return False
+        
         try:
-            # 캐시된 파일 경로
-            cache_path = self.cache_dir / pdf_key.replace('/', '_')
+            documents = self._read_chunk_store(artifact)
+            matrix = self._read_vector_matrix(artifact)
+            manifest = artifact.read_json("manifest") if artifact.has_section("manifest") else {}
             
-            # 로컬에 PDF 다운로드
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                try:
-                    self.s3_client.download_file(self.s3_bucket_name, pdf_key, temp_file.name)
-                except ClientError as e:
-                    logger.error(f"PDF 다운로드 실패 ({pdf_key}): {str(e)}")
-                    return
-                
-                # PDF 파일 열기
-                try:
-                    with open(temp_file.name, 'rb') as pdf_file:
-                        # PDF 읽기
-                        try:
-                            pdf_reader = PyPDF2.PdfReader(pdf_file)
-                            num_pages = len(pdf_reader.pages)
-                            
-                            # 각 페이지를 청크로 처리
-                            with self._lock:
-                                for page_num in range(num_pages):
-                                    try:
-                                        page = pdf_reader.pages[page_num]
-                                        text = page.extract_text()
-                                        
-                                        if text and text.strip():
-                                            # 청크 추가
-                                            self.documents.append({
-                                                'content': text,
-                                                'source': f"{pdf_key} (페이지 {page_num + 1})",
-                                                'page': page_num + 1,
-                                                'file': pdf_key
-                                            })
-                                    except Exception as e:
-                                        logger.error(f"페이지 추출 실패 ({pdf_key}, 페이지 {page_num+1}): {str(e)}")
-                        except Exception as e:
-                            logger.error(f"PDF 파싱 실패 ({pdf_key}): {str(e)}")
-                except Exception as e:
-                    logger.error(f"PDF 파일 읽기 실패 ({pdf_key}): {str(e)}")
+            lexical_index = None
+            if self.lexical_enabled and "bm25" in header:
+                lexical_index = BM25Index.from_sections(header["bm25"], {
+                    name: artifact.section(name) for name in header["sections"] if name.startswith("bm25_")
+                })
             
-            # 임시 파일 삭제
+            ann_index = None
+            if self.index_mode == "ivf" and HAS_NUMPY and "ivf" in header:
+                ann_index = IVFIndex.from_sections(matrix, header["ivf"], {
+                    name: artifact.section(name) for name in header["sections"] if name.startswith("ivf_")
+                }, nprobe=self.ivf_nprobe)
+        except Exception as e:
+            logger.warning(f"인덱스 번들 로드 실패, S3 문서를 직접 처리합니다: {str(e)}")
+            artifact.close()
+            return False
+        
+        with self._lock:
+            if self._artifact is not None:
+                self._artifact.close()
+            self._artifact = artifact
+            self.source_files = manifest.get("files", {})
+            self.bundle_etag = etag
+            self._publish(
+                documents=documents,
+                vector_matrix=matrix,
+                ann_index=ann_index if ann_index is not None else self._train_ann_index(matrix),
+                lexical_index=lexical_index,
+                corpus_version=header.get("corpus_version", "")
+            )
+        
+        logger.info(f"인덱스 번들에서 문서 {len(documents)}개 로드 (생성 시각: {header.get('built_at')}, "
+                    f"BM25: {lexical_index is not None}, IVF: {ann_index is not None}, {time.time() - start_time:.2f}초 소요): "
+                    f"s3://{self.s3_bucket_name}/{self.index_bundle_s3_key}")
+        return True
+    
+    def export_bundle(self, path: Path) -> Dict[str, Any]:
+        """
+        현재 문서, 임베딩 행렬, BM25/IVF 색인과 매니페스트를 하나의 인덱스 번들로 저장
+        
+        Parameters:
+        - path: 저장할 로컬 파일 경로
+        
+        Returns:
+        - 번들 헤더 메타데이터
+        """
+        snapshot = self._snapshot
+        if not snapshot.has_embeddings():
+            raise ValueError("임베딩이 준비되지 않아 인덱스 번들을 만들 수 없습니다.")
+        
+        header = {
+            "kind": BUNDLE_KIND,
+            "model_id": self.embedding_model_id,
+            "corpus_version": snapshot.corpus_version,
+            "count": len(snapshot.vector_matrix),
+            "dimension": snapshot.vector_matrix.dimension,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        }
+        header["chunks"], sections = snapshot.documents.to_sections()
+        sections.update({
+            "embeddings": snapshot.vector_matrix.to_bytes(),
+            "manifest": json.dumps({"files": self.source_files}, ensure_ascii=False).encode("utf-8")
+        })
+        if snapshot.vector_matrix.quantization != "none":
+            codes, scales = snapshot.vector_matrix.code_bytes()
+            header["quantization"] = snapshot.vector_matrix.quantization
+            sections["codes"] = codes
+            if scales is not None:
+                sections["scales"] = scales
+        if snapshot.lexical_index is not None:
+            header["bm25"], lexical_sections = snapshot.lexical_index.to_sections()
+            sections.update(lexical_sections)
+        if snapshot.ann_index is not None:
+            header["ivf"], ann_sections = snapshot.ann_index.to_sections()
+            sections.update(ann_sections)
+        
+        write_artifact(path, header, sections)
+        
+        logger.info(f"인덱스 번들 저장 완료: {path} (문서 {header['count']}개, 섹션 {len(sections)}개)")
+        return header
+    
+    def _save_index_artifact(self) -> bool:
+        """
+        현재 스냅샷의 문서와 임베딩 행렬을 인덱스 아티팩트로 저장 (설정 시 S3 미러 업로드) - 락을 잡은 상태에서 호출
+        
+        Returns:
+        - 로컬 아티팩트 저장 여부
+        """
+        snapshot = self._snapshot
+        if not self.corpus_fingerprint or not snapshot.vector_matrix:
+            return False
+        
+        matrix = snapshot.vector_matrix
+        path = self._artifact_path()
+        try:
+            header = {
+                "fingerprint": self.corpus_fingerprint,
+                "model_id": self.embedding_model_id,
+                "count": len(matrix),
+                "dimension": matrix.dimension,
+                "created_at": time.time()
+            }
+            header["chunks"], sections = snapshot.documents.to_sections()
+            sections["embeddings"] = matrix.to_bytes()
+            if matrix.quantization != "none":
+                codes, scales = matrix.code_bytes()
+                header["quantization"] = matrix.quantization
+                sections["codes"] = codes
+                if scales is not None:
+                    sections["scales"] = scales
+            write_artifact(path, header, sections)
+            logger.info(f"인덱스 아티팩트 저장 완료: {path}")
+        except Exception as e:
+            logger.warning(f"인덱스 아티팩트 저장 실패: {str(e)}")
+            return False
+        
+        # 양자화 모드에서는 메모리의 float32 원본을 mmap된 아티팩트로 대체한 행렬을 새로 게시
+        if matrix.quantization != "none":
+            artifact = open_artifact(path, self.corpus_fingerprint)
+            if artifact is not None:
+                if self._artifact is not None:
+                    self._artifact.close()
+                self._artifact = artifact
+                self._publish_exact(matrix, VectorMatrix.from_buffer(
+                    artifact.section("embeddings"), len(matrix), matrix.dimension
+                ))
+        
+        # 이전 지문의 아티팩트 정리
+        for stale in self.cache_dir.glob("index-*.idx"):
+            if stale != path:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+        
+        if self.index_cache_s3_prefix:
+            upload_artifact(self.s3_client, self.s3_bucket_name, self._artifact_s3_key(), path)
+        return True
+    
+    def _publish_exact(self, matrix: VectorMatrix, exact: VectorMatrix) -> None:
+        """재정렬용 float32 원본만 바꾼 행렬(과 같은 행렬을 쓰는 IVF 인덱스)을 게시 - 락을 잡은 상태에서 호출"""
+        published = matrix.with_exact(exact)
+        ann_index = self._snapshot.ann_index
+        if ann_index is not None and ann_index.vectors is matrix:
+            # IVF 인덱스가 이전 행렬을 붙잡고 있으면 메모리의 원본이 해제되지 않음
+            ann_index = ann_index.with_vectors(published)
+        self._publish(vector_matrix=published, ann_index=ann_index)
+    
+    def _spill_exact_vectors(self, matrix: VectorMatrix) -> None:
+        """
+        아티팩트를 저장하지 못한 양자화 행렬의 float32 재정렬 원본을 임시 mmap 파일로 옮김 - 락을 잡은 상태에서 호출
+        
+        메모리에 float32 원본과 양자화 코드를 함께 두지 않기 위한 것으로, 파일을 쓸 수 없으면
+        양자화를 포기하고 float32 행렬 하나만 사용합니다.
+        
+        Parameters:
+        - matrix: 메모리의 float32 원본을 재정렬에 쓰는 양자화 행렬
+        """
+        exact = matrix.exact
+        if matrix.quantization == "none" or exact is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, name = tempfile.mkstemp(prefix="exact-", suffix=".spill", dir=self.cache_dir)
+            os.close(fd)
+            path = Path(name)
             try:
-                os.unlink(temp_file.name)
-            except Exception as e:
-                logger.warning(f"임시 파일 삭제 실패 ({temp_file.name}): {str(e)}")
-            
+                write_artifact(path, {"kind": "exact_spill", "count": len(exact), "dimension": exact.dimension},
+                               {"embeddings": exact.to_bytes()})
+                artifact = open_artifact(path)
+            finally:
+                # 매핑은 파일을 지워도 유지되므로 바로 삭제 (프로세스가 끝나면 디스크 공간 반환)
+                path.unlink(missing_ok=True)
+            if artifact is None:
+                raise IOError(f"임시 파일을 열 수 없습니다: {path}")
         except Exception as e:
-            logger.error(f"PDF 처리 중 오류 발생 {pdf_key}: {str(e)}")
+            logger.warning(f"float32 원본을 임시 파일로 옮기지 못해 양자화 없이 float32 행렬만 사용합니다: {str(e)}")
+            ann_index = self._snapshot.ann_index
+            if ann_index is not None and ann_index.vectors is matrix:
+                ann_index = ann_index.with_vectors(exact)
+            self._publish(vector_matrix=exact, ann_index=ann_index)
+            return
+        
+        if self._spill is not None:
+            self._spill.close()
+        self._spill = artifact
+        self._publish_exact(matrix, VectorMatrix.from_buffer(artifact.section("embeddings"), len(exact), exact.dimension))
+        logger.info(f"인덱스 아티팩트를 저장하지 않아 float32 재정렬 원본 {exact.nbytes / 1024 / 1024:.1f}MB를 임시 mmap 파일로 옮겼습니다.")
     
-    def get_documents(self) -> List[Dict[str, Any]]:
-        """저장된 모든 문서 반환"""
-        with self._lock:
-            return self.documents.copy()
+    def has_embeddings(self) -> bool:
+        """모든 문서에 대한 임베딩이 준비되어 있는지 여부"""
+        return self._snapshot.has_embeddings()
+    
+    def get_documents(self) -> ChunkStore:
+        """저장된 모든 문서 반환 (현재 스냅샷의 불변 청크 저장소, 복사 없음)"""
+        return self._snapshot.documents
     
     def store_embeddings(self, embeddings: List[List[float]]) -> None:
         """
-        문서 임베딩 저장
+        문서 임베딩 저장 - 검색용 정규화 행렬로 변환해 새 스냅샷으로 게시
         
         Parameters:
         - embeddings: 임베딩 벡터 목록
         """
         with self._lock:
-            if len(embeddings) != len(self.documents):
-                logger.warning(f"임베딩 개수가 문서 개수와 일치하지 않습니다: {len(embeddings)} vs {len(self.documents)}")
+            documents = self._snapshot.documents
+            lexical_index = self._snapshot.lexical_index
+            if len(embeddings) != len(documents):
+                logger.warning(f"임베딩 개수가 문서 개수와 일치하지 않습니다: {len(embeddings)} vs {len(documents)}")
                 # 작은 크기에 맞춰 자름
-                min_len = min(len(embeddings), len(self.documents))
+                min_len = min(len(embeddings), len(documents))
                 embeddings = embeddings[:min_len]
-                self.documents = self.documents[:min_len]
+                documents = documents[:min_len]
+                lexical_index = self._create_lexical_index(documents)
                 
-            self.embeddings = embeddings
-            logger.info(f"{len(embeddings)}개의 문서 임베딩이 저장되었습니다.")
+            matrix = VectorMatrix.from_embeddings(embeddings)
+            if self.quantization != "none":
+                # 아티팩트 저장 전까지는 메모리의 float32 행렬로 재정렬
+                matrix = matrix.quantized(self.quantization, exact=matrix)
+                matrix.rerank_factor = self.rerank_factor
+            logger.info(f"{len(embeddings)}개의 문서 임베딩이 저장되었습니다. (백엔드: {matrix.backend}, 저장 방식: {matrix.quantization}, {matrix.nbytes / 1024 / 1024:.1f}MB)")
+            
+            self._publish(
+                documents=documents,
+                vector_matrix=matrix,
+                ann_index=self._train_ann_index(matrix),
+                lexical_index=lexical_index
+            )
+            
+            # 다음 콜드 스타트에서 재임베딩을 건너뛰도록 저장 (저장하지 못하면 float32 원본을 메모리에서 내림)
+            if not self._save_complete_index_artifact(embeddings):
+                self._spill_exact_vectors(self._snapshot.vector_matrix)
+    
+    def _save_complete_index_artifact(self, embeddings: List[List[float]]) -> bool:
+        """
+        새 임베딩에 실패한 행(0 벡터)이 없을 때만 인덱스 아티팩트 저장 - 락을 잡은 상태에서 호출
+        
+        아티팩트는 ETag와 모델로만 식별되므로, 스로틀링 등으로 0 벡터가 섞인 채 저장하면
+        이후 콜드 스타트마다 재임베딩 없이 성능이 떨어진 벡터를 계속 사용하게 됩니다.
+        
+        Parameters:
+        - embeddings: 이번에 반영한 임베딩 벡터 목록
+        
+        Returns:
+        - 로컬 아티팩트 저장 여부
+        """
+        failed_rows = sum(1 for embedding in embeddings if not any(embedding))
+        if failed_rows:
+            logger.warning(f"임베딩에 실패한 문서 {failed_rows}개가 있어 인덱스 아티팩트를 저장하지 않습니다. "
+                           f"(다음 로드 때 다시 임베딩)")
+            return False
+        return self._save_index_artifact()
+        
+    def _train_ann_index(self, matrix: Optional[VectorMatrix]) -> Optional[IVFIndex]:
+        """
+        설정에 따라 근사 최근접 이웃(IVF) 인덱스 생성
+        
+        Parameters:
+        - matrix: 인덱스와 공유할 벡터 행렬
+        
+        Returns:
+        - IVFIndex (IVF 모드가 아니거나 벡터 수가 부족하면 None)
+        """
+        if self.index_mode != "ivf" or not matrix:
+            return None
+        
+        if not HAS_NUMPY:
+            logger.warning("NumPy가 없어 IVF 인덱스 대신 정확 검색을 사용합니다.")
+            return None
+        
+        if len(matrix) < self.ivf_min_vectors:
+            logger.info(f"벡터 수({len(matrix)})가 IVF 최소 기준({self.ivf_min_vectors}) 미만이라 정확 검색을 사용합니다.")
+            return None
+        
+        start_time = time.time()
+        ann_index = IVFIndex(matrix, nlist=self.ivf_nlist, nprobe=self.ivf_nprobe)
+        ann_index.train()
+        logger.info(f"IVF 인덱스 생성 완료 - nlist: {ann_index.nlist}, nprobe: {ann_index.nprobe}, {time.time() - start_time:.2f}초 소요")
+        return ann_index
+    
+    def _create_lexical_index(self, documents) -> Optional[BM25Index]:
+        """문서 내용으로 BM25 역색인 생성 (비활성화 시 None)"""
+        if not self.lexical_enabled:
+            return None
+        
+        start_time = time.time()
+        lexical_index = BM25Index.from_texts([doc.get('content', '') for doc in documents])
+        if documents:
+            logger.info(f"BM25 색인 생성 완료 - 문서 {len(lexical_index)}개, 용어 {lexical_index.vocabulary_size}개, "
+                        f"{lexical_index.nbytes / 1024 / 1024:.1f}MB, {time.time() - start_time:.2f}초 소요")
+        return lexical_index
+    
+    def _build_lexical_index(self) -> None:
+        """현재 문서로 BM25 역색인을 만들어 게시"""
+        if not self.lexical_enabled:
+            return
+        
+        with self._lock:
+            self._publish(lexical_index=self._create_lexical_index(self._snapshot.documents))
+    
+    def add_documents(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]) -> None:
+        """
+        문서와 임베딩을 증분 삽입 (IVF 인덱스는 재학습 없이 기존 중심점에 배정)
         
+        기존 스냅샷의 행렬과 색인은 건드리지 않고 추가분을 반영한 사본을 만들어 게시하므로,
+        삽입 중에도 검색은 이전 스냅샷으로 계속 진행됩니다.
+        
+        Parameters:
+        - documents: 추가할 문서 목록
+        - embeddings: 문서별 임베딩 벡터 목록
+        """
+        if len(documents) != len(embeddings):
+            raise ValueError(f"문서 수와 임베딩 수가 일치하지 않습니다: {len(documents)} vs {len(embeddings)}")
+        if not documents:
+            return
+        
+        with self._lock:
+            snapshot = self._snapshot
+            matrix = snapshot.vector_matrix if snapshot.vector_matrix is not None else VectorMatrix(0)
+            if len(matrix) != len(snapshot.documents):
+                # 새 행 번호가 다른 문서를 가리키게 되므로 삽입하지 않음 (store_embeddings로 전체 임베딩부터 반영)
+                raise ValueError(f"기존 임베딩 수가 문서 수와 다릅니다: {len(matrix)} vs {len(snapshot.documents)}")
+            
+            start = len(matrix)
+            matrix = matrix.appended(embeddings)
+            corpus_version = hashlib.sha256(
+                "\0".join([snapshot.corpus_version] + [doc.get('source', '') for doc in documents]).encode("utf-8")
+            ).hexdigest()
+            
+            if snapshot.ann_index is not None:
+                ann_index = snapshot.ann_index.appended(matrix, start, len(embeddings))
+            else:
+                ann_index = self._train_ann_index(matrix)
+            
+            lexical_index = snapshot.lexical_index
+            if lexical_index is not None:
+                lexical_index = lexical_index.appended([doc.get('content', '') for doc in documents])
+            
+            published = self._publish(
+                documents=snapshot.documents.appended(documents),
+                vector_matrix=matrix,
+                ann_index=ann_index,
+                lexical_index=lexical_index,
+                corpus_version=corpus_version
+            )
+            logger.info(f"문서 {len(documents)}개 증분 삽입 완료 - 총 {len(published.documents)}개 (스냅샷 버전 {published.version})")
+            
+            # 원본 지문이 같으면 다음 콜드 스타트에서도 삽입분을 유지하도록 아티팩트 갱신
+            self._save_complete_index_artifact(embeddings)
+    
     def search_similar(self, query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
         """
-        쿼리 임베딩과 유사한 문서 검색 (라이브러리 의존성 없이 구현)
+        쿼리 임베딩과 유사한 문서 검색
         
         Parameters:
         - query_embedding: 쿼리 임베딩
@@ -223,65 +793,140 @@ class DocumentStore:
         Returns:
         - 유사한 문서 목록
         """
-        with self._lock:
-            if not self.embeddings or not self.documents:
-                logger.warning("문서나 임베딩이 없어 검색할 수 없습니다.")
-                return []
-                
-            # 검색 유효성 검사
-            if not query_embedding:
-                logger.warning("쿼리 임베딩이 비어 있습니다.")
-                return []
-                
-            # 코사인 유사도 계산
-            try:
-                similarities = []
-                for doc_embedding in self.embeddings:
-                    similarity = self._cosine_similarity(query_embedding, doc_embedding)
-                    similarities.append(similarity)
-                    
-                # 상위 K개 가져오기
-                if not similarities:
-                    return []
-                    
-                # 최대 문서 수 조정
-                top_k = min(top_k, len(similarities))
-                # 유사도 기준으로 정렬된 인덱스 가져오기
-                top_indices = sorted(range(len(similarities)), key=lambda i: similarities[i], reverse=True)[:top_k]
-                
-                return [self.documents[i] for i in top_indices]
-            except Exception as e:
-                logger.error(f"유사 문서 검색 중 오류 발생: {str(e)}")
-                return []
+        documents, _ = self.search_similar_with_info(query_embedding, top_k)
+        return documents
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
+    def search_similar_with_info(self, query_embedding: List[float], top_k: int = 5,
+                                 nprobe: Optional[int] = None,
+                                 snapshot: Optional[DocumentSnapshot] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
-        두 벡터 간의 코사인 유사도 계산
+        쿼리 임베딩과 유사한 문서를 검색하고 검색 정보를 함께 반환 (락 없이 스냅샷에서 검색)
         
         Parameters:
-        - vec1: 첫 번째 벡터
-        - vec2: 두 번째 벡터
+        - query_embedding: 쿼리 임베딩
+        - top_k: 반환할 최대 문서 수
+        - nprobe: IVF 모드에서 탐색할 리스트 수 (None이면 기본값)
+        - snapshot: 검색할 스냅샷 (None이면 현재 스냅샷)
         
         Returns:
-        - 코사인 유사도 (0~1)
+        - 유사한 문서 목록, 검색 정보 {mode, ids, scores, candidates, elapsed_ms, snapshot_version}
         """
+        snapshot = snapshot if snapshot is not None else self._snapshot
+        search_info = {"mode": "none", "ids": [], "scores": [], "candidates": 0, "elapsed_ms": 0.0,
+                       "snapshot_version": snapshot.version}
+        
+        if not snapshot.vector_matrix or not snapshot.documents:
+            logger.warning("문서나 임베딩이 없어 검색할 수 없습니다.")
+            return [], search_info
+            
+        # 검색 유효성 검사
+        if not query_embedding:
+            logger.warning("쿼리 임베딩이 비어 있습니다.")
+            return [], search_info
+            
         try:
-            # 벡터 길이 검사
-            if len(vec1) != len(vec2):
-                logger.warning(f"벡터 길이가 일치하지 않습니다: {len(vec1)} vs {len(vec2)}")
-                # 짧은 쪽 길이에 맞추기
-                min_len = min(len(vec1), len(vec2))
-                vec1 = vec1[:min_len]
-                vec2 = vec2[:min_len]
-                
-            dot_product = sum(a * b for a, b in zip(vec1, vec2))
-            magnitude1 = sum(a * a for a in vec1) ** 0.5
-            magnitude2 = sum(b * b for b in vec2) ** 0.5
+            start_time = time.time()
+            if snapshot.ann_index is not None:
+                # 근사 검색: 가까운 nprobe개 리스트만 비교
+                top_indices, scores, candidates = snapshot.ann_index.search(query_embedding, top_k, nprobe)
+                search_info["mode"] = "ivf"
+            else:
+                # 정확 검색: 정규화 행렬과의 내적 + 부분 정렬
+                top_indices, scores = snapshot.vector_matrix.search(query_embedding, top_k)
+                candidates = len(snapshot.vector_matrix)
+                search_info["mode"] = "exact"
             
-            if magnitude1 * magnitude2 == 0:
-                return 0
-                
-            return dot_product / (magnitude1 * magnitude2)
+            search_info.update({
+                "ids": list(top_indices),
+                "scores": scores,
+                "candidates": candidates,
+                "elapsed_ms": (time.time() - start_time) * 1000
+            })
+            return [snapshot.documents[i] for i in top_indices], search_info
         except Exception as e:
-            logger.error(f"코사인 유사도 계산 중 오류 발생: {str(e)}")
-            return 0.0 
\ No newline at end of file
+            logger.error(f"유사 문서 검색 중 오류 발생: {str(e)}")
+            return [], search_info
+    
+    def search_similar_batch(self, query_embeddings: Sequence[Sequence[float]], top_k: int = 5,
+                             nprobe: Optional[int] = None,
+                             snapshot: Optional[DocumentSnapshot] = None) -> Tuple[List[List[Dict[str, Any]]], Dict[str, Any]]:
+        """
+        여러 쿼리 임베딩을 한 번에 검색 (정확 검색은 행렬-행렬 곱 한 번과 행별 상위 K 선택)
+        
+        Parameters:
+        - query_embeddings: 쿼리 임베딩 목록 또는 (쿼리 수, 차원) 행렬
+        - top_k: 쿼리별 반환할 최대 문서 수
+        - nprobe: IVF 모드에서 탐색할 리스트 수 (None이면 기본값)
+        - snapshot: 검색할 스냅샷 (None이면 현재 스냅샷)
+        
+        Returns:
+        - 쿼리별 문서 목록, 검색 정보 {mode, ids, scores (쿼리별 목록), candidates, elapsed_ms, snapshot_version}
+        """
+        snapshot = snapshot if snapshot is not None else self._snapshot
+        query_count = len(query_embeddings)
+        search_info = {"mode": "none", "ids": [[] for _ in range(query_count)],
+                       "scores": [[] for _ in range(query_count)], "candidates": 0, "elapsed_ms": 0.0,
+                       "snapshot_version": snapshot.version}
+        empty = [[] for _ in range(query_count)]
+        
+        if not snapshot.vector_matrix or not snapshot.documents:
+            logger.warning("문서나 임베딩이 없어 검색할 수 없습니다.")
+            return empty, search_info
+        if not query_count:
+            return empty, search_info
+        
+        try:
+            start_time = time.time()
+            if snapshot.ann_index is not None:
+                all_ids, all_scores, candidates = snapshot.ann_index.search_batch(query_embeddings, top_k, nprobe)
+                search_info["mode"] = "ivf"
+            else:
+                all_ids, all_scores = snapshot.vector_matrix.search_batch(query_embeddings, top_k)
+                candidates = len(snapshot.vector_matrix) * query_count
+                search_info["mode"] = "exact"
+            
+            search_info.update({
+                "ids": all_ids,
+                "scores": all_scores,
+                "candidates": candidates,
+                "elapsed_ms": (time.time() - start_time) * 1000
+            })
+            documents = snapshot.documents
+            return [[documents[i] for i in ids] for ids in all_ids], search_info
+        except Exception as e:
+            logger.error(f"배치 유사 문서 검색 중 오류 발생: {str(e)}")
+            return empty, search_info
+    
+    def has_lexical_index(self) -> bool:
+        """BM25 색인이 준비되어 있는지 여부"""
+        lexical_index = self._snapshot.lexical_index
+        return lexical_index is not None and len(lexical_index) > 0
+    
+    def search_lexical_with_info(self, query: str, top_k: int = 5,
+                                 snapshot: Optional[DocumentSnapshot] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        BM25로 쿼리 용어가 포함된 문서를 검색 (네트워크 호출 없음, 락 없이 스냅샷에서 검색)
+        
+        Parameters:
+        - query: 검색 쿼리
+        - top_k: 반환할 최대 문서 수
+        - snapshot: 검색할 스냅샷 (None이면 현재 스냅샷)
+        
+        Returns:
+        - 문서 목록, 검색 정보 {mode, ids, scores, elapsed_ms, snapshot_version}
+        """
+        snapshot = snapshot if snapshot is not None else self._snapshot
+        search_info = {"mode": "bm25", "ids": [], "scores": [], "elapsed_ms": 0.0,
+                       "snapshot_version": snapshot.version}
+        
+        if snapshot.lexical_index is None or not snapshot.documents:
+            return [], search_info
+        
+        start_time = time.time()
+        top_indices, scores = snapshot.lexical_index.search(query, top_k)
+        search_info.update({
+            "ids": top_indices,
+            "scores": scores,
+            "elapsed_ms": (time.time() - start_time) * 1000
+        })
+        return [snapshot.documents[i] for i in top_indices], search_info
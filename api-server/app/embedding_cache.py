@@ -0,0 +1,356 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Any
+from botocore.exceptions import ClientError
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_TERMINATORS = re.compile(r"\s*[?!.。？！]+$")
+
+
+def normalize_query(text: str) -> str:
+    """
+    쿼리 캐시 키용 정규화 - 소문자화, 공백 접기, 끝 문장부호 제거
+
+    토큰 안의 구두점과 기호는 의미가 있으므로("3.5%"와 "3 5") 그대로 둡니다.
+
+    Parameters:
+    - text: 사용자 쿼리
+
+    Returns:
+    - 정규화된 쿼리 문자열
+    """
+    text = _WHITESPACE.sub(" ", text.lower()).strip()
+    # 문장 끝 물음표/마침표만 제거해 "출장비 한도?"와 "출장비 한도"를 같은 키로 취급
+    return _TRAILING_TERMINATORS.sub("", text)
+
+
+class EmbeddingCache:
+    """
+    콘텐츠 주소 기반 임베딩 캐시 - hash(모델 ID, 정리된 텍스트)를 키로 사용
+
+    프로세스 내 LRU 메모리 계층과 SQLite 파일 디스크 계층으로 구성되며,
+    디스크 계층은 S3에서 시드하거나 S3로 내보낼 수 있습니다.
+    """
+
+    def __init__(self, path: Optional[Path] = None, memory_size: int = 4096):
+        """
+        EmbeddingCache 초기화
+
+        Parameters:
+        - path: SQLite 파일 경로 (None이면 메모리 계층만 사용)
+        - memory_size: 메모리 계층 최대 항목 수
+        """
+        self.path = Path(path) if path else None
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 마지막 S3 업로드 이후 디스크 계층에 새로 기록된 항목이 있는지
+        self._dirty = False
+
+        # 통계
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        if self.path:
+            try:
+                self._open()
+            except Exception as e:
+                logger.warning(f"임베딩 캐시 파일을 열 수 없어 메모리 캐시만 사용합니다 ({self.path}): {str(e)}")
+                self._conn = None
+
+    def _open(self) -> None:
+        """SQLite 연결 생성 및 테이블 준비"""
+        os.makedirs(self.path.parent, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_id: str, cleaned_text: str) -> str:
+        """
+        캐시 키 생성
+
+        Parameters:
+        - model_id: 임베딩 모델 ID
+        - cleaned_text: 임베딩 요청에 사용하는 정리된 텍스트
+
+        Returns:
+        - SHA-256 16진수 키
+        """
+        return hashlib.sha256(f"{model_id}\0{cleaned_text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        """메모리 계층에 저장 (락을 잡은 상태에서 호출)"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """
+        여러 키를 한 번에 조회 (메모리 → 디스크 순)
+
+        Parameters:
+        - keys: 캐시 키 목록
+
+        Returns:
+        - 찾은 키 -> 임베딩 벡터
+        """
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            pending = []
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.append(key)
+
+            if pending and self._conn is not None:
+                # SQLite 변수 개수 제한을 고려해 나눠서 조회
+                for i in range(0, len(pending), 500):
+                    part = pending[i:i + 500]
+                    placeholders = ",".join("?" * len(part))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array('f', blob).tolist()
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self.disk_hits += 1
+
+            self.misses += sum(1 for key in pending if key not in found)
+        return found
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """단일 키 조회"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """
+        여러 임베딩 저장 (메모리와 디스크 계층 모두)
+
+        Parameters:
+        - items: 캐시 키 -> 임베딩 벡터
+        """
+        if not items:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._conn is not None:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        [(key, array('f', vector).tobytes()) for key, vector in items.items()]
+                    )
+                    self._conn.commit()
+                    self._dirty = True
+                except sqlite3.Error as e:
+                    logger.warning(f"임베딩 캐시 디스크 기록 실패: {str(e)}")
+            self.writes += len(items)
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """단일 임베딩 저장"""
+        self.put_many({key: vector})
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중/미스 통계"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
+
+    def seed_from_s3(self, s3_client, bucket: str, key: str) -> bool:
+        """
+        S3에 저장된 캐시 파일을 디스크 계층에 병합
+
+        Parameters:
+        - s3_client: boto3 S3 클라이언트
+        - bucket: S3 버킷 이름
+        - key: 캐시 파일 S3 키
+
+        Returns:
+        - 시드 성공 여부
+        """
+        if self._conn is None:
+            return False
+
+        download_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.seed")
+        try:
+            s3_client.download_file(bucket, key, str(download_path))
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code', '')
+            if error_code not in ('404', 'NoSuchKey'):
+                logger.warning(f"임베딩 캐시 S3 다운로드 실패: {str(e)}")
+            return False
+        except Exception as e:
+            logger.warning(f"임베딩 캐시 S3 다운로드 실패: {str(e)}")
+            return False
+
+        try:
+            with self._lock:
+                self._conn.execute("ATTACH DATABASE ? AS seed", (str(download_path),))
+                try:
+                    cursor = self._conn.execute("INSERT OR IGNORE INTO embeddings SELECT key, vector FROM seed.embeddings")
+                    self._conn.commit()
+                    logger.info(f"S3에서 임베딩 캐시 {cursor.rowcount}개 항목 병합: s3://{bucket}/{key}")
+                finally:
+                    self._conn.execute("DETACH DATABASE seed")
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"임베딩 캐시 병합 실패: {str(e)}")
+            return False
+        finally:
+            try:
+                os.unlink(download_path)
+            except OSError:
+                pass
+
+    def flush_to_s3(self, s3_client, bucket: str, key: str) -> bool:
+        """
+        새 항목이 있으면 디스크 계층을 S3로 업로드
+
+        Parameters:
+        - s3_client: boto3 S3 클라이언트
+        - bucket: S3 버킷 이름
+        - key: 캐시 파일 S3 키
+
+        Returns:
+        - 업로드 여부
+        """
+        if self._conn is None or not self._dirty:
+            return False
+
+        snapshot_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.flush")
+        try:
+            with self._lock:
+                # WAL 내용을 포함한 일관된 스냅샷을 별도 파일로 생성
+                if snapshot_path.exists():
+                    snapshot_path.unlink()
+                self._conn.execute("VACUUM INTO ?", (str(snapshot_path),))
+                self._dirty = False
+            s3_client.upload_file(str(snapshot_path), bucket, key)
+            logger.info(f"임베딩 캐시 S3 업로드 완료: s3://{bucket}/{key}")
+            return True
+        except Exception as e:
+            logger.warning(f"임베딩 캐시 S3 업로드 실패: {str(e)}")
+            self._dirty = True
+            return False
+        finally:
+            try:
+                os.unlink(snapshot_path)
+            except OSError:
+                pass
+
+
+class QueryEmbeddingCache:
+    """
+    쿼리 임베딩 캐시 - 정규화된 쿼리 문자열 기준 LRU + TTL
+
+    같은 질문이 반복될 때 Bedrock 임베딩 호출을 생략하기 위한 메모리 캐시입니다.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        """
+        QueryEmbeddingCache 초기화
+
+        Parameters:
+        - max_size: 최대 항목 수 (초과 시 가장 오래 사용하지 않은 항목부터 제거)
+        - ttl_seconds: 항목 유효 시간(초, 0 이하이면 만료 없음)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get(self, model_id: str, query: str) -> Optional[List[float]]:
+        """
+        캐시된 쿼리 임베딩 조회
+
+        Parameters:
+        - model_id: 임베딩 모델 ID
+        - query: 사용자 쿼리 (원문)
+
+        Returns:
+        - 임베딩 벡터 또는 None
+        """
+        key = (model_id, normalize_query(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, vector = entry
+            if self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, model_id: str, query: str, vector: List[float]) -> None:
+        """
+        쿼리 임베딩 저장
+
+        Parameters:
+        - model_id: 임베딩 모델 ID
+        - query: 사용자 쿼리 (원문)
+        - vector: 임베딩 벡터
+        """
+        if self.max_size <= 0:
+            return
+        key = (model_id, normalize_query(query))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중/미스 통계"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "entries": len(self._entries)
+            }
@@ -1,12 +1,15 @@
 import json
 import logging
-import boto3
-import botocore.config
 import time
 import random
 import os
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional, Tuple
 from botocore.exceptions import ClientError, ConnectionError
+from .aws_clients import get_client
+from .utils.concurrency import AIMDLimiter
+from .embedding_cache import EmbeddingCache, QueryEmbeddingCache
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -30,6 +33,16 @@ class EmbeddingService:
         """
         # Bedrock은 무조건 us-east-1 리전 사용
         self.aws_region = "us-east-1"
+        
+        # 동시 임베딩 요청 한도 - 스로틀링 여부에 따라 AIMD로 조절
+        self.max_concurrency = int(os.environ.get("EMBEDDING_MAX_CONCURRENCY", "16"))
+        self.limiter = AIMDLimiter(
+            initial_limit=int(os.environ.get("EMBEDDING_INITIAL_CONCURRENCY", "4")),
+            max_limit=self.max_concurrency
+        )
+        # 마지막 embed_documents 호출의 처리량 통계
+        self.last_embedding_stats: Dict[str, Any] = {}
+        
         self.bedrock_runtime = self._create_bedrock_client(self.aws_region)
         # 기본 임베딩 모델
         self.model_id = "amazon.titan-embed-text-v1"
@@ -37,13 +50,31 @@ class EmbeddingService:
         self.max_retries = 3
         self.retry_base_delay = 0.2
         
-        # 환경 변수에서 배치 크기 설정 가져오기 - 더 큰 배치로 빠른 처리
+        # 환경 변수에서 배치 크기 설정 가져오기 - 진행 상황 로깅 단위
         self.batch_size = int(os.environ.get("BATCH_SIZE", "20"))
         
-        logger.info(f"EmbeddingService, 리전: {self.aws_region}, 초기화 완료 - 모델: {self.model_id}, 배치 크기: {self.batch_size} (빠른 응답 모드)")
+        logger.info(f"EmbeddingService, 리전: {self.aws_region}, 초기화 완료 - 모델: {self.model_id}, 배치 크기: {self.batch_size}, 최대 동시 요청: {self.max_concurrency}")
         
         # 임베딩 디폴트 차원
         self.default_dimension = 1536
+        
+        # 임베딩 캐시 - 이미 임베딩한 텍스트는 Bedrock을 다시 호출하지 않음
+        self.cache: Optional[EmbeddingCache] = None
+        if os.environ.get("EMBEDDING_CACHE_ENABLED", "true").lower() == "true":
+            cache_dir = os.environ.get("EMBEDDING_CACHE_DIR", "/tmp/embedding_cache")
+            self.cache = EmbeddingCache(
+                path=os.path.join(cache_dir, "embeddings.sqlite") if cache_dir else None,
+                memory_size=int(os.environ.get("EMBEDDING_CACHE_MEMORY_SIZE", "4096"))
+            )
+        
+        # 쿼리 임베딩 캐시 - 반복 질문은 정규화된 쿼리 기준으로 재사용
+        query_cache_size = int(os.environ.get("QUERY_CACHE_SIZE", "1024"))
+        self.query_cache: Optional[QueryEmbeddingCache] = None
+        if query_cache_size > 0:
+            self.query_cache = QueryEmbeddingCache(
+                max_size=query_cache_size,
+                ttl_seconds=float(os.environ.get("QUERY_CACHE_TTL_SECONDS", "3600"))
+            )
     
     def _create_bedrock_client(self, aws_region: str):
         """
@@ -58,7 +89,9 @@ class EmbeddingService:
         try:
             # 단순한 클라이언트 생성
             logger.info(f"bedrock-runtime 서비스 클라이언트 생성 시도: 리전={aws_region}")
-            bedrock_client = boto3.client('bedrock-runtime', region_name=aws_region)
+            # 공유 클라이언트 - 동시 요청 수만큼 연결 풀 확보, 재시도는 자체 백오프 루프에서 처리
+            bedrock_client = get_client('bedrock-runtime', aws_region,
+                                        max_pool_connections=self.max_concurrency, max_attempts=1)
             logger.info("bedrock-runtime 클라이언트 생성 성공")
             return bedrock_client
         except Exception as e:
@@ -67,7 +100,7 @@ class EmbeddingService:
             # 폴백: 서비스 이름에 버전 포함해서 시도
             try:
                 logger.info("대체 방법으로 bedrock 클라이언트 생성 시도")
-                return boto3.client('bedrock', region_name=aws_region)
+                return get_client('bedrock', aws_region)
             except Exception as e2:
                 logger.error(f"대체 bedrock 클라이언트 생성도 실패: {str(e2)}")
                 return None
@@ -85,6 +118,36 @@ class EmbeddingService:
         # 지수 백오프와 약간의 무작위성 추가 (지터)
         return self.retry_base_delay * (2 ** retry_attempt) + random.uniform(0, 0.1)
     
+    def _clean_text(self, text: str) -> str:
+        """
+        임베딩 요청용 텍스트 정리 (캐시 키도 정리된 텍스트 기준)
+        
+        Parameters:
+        - text: 원본 텍스트
+        
+        Returns:
+        - 정리된 텍스트
+        """
+        cleaned_text = text.replace('\n', ' ').strip()
+        
+        # 텍스트 길이 제한 (8K tokens 제한 고려)
+        if len(cleaned_text) > 8000:
+            logger.warning(f"텍스트가 너무 깁니다. 길이 제한으로 자릅니다: {len(cleaned_text)} -> 8000")
+            cleaned_text = cleaned_text[:8000]
+        return cleaned_text
+    
+    def _cache_key(self, cleaned_text: str) -> str:
+        """모델 ID와 정리된 텍스트로 캐시 키 생성"""
+        return EmbeddingCache.make_key(self.model_id, cleaned_text)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """임베딩 캐시 적중/미스 통계"""
+        return self.cache.stats() if self.cache else {}
+    
+    def query_cache_stats(self) -> Dict[str, Any]:
+        """쿼리 임베딩 캐시 적중/미스 통계"""
+        return self.query_cache.stats() if self.query_cache else {}
+    
     def embed_query(self, text: str) -> List[float]:
         """
         쿼리 텍스트의 임베딩 벡터 생성
@@ -104,8 +167,69 @@ class EmbeddingService:
         if self.bedrock_runtime is None:
             logger.warning("Bedrock 클라이언트가 초기화되지 않아 기본 임베딩 반환")
             return [0.0] * self.default_dimension
-            
-        return self._get_embedding(text)
+        
+        # 반복 질문은 네트워크 호출 없이 바로 반환
+        if self.query_cache:
+            cached = self.query_cache.get(self.model_id, text)
+            if cached is not None:
+                return cached
+        
+        return self._embed_uncached_query(text)
+    
+    def _embed_uncached_query(self, text: str) -> List[float]:
+        """쿼리 캐시에 없는 쿼리 임베딩 생성 후 쿼리 캐시에 저장 (실패 시 0 벡터)"""
+        # 문서 임베딩 캐시는 조회만 함 - 사용자 쿼리는 영구 문서 캐시에 쓰지 않고 쿼리 캐시에만 저장
+        cleaned_text = self._clean_text(text)
+        embedding = self.cache.get(self._cache_key(cleaned_text)) if self.cache else None
+        if embedding is None:
+            embedding = self._get_embedding(cleaned_text)
+            # 실패 시 반환되는 0 벡터는 캐시하지 않음
+            if not any(embedding):
+                return embedding
+        
+        if self.query_cache:
+            self.query_cache.put(self.model_id, text, embedding)
+        return embedding
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 쿼리 텍스트의 임베딩을 동시에 생성 (쿼리 캐시 적중분은 호출 없이 반환)
+        
+        Parameters:
+        - texts: 임베딩할 쿼리 텍스트 목록
+        
+        Returns:
+        - 쿼리별 임베딩 벡터 (빈 쿼리나 실패한 쿼리는 0 벡터)
+        """
+        embeddings: List[List[float]] = [[0.0] * self.default_dimension for _ in texts]
+        if self.bedrock_runtime is None:
+            logger.warning("Bedrock 클라이언트가 초기화되지 않아 기본 임베딩 반환")
+            return embeddings
+        
+        pending: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            cached = self.query_cache.get(self.model_id, text) if self.query_cache else None
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                pending.setdefault(text, []).append(i)
+        
+        if pending:
+            # 단건 쿼리 경로(쿼리 캐시)를 동시에 실행 - 문서 임베딩 경로와 AIMD 한도는 사용하지 않음
+            workers = min(self.max_concurrency, len(pending))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-embedding") as executor:
+                futures = {executor.submit(self._embed_uncached_query, text): text for text in pending}
+                for future in as_completed(futures):
+                    try:
+                        embedding = future.result()
+                    except Exception as e:
+                        logger.error(f"쿼리 임베딩 중 오류 발생: {str(e)}")
+                        continue
+                    for i in pending[futures[future]]:
+                        embeddings[i] = embedding
+        return embeddings
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
@@ -126,55 +250,90 @@ class EmbeddingService:
             logger.warning("Bedrock 클라이언트가 초기화되지 않아 기본 임베딩 반환")
             return [[0.0] * self.default_dimension for _ in range(len(texts))]
             
-        embeddings = []
-        # 배치 크기 환경 변수에서 가져오기
-        batch_size = self.batch_size
+        start_time = time.time()
+        throttles_before = self.limiter.throttle_count
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
         
-        # 배치 처리
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i+batch_size]
-            logger.info(f"문서 임베딩 배치 처리 중: {i+1}-{i+len(batch)}/{len(texts)}")
-            
-            # 배치의 각 항목에 대해 임베딩 생성
-            batch_embeddings = []
-            for text in batch:
-                try:
-                    embedding = self._get_embedding(text)
-                    batch_embeddings.append(embedding)
-                except Exception as e:
-                    logger.error(f"배치 임베딩 중 오류 발생: {str(e)}")
-                    # 오류 발생 시 기본 임베딩 사용
-                    batch_embeddings.append([0.0] * self.default_dimension)
-            
-            embeddings.extend(batch_embeddings)
-            
-            # 배치 간 짧은 지연 (API 제한 방지)
-            if i + batch_size < len(texts):
-                time.sleep(0.5)
+        # 정리된 텍스트 기준으로 캐시 키 계산 - 같은 텍스트는 한 번만 임베딩
+        cleaned_texts = [self._clean_text(text) for text in texts]
+        keys = [self._cache_key(cleaned_text) for cleaned_text in cleaned_texts]
+        cached = self.cache.get_many(keys) if self.cache else {}
+        
+        pending: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            if key in cached:
+                embeddings[i] = cached[key]
+            else:
+                pending.setdefault(key, []).append(i)
+        
+        if cached:
+            logger.info(f"임베딩 캐시 적중: {len(texts) - sum(len(ids) for ids in pending.values())}/{len(texts)}")
+        
+        # 제한된 동시성으로 캐시에 없는 텍스트만 임베딩 생성 - 결과는 입력 순서대로 배치
+        new_embeddings: Dict[str, List[float]] = {}
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embedding") as executor:
+                futures = {
+                    executor.submit(self._embed_with_limit, cleaned_texts[ids[0]]): key
+                    for key, ids in pending.items()
+                }
+                for completed, future in enumerate(as_completed(futures), start=1):
+                    key = futures[future]
+                    try:
+                        embedding = future.result()
+                        # 실패 시 반환되는 0 벡터는 캐시하지 않음
+                        if any(embedding):
+                            new_embeddings[key] = embedding
+                    except Exception as e:
+                        logger.error(f"배치 임베딩 중 오류 발생: {str(e)}")
+                        # 오류 발생 시 기본 임베딩 사용
+                        embedding = [0.0] * self.default_dimension
+                    for i in pending[key]:
+                        embeddings[i] = embedding
+                    
+                    if completed % self.batch_size == 0 or completed == len(futures):
+                        logger.info(f"문서 임베딩 진행 중: {completed}/{len(futures)} (동시 요청 한도: {self.limiter.limit})")
+        
+        if self.cache and new_embeddings:
+            self.cache.put_many(new_embeddings)
+        
+        elapsed = time.time() - start_time
+        self.last_embedding_stats = {
+            "texts": len(texts),
+            "embedded_texts": len(pending),
+            "cache_hits": len(texts) - sum(len(ids) for ids in pending.values()),
+            "elapsed_seconds": elapsed,
+            "texts_per_second": len(texts) / elapsed if elapsed > 0 else 0.0,
+            "throttle_count": self.limiter.throttle_count - throttles_before,
+            **{f"limiter_{key}": value for key, value in self.limiter.stats().items()}
+        }
+        logger.info(f"문서 임베딩 완료: {len(texts)}개, {elapsed:.2f}초, "
+                    f"{self.last_embedding_stats['texts_per_second']:.1f} texts/s, "
+                    f"스로틀링 {self.last_embedding_stats['throttle_count']}회")
         
         return embeddings
     
-    def _get_embedding(self, text: str) -> List[float]:
+    def _embed_with_limit(self, text: str) -> List[float]:
+        """동시성 제한기를 거쳐 임베딩 생성"""
+        return self._get_embedding(text, limiter=self.limiter)
+    
+    def _get_embedding(self, text: str, limiter: Optional[AIMDLimiter] = None) -> List[float]:
         """
         Amazon Bedrock API를 사용하여 텍스트 임베딩 생성
         
         Parameters:
         - text: 임베딩할 텍스트
+        - limiter: 동시성 제한기 (Bedrock 호출 중에만 슬롯을 점유하고 백오프 대기 중에는 반환)
         
         Returns:
         - 임베딩 벡터
         """
         # 텍스트 정리 및 준비
-        cleaned_text = text.replace('\n', ' ').strip()
+        cleaned_text = self._clean_text(text)
         if not cleaned_text:
             logger.warning("임베딩을 위한 빈 텍스트가 제공되었습니다.")
             return [0.0] * self.default_dimension
         
-        # 텍스트 길이 제한 (8K tokens 제한 고려)
-        if len(cleaned_text) > 8000:
-            logger.warning(f"텍스트가 너무 깁니다. 길이 제한으로 자릅니다: {len(cleaned_text)} -> 8000")
-            cleaned_text = cleaned_text[:8000]
-        
         # 재시도 로직
         retry_attempt = 0
         
@@ -191,12 +350,13 @@ class EmbeddingService:
                     return [0.0] * self.default_dimension
                 
                 # Bedrock 호출
-                response = self.bedrock_runtime.invoke_model(
-                    modelId=self.model_id,
-                    contentType="application/json",
-                    accept="application/json",
-                    body=request_body
-                )
+                with limiter or nullcontext():
+                    response = self.bedrock_runtime.invoke_model(
+                        modelId=self.model_id,
+                        contentType="application/json",
+                        accept="application/json",
+                        body=request_body
+                    )
                 
                 # 응답 처리
                 response_body = json.loads(response['body'].read())
@@ -205,6 +365,9 @@ class EmbeddingService:
                 if not embedding:
                     raise EmbeddingServiceError("임베딩이 응답에 없습니다.")
                 
+                # 한도는 제한기를 거친 호출(문서 임베딩)의 결과로만 늘림 - 단건 쿼리는 슬롯을 점유하지 않음
+                if limiter is not None:
+                    limiter.on_success()
                 return embedding
                 
             except ClientError as e:
@@ -215,6 +378,8 @@ class EmbeddingService:
                 
                 # 사용량 제한이나 서비스 불가 오류
                 if error_code in ('ThrottlingException', 'ServiceUnavailableException', 'ModelNotReadyException'):
+                    if error_code == 'ThrottlingException' and limiter is not None:
+                        limiter.on_throttle()
                     wait_time = self._exponential_backoff(retry_attempt)
                     logger.info(f"{wait_time:.2f}초 후 재시도")
                     time.sleep(wait_time)
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from botocore.exceptions import ClientError
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 아티팩트 포맷 버전 - 레이아웃이 바뀌면 올려서 이전 캐시를 무효화
+FORMAT_VERSION = 2
+MAGIC = b"RAGIDX01"
+# 섹션 정렬 단위 (float32 뷰를 mmap 위에 바로 만들기 위함)
+_ALIGNMENT = 64
+_HEADER_LEN = struct.Struct("<Q")
+
+
+class IndexArtifactError(Exception):
+    """인덱스 아티팩트 오류"""
+    pass
+
+
+def compute_fingerprint(pdf_objects: List[Dict[str, Any]], model_id: str,
+                        extra: Optional[Dict[str, Any]] = None) -> str:
+    """
+    PDF ETag 집합과 임베딩 모델 ID로 코퍼스 지문 계산
+
+    Parameters:
+    - pdf_objects: S3 list_objects_v2 결과의 객체 목록 (Key, ETag)
+    - model_id: 임베딩 모델 ID
+    - extra: 지문에 포함할 추가 설정 (청킹 설정 등)
+
+    Returns:
+    - 16진수 지문 문자열
+    """
+    payload = {
+        "version": FORMAT_VERSION,
+        "model_id": model_id,
+        "objects": sorted((obj['Key'], obj.get('ETag', '').strip('"')) for obj in pdf_objects),
+        "extra": extra or {},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _pad(length: int) -> int:
+    """정렬 단위에 맞춘 패딩 길이"""
+    return (-length) % _ALIGNMENT
+
+
+def write_artifact(path: Path, header: Dict[str, Any], sections: Dict[str, bytes]) -> None:
+    """
+    아티팩트 파일 기록 (임시 파일에 쓴 뒤 원자적으로 교체)
+
+    파일 레이아웃: MAGIC | 헤더 길이(uint64) | 헤더 JSON | 정렬된 섹션들
+
+    Parameters:
+    - path: 저장할 파일 경로
+    - header: 헤더 메타데이터 (fingerprint, model_id 등)
+    - sections: 섹션 이름 -> 바이트
+    """
+    header = dict(header)
+    header["format_version"] = FORMAT_VERSION
+    header["byteorder"] = sys.byteorder
+
+    # 섹션 오프셋은 헤더 길이에 의존하므로 헤더 크기를 고정할 때까지 반복 계산
+    header_bytes = b""
+    while True:
+        offset = len(MAGIC) + _HEADER_LEN.size + len(header_bytes)
+        offset += _pad(offset)
+        layout = {}
+        for name, data in sections.items():
+            layout[name] = [offset, len(data)]
+            offset += len(data) + _pad(len(data))
+        header["sections"] = layout
+        encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if len(encoded) == len(header_bytes):
+            break
+        header_bytes = encoded
+
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LEN.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * _pad(f.tell()))
+        for name, data in sections.items():
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    os.replace(tmp_path, path)
+
+
+class IndexArtifact:
+    """
+    메모리 매핑된 인덱스 아티팩트 - 섹션을 복사 없이 memoryview로 노출
+    """
+
+    def __init__(self, path: Path):
+        """
+        IndexArtifact 열기
+
+        Parameters:
+        - path: 아티팩트 파일 경로
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            self.close()
+            raise IndexArtifactError(f"아티팩트 형식이 아닙니다: {self.path}")
+
+        (header_len,) = _HEADER_LEN.unpack_from(self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + _HEADER_LEN.size
+        self.header: Dict[str, Any] = json.loads(bytes(view[header_start:header_start + header_len]).decode("utf-8"))
+
+        if self.header.get("format_version") != FORMAT_VERSION:
+            self.close()
+            raise IndexArtifactError(f"아티팩트 버전 불일치: {self.header.get('format_version')} vs {FORMAT_VERSION}")
+        if self.header.get("byteorder") != sys.byteorder:
+            self.close()
+            raise IndexArtifactError("아티팩트 바이트 순서가 현재 플랫폼과 다릅니다.")
+
+    def has_section(self, name: str) -> bool:
+        return name in self.header.get("sections", {})
+
+    def section(self, name: str) -> memoryview:
+        """
+        섹션 데이터를 mmap 위의 memoryview로 반환
+
+        Parameters:
+        - name: 섹션 이름
+
+        Returns:
+        - 섹션 memoryview (읽기 전용)
+        """
+        offset, length = self.header["sections"][name]
+        return memoryview(self._mmap)[offset:offset + length]
+
+    def read_json(self, name: str) -> Any:
+        """JSON 섹션 디코딩"""
+        return json.loads(bytes(self.section(name)).decode("utf-8"))
+
+    def close(self) -> None:
+        """mmap과 파일 핸들 닫기 (섹션 뷰가 살아 있으면 GC 시점에 정리)"""
+        try:
+            self._mmap.close()
+        except (BufferError, ValueError):
+            # 외부에서 섹션 뷰를 참조 중이면 매핑을 유지
+            pass
+        self._file.close()
+
+
+def open_artifact(path: Path, fingerprint: Optional[str] = None) -> Optional[IndexArtifact]:
+    """
+    아티팩트를 열고 지문이 일치하는지 확인
+
+    Parameters:
+    - path: 아티팩트 파일 경로
+    - fingerprint: 기대하는 코퍼스 지문 (None이면 확인 생략)
+
+    Returns:
+    - IndexArtifact 또는 None (없거나 유효하지 않은 경우)
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    try:
+        artifact = IndexArtifact(path)
+    except Exception as e:
+        logger.warning(f"인덱스 아티팩트를 열 수 없습니다 ({path}): {str(e)}")
+        return None
+
+    if fingerprint and artifact.header.get("fingerprint") != fingerprint:
+        logger.info(f"인덱스 아티팩트 지문 불일치로 무시: {path}")
+        artifact.close()
+        return None
+
+    return artifact
+
+
+def download_artifact(s3_client, bucket: str, key: str, path: Path) -> bool:
+    """
+    S3 미러에서 아티팩트 다운로드
+
+    Parameters:
+    - s3_client: boto3 S3 클라이언트
+    - bucket: S3 버킷 이름
+    - key: 아티팩트 S3 키
+    - path: 저장할 로컬 경로
+
+    Returns:
+    - 다운로드 성공 여부
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.download")
+    try:
+        s3_client.download_file(bucket, key, str(tmp_path))
+        os.replace(tmp_path, path)
+        logger.info(f"S3에서 인덱스 아티팩트 다운로드 완료: s3://{bucket}/{key}")
+        return True
+    except ClientError as e:
+        error_code = e.response.get('Error', {}).get('Code', '')
+        if error_code in ('404', 'NoSuchKey'):
+            logger.info(f"S3에 인덱스 아티팩트가 없습니다: s3://{bucket}/{key}")
+        else:
+            logger.warning(f"인덱스 아티팩트 다운로드 실패: {str(e)}")
+    except Exception as e:
+        logger.warning(f"인덱스 아티팩트 다운로드 실패: {str(e)}")
+
+    try:
+        os.unlink(tmp_path)
+    except OSError:
+        pass
+    return False
+
+
+def upload_artifact(s3_client, bucket: str, key: str, path: Path) -> bool:
+    """
+    아티팩트를 S3 미러에 업로드
+
+    Parameters:
+    - s3_client: boto3 S3 클라이언트
+    - bucket: S3 버킷 이름
+    - key: 아티팩트 S3 키
+    - path: 업로드할 로컬 경로
+
+    Returns:
+    - 업로드 성공 여부
+    """
+    try:
+        s3_client.upload_file(str(path), bucket, key)
+        logger.info(f"인덱스 아티팩트 S3 업로드 완료: s3://{bucket}/{key}")
+        return True
+    except Exception as e:
+        logger.warning(f"인덱스 아티팩트 S3 업로드 실패: {str(e)}")
+        return False
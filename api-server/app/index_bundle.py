@@ -0,0 +1,82 @@
+import logging
+from pathlib import Path
+from typing import Optional
+from botocore.exceptions import ClientError
+from .index_artifact import IndexArtifact, open_artifact, download_artifact
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 오프라인 수집 CLI(app.build_index)가 만드는 아티팩트 종류
+BUNDLE_KIND = "bundle"
+
+
+def bundle_etag(s3_client, bucket: str, key: str) -> Optional[str]:
+    """
+    인덱스 번들의 현재 ETag 조회 (HEAD)
+
+    Parameters:
+    - s3_client: boto3 S3 클라이언트
+    - bucket: S3 버킷 이름
+    - key: 번들 S3 키
+
+    Returns:
+    - ETag 또는 None (번들이 없거나 조회 실패)
+    """
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key).get('ETag', '').strip('"')
+    except ClientError as e:
+        error_code = e.response.get('Error', {}).get('Code', '')
+        if error_code in ('404', 'NoSuchKey'):
+            logger.info(f"S3에 인덱스 번들이 없습니다: s3://{bucket}/{key}")
+        else:
+            logger.warning(f"인덱스 번들 확인 실패: {str(e)}")
+    except Exception as e:
+        logger.warning(f"인덱스 번들 확인 실패: {str(e)}")
+    return None
+
+
+def fetch_bundle(s3_client, bucket: str, key: str, cache_dir: Path,
+                 etag: Optional[str] = None) -> Optional[IndexArtifact]:
+    """
+    S3의 인덱스 번들을 로컬에 받아 mmap으로 열기
+
+    번들은 ETag별 파일로 캐시되므로, 같은 컨테이너의 재초기화에서는
+    HEAD 한 번으로 확인만 하고 다운로드를 건너뜁니다.
+
+    Parameters:
+    - s3_client: boto3 S3 클라이언트
+    - bucket: S3 버킷 이름
+    - key: 번들 S3 키
+    - cache_dir: 로컬 캐시 디렉토리
+    - etag: 이미 조회한 번들 ETag (None이면 HEAD로 조회)
+
+    Returns:
+    - IndexArtifact 또는 None (번들이 없거나 유효하지 않은 경우)
+    """
+    etag = etag or bundle_etag(s3_client, bucket, key)
+    if not etag:
+        return None
+
+    cache_dir = Path(cache_dir)
+    path = cache_dir / f"bundle-{etag.replace('-', '_')}.idx"
+    if not path.exists():
+        if not download_artifact(s3_client, bucket, key, path):
+            return None
+        # 이전 번들 정리
+        for stale in cache_dir.glob("bundle-*.idx"):
+            if stale != path:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+
+    artifact = open_artifact(path)
+    if artifact is None:
+        return None
+    if artifact.header.get("kind") != BUNDLE_KIND:
+        logger.warning(f"인덱스 번들 형식이 아닙니다: s3://{bucket}/{key}")
+        artifact.close()
+        return None
+    return artifact
@@ -0,0 +1,149 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@dataclass(frozen=True)
+class IndexGeneration:
+    """
+    검색 인덱스 세대 - 문서 저장소와 검색기를 한 묶음으로 교체
+
+    요청은 시작할 때 현재 세대를 한 번 읽어 끝까지 같은 세대를 사용하므로,
+    새 세대로 교체되는 중에도 락 없이 이전 세대에서 안전하게 완료됩니다.
+    """
+    number: int
+    # Lambda 스택: DocumentStore/Retriever
+    document_store: Any = None
+    retriever: Any = None
+    # FastAPI 스택: 대화형 검색 체인
+    qa_chain: Any = None
+    version: str = ""
+    created_at: float = field(default_factory=time.time)
+
+
+class IndexRefresher:
+    """
+    백그라운드 코퍼스 갱신 - 새 세대를 옆에서 만든 뒤 참조를 원자적으로 교체
+
+    Python의 속성 대입은 원자적이므로 읽기 경로는 락을 잡지 않습니다.
+    빌드는 한 번에 하나만 실행되며, 빌드 중 들어온 갱신 요청은 건너뜁니다.
+    """
+
+    def __init__(self, initial: IndexGeneration, build: Callable[[int], IndexGeneration],
+                 is_stale: Callable[[IndexGeneration], bool], interval_seconds: float = 0.0,
+                 name: str = "index"):
+        """
+        IndexRefresher 초기화
+
+        Parameters:
+        - initial: 현재 서비스 중인 세대
+        - build: 세대 번호를 받아 새 세대를 만드는 함수
+        - is_stale: 현재 세대의 원본(S3)이 바뀌었는지 확인하는 함수
+        - interval_seconds: 백그라운드 폴링 주기 (0이면 폴링하지 않음)
+        - name: 로그에 표시할 이름
+        """
+        self.current = initial
+        self._build = build
+        self._is_stale = is_stale
+        self.interval_seconds = interval_seconds
+        self.name = name
+
+        self._build_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 통계
+        self.refreshes = 0
+        self.failures = 0
+        self.last_checked_at: Optional[float] = None
+        self.last_result: Dict[str, Any] = {}
+
+    def refresh(self, force: bool = False) -> Dict[str, Any]:
+        """
+        원본이 바뀌었으면 새 세대를 만들어 교체
+
+        Parameters:
+        - force: 변경 여부와 관계없이 다시 빌드
+
+        Returns:
+        - 결과 {status: refreshed|unchanged|in_progress|failed, generation, elapsed_seconds}
+        """
+        if not self._build_lock.acquire(blocking=False):
+            return {"status": "in_progress", "generation": self.current.number}
+
+        start_time = time.time()
+        try:
+            previous = self.current
+            self.last_checked_at = start_time
+            if not force and not self._is_stale(previous):
+                result = {"status": "unchanged", "generation": previous.number}
+            else:
+                logger.info(f"{self.name} 새 세대 빌드 시작 (현재 세대: {previous.number})")
+                generation = self._build(previous.number + 1)
+                # 원자적 교체 - 진행 중인 요청은 이전 세대 참조로 계속 처리
+                self.current = generation
+                self.refreshes += 1
+                result = {
+                    "status": "refreshed",
+                    "generation": generation.number,
+                    "previous_generation": previous.number,
+                    "version": generation.version
+                }
+                logger.info(f"{self.name} 세대 교체 완료: {previous.number} -> {generation.number} "
+                            f"({time.time() - start_time:.2f}초 소요)")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"{self.name} 갱신 실패, 기존 세대를 유지합니다: {str(e)}")
+            result = {"status": "failed", "generation": self.current.number, "error": str(e)}
+        finally:
+            self._build_lock.release()
+
+        result["elapsed_seconds"] = time.time() - start_time
+        self.last_result = result
+        return result
+
+    def start(self) -> bool:
+        """
+        백그라운드 폴링 스레드 시작
+
+        Returns:
+        - 시작 여부 (주기가 0이거나 이미 실행 중이면 False)
+        """
+        if self.interval_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll, name=f"{self.name}-refresher", daemon=True)
+        self._thread.start()
+        logger.info(f"{self.name} 백그라운드 갱신 시작 - {self.interval_seconds:.0f}초 주기")
+        return True
+
+    def stop(self) -> None:
+        """백그라운드 폴링 중지"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll(self) -> None:
+        """주기적으로 원본 변경을 확인하고 갱신"""
+        while not self._stop_event.wait(self.interval_seconds):
+            self.refresh()
+
+    def stats(self) -> Dict[str, Any]:
+        """갱신 상태"""
+        return {
+            "generation": self.current.number,
+            "version": self.current.version,
+            "created_at": self.current.created_at,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_checked_at": self.last_checked_at,
+            "last_result": self.last_result,
+            "polling": self._thread is not None and self._thread.is_alive()
+        }
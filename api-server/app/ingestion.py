@@ -0,0 +1,201 @@
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from functools import partial
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Union, BinaryIO
+from .pdf_extract import open_s3_pdf, iter_pdf_pages
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def extract_pdf_pages(pdf_key: str, source: Union[bytes, BinaryIO]) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    PDF에서 페이지별 텍스트 추출 (프로세스 풀 워커에서도 실행)
+
+    Parameters:
+    - pdf_key: S3 객체 키
+    - source: PDF 바이트 (프로세스 풀) 또는 스풀 버퍼 (스레드 풀, 추출 후 닫음)
+
+    Returns:
+    - 페이지 문서 목록 [{content, source, page, file}], 파싱 소요 시간(초)
+    """
+    start_time = time.time()
+    pages = []
+    try:
+        pages.extend(iter_pdf_pages(source, pdf_key))
+    except Exception as e:
+        logger.error(f"PDF 파싱 실패 ({pdf_key}): {str(e)}")
+    finally:
+        if hasattr(source, "close"):
+            source.close()
+    return pages, time.time() - start_time
+
+
+class IngestionPipeline:
+    """
+    S3 PDF 수집 파이프라인 - 다운로드(스레드 풀) → 페이지 추출(프로세스 풀)
+
+    다운로드가 끝난 파일은 바로 파싱 단계로 넘어가며, 파싱을 기다리는 파일 수는
+    max_in_flight로 제한해 메모리 사용량을 묶어 둡니다. 결과는 입력 순서대로 병합됩니다.
+    """
+
+    def __init__(self, s3_client, bucket: str, download_workers: Optional[int] = None,
+                 parse_workers: Optional[int] = None, use_processes: Optional[bool] = None,
+                 max_in_flight: Optional[int] = None):
+        """
+        IngestionPipeline 초기화
+
+        Parameters:
+        - s3_client: boto3 S3 클라이언트
+        - bucket: S3 버킷 이름
+        - download_workers: 다운로드 스레드 수
+        - parse_workers: 페이지 추출 워커 수 (기본: CPU 코어 수)
+        - use_processes: 페이지 추출에 프로세스 풀 사용 여부 (기본: Lambda가 아니면 사용)
+        - max_in_flight: 다운로드 후 파싱 대기 중일 수 있는 최대 파일 수
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.download_workers = download_workers or int(os.environ.get("INGEST_DOWNLOAD_WORKERS", "8"))
+        self.parse_workers = parse_workers or int(os.environ.get("INGEST_PARSE_WORKERS", "0")) or os.cpu_count() or 1
+
+        if use_processes is None:
+            setting = os.environ.get("INGEST_USE_PROCESSES", "auto").lower()
+            # Lambda는 /dev/shm이 없어 multiprocessing 동기화 객체를 만들 수 없음
+            use_processes = not os.environ.get("AWS_LAMBDA_FUNCTION_NAME") if setting == "auto" else setting == "true"
+        self.use_processes = use_processes
+
+        self.max_in_flight = max_in_flight or int(os.environ.get("INGEST_MAX_IN_FLIGHT", "0")) or self.download_workers * 2
+        self.last_stats: Dict[str, Any] = {}
+        # 마지막 실행에서 다운로드나 파싱에 실패한 키
+        self.last_failed_keys: List[str] = []
+
+    def _create_parse_executor(self) -> Executor:
+        """페이지 추출용 실행기 생성 (프로세스 풀을 만들 수 없으면 스레드 풀)"""
+        if self.use_processes and self.parse_workers > 1:
+            try:
+                # 다운로드 스레드가 도는 중에 fork하지 않도록 forkserver 사용
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                return ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=context)
+            except (OSError, NotImplementedError, ImportError) as e:
+                logger.warning(f"프로세스 풀을 만들 수 없어 스레드로 페이지를 추출합니다: {str(e)}")
+        return ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix="ingest-parse")
+
+    def _download(self, pdf_key: str, size: Optional[int]) -> Tuple[BinaryIO, int, float]:
+        """S3 객체를 스풀 버퍼로 다운로드 (큰 객체는 병렬 범위 GET)"""
+        start_time = time.time()
+        buffer = open_s3_pdf(self.s3_client, self.bucket, pdf_key, size)
+        length = buffer.seek(0, os.SEEK_END)
+        buffer.seek(0)
+        return buffer, length, time.time() - start_time
+
+    def run(self, pdf_keys: List[str], sizes: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """
+        PDF 목록을 다운로드하고 페이지 문서로 변환
+
+        Parameters:
+        - pdf_keys: S3 객체 키 목록
+        - sizes: 키 -> 객체 크기 (목록 조회 결과, 범위 GET 분할에 사용)
+
+        Returns:
+        - 페이지 문서 목록 (입력 키 순서, 페이지 순서)
+        """
+        if not pdf_keys:
+            return []
+
+        start_time = time.time()
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        parse_futures: Dict[int, Future] = {}
+        stats_lock = threading.Lock()
+        stats = {"download_seconds": 0.0, "bytes": 0, "download_failures": 0}
+        failed_keys: List[str] = []
+
+        def on_downloaded(index: int, pdf_key: str, parser: Executor, future: Future) -> None:
+            try:
+                buffer, length, elapsed = future.result()
+            except Exception as e:
+                logger.error(f"PDF 다운로드 실패 ({pdf_key}): {str(e)}")
+                with stats_lock:
+                    stats["download_failures"] += 1
+                    failed_keys.append(pdf_key)
+                slots.release()
+                return
+
+            with stats_lock:
+                stats["download_seconds"] += elapsed
+                stats["bytes"] += length
+            try:
+                if isinstance(parser, ProcessPoolExecutor):
+                    # 다른 프로세스로는 버퍼 대신 바이트를 전달
+                    with buffer:
+                        source = buffer.read()
+                else:
+                    source = buffer
+                parse_future = parser.submit(extract_pdf_pages, pdf_key, source)
+            except Exception as e:
+                logger.error(f"PDF 파싱 작업 제출 실패 ({pdf_key}): {str(e)}")
+                buffer.close()
+                with stats_lock:
+                    failed_keys.append(pdf_key)
+                slots.release()
+                return
+            parse_future.add_done_callback(lambda _: slots.release())
+            parse_futures[index] = parse_future
+
+        parser = self._create_parse_executor()
+        try:
+            with ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix="ingest-download") as downloader:
+                for index, pdf_key in enumerate(pdf_keys):
+                    # 파싱이 밀리면 다운로드를 멈춰 메모리에 쌓이는 파일 수를 제한
+                    slots.acquire()
+                    future = downloader.submit(self._download, pdf_key, (sizes or {}).get(pdf_key))
+                    future.add_done_callback(partial(on_downloaded, index, pdf_key, parser))
+            download_wall = time.time() - start_time
+
+            # 입력 순서대로 결과 병합
+            documents: List[Dict[str, Any]] = []
+            parse_seconds = 0.0
+            parse_failures = 0
+            for index in range(len(pdf_keys)):
+                future = parse_futures.get(index)
+                if future is None:
+                    continue
+                try:
+                    pages, elapsed = future.result()
+                    documents.extend(pages)
+                    parse_seconds += elapsed
+                except Exception as e:
+                    logger.error(f"PDF 처리 실패 ({pdf_keys[index]}): {str(e)}")
+                    parse_failures += 1
+                    failed_keys.append(pdf_keys[index])
+        finally:
+            parser.shutdown(wait=True)
+
+        elapsed = time.time() - start_time
+        self.last_failed_keys = failed_keys
+        self.last_stats = {
+            "files": len(pdf_keys),
+            "pages": len(documents),
+            "bytes": stats["bytes"],
+            "download_failures": stats["download_failures"],
+            "parse_failures": parse_failures,
+            "download_wall_seconds": download_wall,
+            "download_seconds": stats["download_seconds"],
+            "download_mb_per_second": stats["bytes"] / 1024 / 1024 / download_wall if download_wall > 0 else 0.0,
+            "parse_seconds": parse_seconds,
+            "parse_executor": "process" if isinstance(parser, ProcessPoolExecutor) else "thread",
+            "parse_workers": self.parse_workers,
+            "elapsed_seconds": elapsed,
+            "pages_per_second": len(documents) / elapsed if elapsed > 0 else 0.0
+        }
+        logger.info(f"PDF 수집 완료: 파일 {len(pdf_keys)}개, 페이지 {len(documents)}개, "
+                    f"{stats['bytes'] / 1024 / 1024:.1f}MB, {elapsed:.2f}초 "
+                    f"(다운로드 {self.last_stats['download_mb_per_second']:.1f}MB/s, "
+                    f"페이지 추출 {self.last_stats['parse_executor']} x{self.parse_workers}, "
+                    f"{self.last_stats['pages_per_second']:.1f} pages/s)")
+        return documents
@@ -0,0 +1,249 @@
+import re
+import copy
+import json
+import math
+import logging
+import unicodedata
+from array import array
+from typing import Any, Dict, List, Tuple, Sequence
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 한글 음절 연속 구간 또는 영문/숫자 연속 구간
+_TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+# 금액 표기 "1,000,000" -> "1000000"
+_DIGIT_GROUP = re.compile(r"(?<=\d),(?=\d{3})")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    BM25용 토큰화 - 한글은 음절 바이그램, 영문/숫자는 단어 단위
+
+    형태소 분석기 없이도 "출장비"와 "출장비는"처럼 조사가 붙은 표현이
+    같은 바이그램("출장", "장비")을 공유하도록 합니다.
+
+    Parameters:
+    - text: 원본 텍스트
+
+    Returns:
+    - 토큰 목록
+    """
+    text = _DIGIT_GROUP.sub("", unicodedata.normalize("NFKC", text).lower())
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        run = match.group()
+        if "가" <= run[0] <= "힣":
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+class BM25Index:
+    """
+    메모리 내 BM25 역색인 - 용어별 포스팅을 array('I')로 압축 저장
+
+    문서 ID는 추가 순서대로 증가하므로 포스팅은 항상 정렬된 상태로 끝에만 추가됩니다.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        BM25Index 초기화
+
+        Parameters:
+        - k1: 용어 빈도 포화 계수
+        - b: 문서 길이 정규화 계수
+        """
+        self.k1 = k1
+        self.b = b
+        self._term_ids: Dict[str, int] = {}
+        self._postings: List[array] = []
+        self._frequencies: List[array] = []
+        self._doc_lengths = array('I')
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._term_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """포스팅과 문서 길이 배열의 메모리 크기(바이트)"""
+        postings = sum(p.itemsize * len(p) for p in self._postings)
+        frequencies = sum(f.itemsize * len(f) for f in self._frequencies)
+        return postings + frequencies + self._doc_lengths.itemsize * len(self._doc_lengths)
+
+    def add(self, texts: Sequence[str]) -> None:
+        """
+        문서 추가 (증분 삽입)
+
+        Parameters:
+        - texts: 추가할 문서 텍스트 목록
+        """
+        for text in texts:
+            doc_id = len(self._doc_lengths)
+            tokens = tokenize(text)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+
+            for token, count in counts.items():
+                term_id = self._term_ids.get(token)
+                if term_id is None:
+                    term_id = len(self._postings)
+                    self._term_ids[token] = term_id
+                    self._postings.append(array('I'))
+                    self._frequencies.append(array('I'))
+                self._postings[term_id].append(doc_id)
+                self._frequencies[term_id].append(count)
+
+            self._doc_lengths.append(len(tokens))
+            self._total_length += len(tokens)
+
+    def appended(self, texts: Sequence[str]) -> "BM25Index":
+        """
+        문서를 추가한 새 색인 생성 (기존 색인은 그대로 두는 copy-on-write 증분 삽입)
+
+        추가 문서에 나오는 기존 용어의 포스팅만 복사하고 나머지 포스팅 배열은 공유합니다.
+
+        Parameters:
+        - texts: 추가할 문서 텍스트 목록
+
+        Returns:
+        - 새 BM25Index
+        """
+        index = copy.copy(self)
+        index._term_ids = dict(self._term_ids)
+        index._postings = list(self._postings)
+        index._frequencies = list(self._frequencies)
+        index._doc_lengths = array('I', self._doc_lengths)
+
+        touched = {self._term_ids[token] for text in texts for token in tokenize(text) if token in self._term_ids}
+        for term_id in touched:
+            index._postings[term_id] = array('I', self._postings[term_id])
+            index._frequencies[term_id] = array('I', self._frequencies[term_id])
+        index.add(texts)
+        return index
+
+    @classmethod
+    def from_texts(cls, texts: Sequence[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """문서 텍스트 목록으로 색인 생성"""
+        index = cls(k1=k1, b=b)
+        index.add(texts)
+        return index
+
+    def to_sections(self) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+        """
+        인덱스 번들 저장용 직렬화 - 포스팅은 용어 순서대로 이어 붙이고 오프셋으로 구분
+
+        Returns:
+        - 헤더 메타데이터 {k1, b, total_length}, 섹션 이름 -> 바이트
+        """
+        offsets = array('Q', [0])
+        postings = array('I')
+        frequencies = array('I')
+        for term_postings, term_frequencies in zip(self._postings, self._frequencies):
+            postings.extend(term_postings)
+            frequencies.extend(term_frequencies)
+            offsets.append(len(postings))
+        terms = sorted(self._term_ids, key=self._term_ids.get)
+        meta = {"k1": self.k1, "b": self.b, "total_length": self._total_length}
+        sections = {
+            "bm25_terms": json.dumps(terms, ensure_ascii=False).encode("utf-8"),
+            "bm25_offsets": offsets.tobytes(),
+            "bm25_postings": postings.tobytes(),
+            "bm25_frequencies": frequencies.tobytes(),
+            "bm25_doc_lengths": self._doc_lengths.tobytes()
+        }
+        return meta, sections
+
+    @classmethod
+    def from_sections(cls, meta: Dict[str, Any], sections: Dict[str, Any]) -> "BM25Index":
+        """
+        to_sections 결과(또는 mmap된 섹션 뷰)로 색인 복원 - 토큰화 없이 배열만 복사
+
+        Parameters:
+        - meta: to_sections의 헤더 메타데이터
+        - sections: 섹션 이름 -> 바이트 또는 memoryview
+
+        Returns:
+        - BM25Index 인스턴스
+        """
+        index = cls(k1=meta.get("k1", 1.2), b=meta.get("b", 0.75))
+        terms = json.loads(bytes(sections["bm25_terms"]).decode("utf-8"))
+        offsets = array('Q')
+        offsets.frombytes(sections["bm25_offsets"])
+        postings = memoryview(sections["bm25_postings"]).cast('B')
+        frequencies = memoryview(sections["bm25_frequencies"]).cast('B')
+        itemsize = array('I').itemsize
+
+        index._term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        for term_id in range(len(terms)):
+            start, stop = offsets[term_id] * itemsize, offsets[term_id + 1] * itemsize
+            term_postings = array('I')
+            term_postings.frombytes(postings[start:stop])
+            term_frequencies = array('I')
+            term_frequencies.frombytes(frequencies[start:stop])
+            index._postings.append(term_postings)
+            index._frequencies.append(term_frequencies)
+        index._doc_lengths.frombytes(sections["bm25_doc_lengths"])
+        index._total_length = meta.get("total_length", sum(index._doc_lengths))
+        return index
+
+    def search(self, query: str, top_k: int) -> Tuple[List[int], List[float]]:
+        """
+        BM25 상위 K개 검색
+
+        Parameters:
+        - query: 검색 쿼리
+        - top_k: 반환할 최대 문서 수
+
+        Returns:
+        - 문서 인덱스 목록, BM25 점수 목록 (점수 내림차순)
+        """
+        doc_count = len(self._doc_lengths)
+        if top_k <= 0 or not doc_count:
+            return [], []
+
+        avg_length = self._total_length / doc_count or 1.0
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            term_id = self._term_ids.get(token)
+            if term_id is None:
+                continue
+            postings = self._postings[term_id]
+            frequencies = self._frequencies[term_id]
+            df = len(postings)
+            idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+            for doc_id, tf in zip(postings, frequencies):
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        return [doc_id for doc_id, _ in ranked], [score for _, score in ranked]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    여러 순위 목록을 RRF(Reciprocal Rank Fusion)로 결합
+
+    Parameters:
+    - rankings: 문서 인덱스 순위 목록들 (각각 관련도 내림차순)
+    - k: 순위 평활 상수
+
+    Returns:
+    - (문서 인덱스, RRF 점수) 목록 (점수 내림차순)
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
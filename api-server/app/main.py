@@ -4,7 +4,9 @@ from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import os
 import logging
-from app.routers import chat
+from app.routers import chat, admin
+from app.aws_clients import client_stats
+from app.services.rag_service import get_rag_executor
 from app.utils.logger_config import setup_logger
 import time
 
@@ -26,13 +28,15 @@ app.add_middleware(
 
 # 라우터 등록
 app.include_router(chat.router)
+app.include_router(admin.router)
 
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     logger.error(f"HTTP 오류: {exc.detail}")
     return JSONResponse(
         status_code=exc.status_code,
-        content={"message": exc.detail}
+        content={"message": exc.detail},
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -70,11 +74,21 @@ async def startup_event():
     # 로그 디렉토리 생성
     os.makedirs("logs", exist_ok=True)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """앱 종료 시 RAG 작업 풀 정리"""
+    get_rag_executor().shutdown()
+
 @app.get("/health")
 async def health_check():
     """서비스 상태 확인 엔드포인트"""
     logger.debug("상태 확인 요청을 받았습니다.")
-    return {"status": "healthy"}
+    # RAG 작업은 작업 풀에서 실행되므로 생성 중에도 즉시 응답 (대기열 길이는 부하 지표)
+    return {
+        "status": "healthy",
+        "rag_executor": get_rag_executor().stats(),
+        "aws_clients": client_stats()
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,138 @@
+import io
+import os
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, Optional, Union, BinaryIO
+from botocore.exceptions import ClientError
+
+# FastAPI 서버는 pypdf, Lambda 패키지는 PyPDF2를 사용 (PdfReader API 동일)
+try:
+    from pypdf import PdfReader
+except ImportError:
+    from PyPDF2 import PdfReader
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 이 크기까지는 메모리에 두고, 넘으면 디스크로 넘김
+SPOOL_MAX_BYTES = int(os.environ.get("PDF_SPOOL_MAX_BYTES", str(64 * 1024 * 1024)))
+# 이 크기를 넘는 객체는 범위 GET으로 나눠 병렬 다운로드
+RANGE_GET_THRESHOLD = int(os.environ.get("PDF_RANGE_GET_THRESHOLD", str(16 * 1024 * 1024)))
+RANGE_GET_PART_SIZE = int(os.environ.get("PDF_RANGE_GET_PART_SIZE", str(8 * 1024 * 1024)))
+RANGE_GET_WORKERS = int(os.environ.get("PDF_RANGE_GET_WORKERS", "4"))
+# 스트리밍 본문 읽기 단위
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _object_size(response: Dict[str, Any]) -> Optional[int]:
+    """GetObject 응답에서 전체 객체 크기 확인 (Content-Range 우선)"""
+    content_range = response.get('ContentRange')
+    if content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        if total.isdigit():
+            return int(total)
+    return None
+
+
+def _copy_body(body, buffer: BinaryIO) -> None:
+    """S3 스트리밍 본문을 버퍼로 복사 (전체를 한 번에 bytes로 만들지 않음)"""
+    if hasattr(body, "iter_chunks"):
+        for chunk in body.iter_chunks(chunk_size=_CHUNK_SIZE):
+            buffer.write(chunk)
+    else:
+        buffer.write(body.read())
+
+
+def open_s3_pdf(s3_client, bucket: str, key: str, size: Optional[int] = None) -> BinaryIO:
+    """
+    S3 객체를 임시 파일 없이 스풀 버퍼로 읽어옴
+
+    첫 번째 범위 GET으로 객체 크기를 확인하고, 큰 객체는 나머지 구간을
+    병렬 범위 GET으로 받아 순서대로 버퍼에 씁니다.
+
+    Parameters:
+    - s3_client: boto3 S3 클라이언트
+    - bucket: S3 버킷 이름
+    - key: S3 객체 키
+    - size: 알고 있는 객체 크기 (목록 조회 결과의 Size)
+
+    Returns:
+    - 처음 위치로 되감긴 읽기용 버퍼 (SPOOL_MAX_BYTES 초과 시 디스크 사용)
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        if size is not None and size <= RANGE_GET_THRESHOLD:
+            # 작은 객체는 한 번의 스트리밍 GET
+            response = s3_client.get_object(Bucket=bucket, Key=key)
+            _copy_body(response['Body'], buffer)
+        else:
+            try:
+                first = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{RANGE_GET_PART_SIZE - 1}")
+            except ClientError as e:
+                # 크기를 모르는 0바이트 객체는 범위 요청이 416(InvalidRange)으로 실패 - 빈 내용으로 처리
+                error = e.response.get('Error', {})
+                status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+                if error.get('Code') == 'InvalidRange' or status == 416:
+                    logger.warning(f"빈 S3 객체입니다: {key}")
+                    buffer.seek(0)
+                    return buffer
+                raise
+            _copy_body(first['Body'], buffer)
+            total = size if size is not None else _object_size(first)
+            # 나머지 구간은 첫 응답과 같은 버전만 받음 - 다운로드 중 덮어쓰면 412로 실패해 다음 동기화 때 재시도
+            etag = first.get('ETag')
+
+            if total is not None and total > RANGE_GET_PART_SIZE:
+                ranges = [
+                    (start, min(start + RANGE_GET_PART_SIZE, total) - 1)
+                    for start in range(RANGE_GET_PART_SIZE, total, RANGE_GET_PART_SIZE)
+                ]
+
+                def fetch(byte_range):
+                    params = {"Bucket": bucket, "Key": key, "Range": f"bytes={byte_range[0]}-{byte_range[1]}"}
+                    if etag:
+                        params["IfMatch"] = etag
+                    response = s3_client.get_object(**params)
+                    return response['Body'].read()
+
+                # map은 입력 순서대로 결과를 돌려주므로 도착 순서와 무관하게 순서대로 기록
+                with ThreadPoolExecutor(max_workers=RANGE_GET_WORKERS, thread_name_prefix="s3-range") as executor:
+                    for part in executor.map(fetch, ranges):
+                        buffer.write(part)
+                logger.info(f"범위 GET {len(ranges) + 1}개로 다운로드: {key} ({total / 1024 / 1024:.1f}MB)")
+
+        buffer.seek(0)
+        return buffer
+    except Exception:
+        buffer.close()
+        raise
+
+
+def iter_pdf_pages(source: Union[bytes, BinaryIO], pdf_key: str) -> Iterator[Dict[str, Any]]:
+    """
+    PDF에서 텍스트가 있는 페이지를 하나씩 추출 (지연 생성)
+
+    Parameters:
+    - source: PDF 바이트 또는 탐색 가능한 파일 객체
+    - pdf_key: S3 객체 키 (출처 표시용)
+
+    Returns:
+    - 페이지 문서 {content, source, page, file} 제너레이터
+    """
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    pdf_reader = PdfReader(stream)
+    for page_num, page in enumerate(pdf_reader.pages):
+        try:
+            text = page.extract_text()
+        except Exception as e:
+            logger.error(f"페이지 추출 실패 ({pdf_key}, 페이지 {page_num+1}): {str(e)}")
+            continue
+        if text and text.strip():
+            yield {
+                'content': text,
+                'source': f"{pdf_key} (페이지 {page_num + 1})",
+                'page': page_num + 1,
+                'file': pdf_key
+            }
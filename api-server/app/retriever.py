@@ -1,9 +1,12 @@
+import os
 import logging
 import time
 import traceback
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Tuple
-from .document_store import DocumentStore
+from .document_store import DocumentStore, DocumentSnapshot
 from .embeddings import EmbeddingService
+from .lexical_index import reciprocal_rank_fusion
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -13,6 +16,52 @@ class RetrieverError(Exception):
     """문서 검색기 오류"""
     pass
 
+@dataclass
+class RetrievalContext:
+    """
+    요청 단위 검색 컨텍스트 - 한 번의 검색 결과를 응답 생성까지 전달
+    """
+    query: str
+    documents: List[Dict[str, Any]] = field(default_factory=list)
+    # 검색 모드별 점수 (exact/ivf: 코사인 유사도, bm25: BM25 점수, 하이브리드: RRF 점수)
+    scores: List[float] = field(default_factory=list)
+    mode: str = "none"
+    # 응답에 표시할 출처 정보 [{source, contents}]
+    display_sources: List[Dict[str, Any]] = field(default_factory=list)
+    usage: Dict[str, Any] = field(default_factory=dict)
+    # 단계별 소요 시간(ms)
+    timings: Dict[str, float] = field(default_factory=dict)
+    query_embedding: Optional[List[float]] = None
+    
+    @property
+    def context_text(self) -> str:
+        """LLM 프롬프트에 넣을 문서 컨텍스트"""
+        return "\n\n".join(doc['content'] for doc in self.documents)
+    
+    @property
+    def sources(self) -> List[str]:
+        """검색된 문서의 출처 목록 (중복 제거로 합쳐진 청크의 출처 포함)"""
+        sources = []
+        for doc in self.documents:
+            sources.append(doc['source'])
+            sources.extend(dup['source'] for dup in doc.get('duplicates', ()) if 'source' in dup)
+        return sources
+    
+    def record(self, stage: str, start_time: float) -> float:
+        """
+        단계 소요 시간 기록
+        
+        Parameters:
+        - stage: 단계 이름
+        - start_time: 단계 시작 시각 (time.time())
+        
+        Returns:
+        - 현재 시각 (다음 단계 시작 시각으로 사용)
+        """
+        now = time.time()
+        self.timings[f"{stage}_ms"] = (now - start_time) * 1000
+        return now
+
 class Retriever:
     """
     문서 검색기 클래스 - 쿼리와 관련된 문서를 검색
@@ -30,12 +79,22 @@ class Retriever:
         self.embedding_service = embedding_service
         self.is_embedding_initialized = False
         
+        # 검색 방식 (hybrid: 벡터 + BM25 RRF 결합, vector: 벡터만)
+        self.retrieval_mode = os.environ.get("RETRIEVAL_MODE", "hybrid").lower()
+        self.rrf_k = int(os.environ.get("RRF_K", "60"))
+        # RRF 결합 전 각 검색기에서 가져올 후보 수
+        self.hybrid_candidates = int(os.environ.get("HYBRID_CANDIDATES", "20"))
+        
         # 초기 문서 로드
         self.documents = document_store.get_documents()
         
         # 유효성 확인
         if not self.documents:
             logger.warning("문서가 로드되지 않았습니다. 검색 기능이 제한됩니다.")
+        elif document_store.has_embeddings():
+            # 인덱스 아티팩트에서 임베딩까지 로드된 경우 재임베딩 생략
+            logger.info("저장된 인덱스의 임베딩을 사용합니다.")
+            self.is_embedding_initialized = True
         else:
             # 임베딩 초기화 - 지연 초기화 사용
             try:
@@ -99,13 +158,36 @@ class Retriever:
         Returns:
         - 관련 문서 목록
         """
+        return self.retrieve_context(query, top_k, retry_init).documents
+    
+    def retrieve_context(self, query: str, top_k: int = 3, retry_init: bool = True,
+                         query_embedding: Optional[List[float]] = None,
+                         snapshot: Optional[DocumentSnapshot] = None,
+                         lexical: Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]] = None) -> RetrievalContext:
+        """
+        쿼리와 관련된 문서를 검색하고 점수, 사용량, 단계별 소요 시간을 담은 컨텍스트 반환
+        
+        Parameters:
+        - query: 검색 쿼리
+        - top_k: 반환할 최대 문서 수
+        - retry_init: 실패 시 임베딩 재시도 여부
+        - query_embedding: 이미 계산한 쿼리 임베딩 (None이면 새로 생성)
+        - snapshot: 검색할 문서 스냅샷 (None이면 현재 스냅샷)
+        - lexical: 같은 스냅샷으로 prefetch_lexical에서 미리 검색한 BM25 후보 (None이면 여기서 검색)
+        
+        Returns:
+        - RetrievalContext
+        """
+        retrieval = RetrievalContext(query=query, usage={"estimated_cost": "최소", "model_id": "", "input_tokens": 0})
+        request_start = time.time()
+        
         # 검색 요청 로그
         logger.info(f"쿼리 검색 요청: '{query[:30]}...' (길이: {len(query)})")
         
         # 빠른 응답을 위해 비어있는 검색 쿼리는 바로 빈 목록 반환
         if not query or not query.strip():
             logger.warning("빈 쿼리로 검색 요청이 들어왔습니다.")
-            return []
+            return retrieval
             
         # 임베딩 초기화 체크
         if not self.is_embedding_initialized:
@@ -118,47 +200,272 @@ class Retriever:
             
             # 여전히 임베딩이 초기화되지 않은 경우
             if not self.is_embedding_initialized:
+                if self._lexical_search(retrieval, top_k, snapshot, lexical):
+                    logger.warning("임베딩이 초기화되지 않아 BM25 검색 결과를 반환합니다.")
+                    retrieval.record("total", request_start)
+                    return retrieval
+                
                 logger.warning("임베딩이 초기화되지 않아 랜덤 문서를 반환합니다.")
-                # 랜덤 문서 반환 (폴백)
-                import random
-                docs = self.document_store.get_documents()
-                if docs:
-                    sample_size = min(top_k, len(docs))
-                    return random.sample(docs, sample_size)
-                return []
+                self._random_sample(retrieval, top_k)
+                retrieval.record("total", request_start)
+                return retrieval
         
         try:
-            start_time = time.time()
+            stage_start = time.time()
+            
+            # 쿼리 임베딩 생성 (반복 질문은 쿼리 캐시에서 바로 반환)
+            if query_embedding is None:
+                query_embedding = self.embedding_service.embed_query(query)
+            retrieval.query_embedding = query_embedding
+            stage_start = retrieval.record("embedding", stage_start)
             
-            # 쿼리 임베딩 생성
-            query_embedding = self.embedding_service.embed_query(query)
+            # 임베딩 실패(스로틀링 등)로 0 벡터가 반환되면 네트워크 호출 없는 BM25 검색만 사용
+            if not any(query_embedding):
+                if self._lexical_search(retrieval, top_k, snapshot, lexical):
+                    logger.warning("쿼리 임베딩 실패로 BM25 검색 결과를 반환합니다.")
+                    retrieval.record("total", request_start)
+                    return retrieval
+            else:
+                # 임베딩 사용량 (토큰 수는 대략적인 추정치)
+                retrieval.usage.update({
+                    "estimated_cost": "소량",
+                    "model_id": self.embedding_service.model_id,
+                    "input_tokens": max(1, len(query) // 2)
+                })
+            
+            # 벡터/BM25 결과의 문서 ID가 같은 버전을 가리키도록 스냅샷을 한 번만 읽음
+            if snapshot is None:
+                snapshot = self.document_store.snapshot()
+            hybrid = self._is_hybrid(snapshot)
+            candidate_k = self._candidate_k(top_k) if hybrid else top_k
             
             # 유사한 문서 검색
-            similar_docs = self.document_store.search_similar(
+            similar_docs, search_info = self.document_store.search_similar_with_info(
                 query_embedding=query_embedding,
-                top_k=top_k
+                top_k=candidate_k,
+                snapshot=snapshot
             )
+            stage_start = retrieval.record("vector_search", stage_start)
+            scores = list(search_info["scores"])
             
-            elapsed_time = time.time() - start_time
-            logger.info(f"{len(similar_docs)}개의 관련 문서 검색 완료 ({elapsed_time:.2f}초)")
+            if hybrid:
+                # 벡터 검색과 BM25 결과를 순위 기반으로 결합
+                similar_docs, scores, stage_start = self._fuse_with_lexical(
+                    retrieval, search_info.get("ids", []), similar_docs, candidate_k, top_k, snapshot, stage_start,
+                    lexical=lexical
+                )
+                search_info["mode"] = f"{search_info['mode']}+bm25"
             
-            return similar_docs
+            retrieval.documents = similar_docs
+            retrieval.scores = scores
+            retrieval.mode = search_info["mode"]
+            retrieval.record("total", request_start)
+            logger.info(f"{len(similar_docs)}개의 관련 문서 검색 완료 ({retrieval.timings['total_ms'] / 1000:.2f}초, 임베딩: {retrieval.timings['embedding_ms'] / 1000:.3f}초, 모드: {search_info['mode']}, 후보: {search_info['candidates']}개)")
+            
+            return retrieval
             
         except Exception as e:
             logger.error(f"문서 검색 중 오류 발생: {str(e)}")
             
-            # 문서 저장소에서 직접 문서 반환 (폴백)
-            try:
-                docs = self.document_store.get_documents()
-                if docs:
-                    import random
-                    sample_size = min(top_k, len(docs))
-                    logger.info(f"오류로 인해 랜덤 문서 {sample_size}개 반환")
-                    return random.sample(docs, sample_size)
-            except Exception as fallback_error:
-                logger.error(f"폴백 검색 중 오류 발생: {str(fallback_error)}")
-                
-            return [] 
+            # BM25 검색으로 폴백
+            if self._lexical_search(retrieval, top_k, snapshot, lexical):
+                logger.info(f"오류로 인해 BM25 검색 결과 {len(retrieval.documents)}개 반환")
+            else:
+                # 문서 저장소에서 직접 문서 반환 (폴백)
+                self._random_sample(retrieval, top_k)
+                if retrieval.documents:
+                    logger.info(f"오류로 인해 랜덤 문서 {len(retrieval.documents)}개 반환")
+            
+            retrieval.record("total", request_start)
+            return retrieval
+    
+    def _is_hybrid(self, snapshot: DocumentSnapshot) -> bool:
+        """스냅샷에 BM25 역색인이 있어 하이브리드 검색을 할 수 있는지 여부"""
+        return self.retrieval_mode == "hybrid" and snapshot.lexical_index is not None and len(snapshot.lexical_index) > 0
+    
+    def _candidate_k(self, top_k: int) -> int:
+        """하이브리드 검색에서 RRF 결합 전 각 검색기에서 가져올 후보 수"""
+        return max(top_k, self.hybrid_candidates)
+    
+    def prefetch_lexical(self, query: str, top_k: int = 3,
+                         snapshot: Optional[DocumentSnapshot] = None) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        하이브리드 검색에서 결합할 BM25 후보를 미리 검색 (네트워크 호출이 없어 쿼리 임베딩과 동시에 실행 가능)
+        
+        Parameters:
+        - query: 검색 쿼리
+        - top_k: 반환할 최대 문서 수 (후보 수는 retrieve_context와 같게 계산)
+        - snapshot: 검색할 문서 스냅샷 - retrieve_context에도 같은 스냅샷을 전달해야 함
+        
+        Returns:
+        - (BM25 문서 목록, 검색 정보 {ids, scores}) 또는 하이브리드 검색을 하지 않으면 None
+        """
+        if snapshot is None:
+            snapshot = self.document_store.snapshot()
+        if not query or not query.strip() or not self._is_hybrid(snapshot):
+            return None
+        return self.document_store.search_lexical_with_info(query, self._candidate_k(top_k), snapshot=snapshot)
+    
+    def _fuse_with_lexical(self, retrieval: RetrievalContext, vector_ids: List[int], vector_docs: List[Dict[str, Any]],
+                           candidate_k: int, top_k: int, snapshot: DocumentSnapshot, stage_start: float,
+                           lexical: Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]] = None
+                           ) -> Tuple[List[Dict[str, Any]], List[float], float]:
+        """
+        벡터 검색 결과와 같은 스냅샷의 BM25 결과를 RRF로 결합
+        
+        Parameters:
+        - retrieval: 단계 시간을 기록할 검색 컨텍스트
+        - vector_ids: 벡터 검색 문서 ID (순위순)
+        - vector_docs: 벡터 검색 문서
+        - candidate_k: BM25에서 가져올 후보 수
+        - top_k: 반환할 최대 문서 수
+        - snapshot: 벡터 검색에 사용한 스냅샷
+        - stage_start: BM25 단계 시작 시각
+        - lexical: 미리 검색한 BM25 후보 (None이면 여기서 검색)
+        
+        Returns:
+        - 결합된 문서 목록, RRF 점수 목록, 다음 단계 시작 시각
+        """
+        if lexical is None:
+            lexical = self.document_store.search_lexical_with_info(retrieval.query, candidate_k, snapshot=snapshot)
+            stage_start = retrieval.record("lexical_search", stage_start)
+        lexical_docs, lexical_info = lexical
+        
+        docs_by_id = dict(zip(vector_ids, vector_docs))
+        docs_by_id.update(zip(lexical_info["ids"], lexical_docs))
+        fused = reciprocal_rank_fusion([vector_ids, lexical_info["ids"]], k=self.rrf_k)[:top_k]
+        stage_start = retrieval.record("fusion", stage_start)
+        return [docs_by_id[doc_id] for doc_id, _ in fused], [score for _, score in fused], stage_start
+    
+    def retrieve_batch(self, queries: List[str], top_k: int = 3) -> List[RetrievalContext]:
+        """
+        여러 쿼리를 한 번에 검색 (평가 실행, FAQ 사전 계산, 쿼리 확장 등 대량 작업용)
+        
+        쿼리 임베딩은 동시에 생성하고, 벡터 검색은 한 스냅샷에서 행렬-행렬 곱 한 번으로 수행합니다.
+        임베딩이 실패한 쿼리는 BM25 검색으로 대체합니다.
+        
+        Parameters:
+        - queries: 검색 쿼리 목록
+        - top_k: 쿼리별 반환할 최대 문서 수
+        
+        Returns:
+        - 쿼리별 RetrievalContext (입력 순서 유지, 점수 포함)
+        """
+        if not queries:
+            return []
+        
+        if not self.is_embedding_initialized:
+            # 임베딩이 없으면 단건 경로의 폴백(재초기화, BM25, 랜덤 샘플)을 그대로 사용
+            return [self.retrieve_context(query, top_k) for query in queries]
+        
+        batch_start = time.time()
+        retrievals = [
+            RetrievalContext(query=query, usage={"estimated_cost": "최소", "model_id": "", "input_tokens": 0})
+            for query in queries
+        ]
+        active = [i for i, query in enumerate(queries) if query and query.strip()]
+        
+        # BM25 폴백과 벡터 검색이 같은 버전을 보도록 스냅샷을 한 번만 읽음
+        snapshot = self.document_store.snapshot()
+        
+        # 쿼리 임베딩 동시 생성 (쿼리/임베딩 캐시 적중분은 호출 없음)
+        stage_start = time.time()
+        embeddings = self.embedding_service.embed_queries([queries[i] for i in active])
+        embedding_ms = (time.time() - stage_start) * 1000
+        
+        searchable = []
+        for i, embedding in zip(active, embeddings):
+            retrieval = retrievals[i]
+            retrieval.query_embedding = embedding
+            retrieval.timings["embedding_ms"] = embedding_ms
+            if any(embedding):
+                retrieval.usage.update({
+                    "estimated_cost": "소량",
+                    "model_id": self.embedding_service.model_id,
+                    "input_tokens": max(1, len(queries[i]) // 2)
+                })
+                searchable.append(i)
+            elif not self._lexical_search(retrieval, top_k, snapshot):
+                logger.warning(f"쿼리 임베딩 실패로 검색 결과가 없습니다: '{queries[i][:30]}'")
+        
+        # 같은 스냅샷에서 전체 쿼리를 한 번에 벡터 검색
+        hybrid = self._is_hybrid(snapshot)
+        candidate_k = self._candidate_k(top_k) if hybrid else top_k
+        stage_start = time.time()
+        batch_docs, search_info = self.document_store.search_similar_batch(
+            [retrievals[i].query_embedding for i in searchable], candidate_k, snapshot=snapshot
+        )
+        vector_ms = (time.time() - stage_start) * 1000
+        
+        for position, i in enumerate(searchable):
+            retrieval = retrievals[i]
+            retrieval.timings["vector_search_ms"] = vector_ms
+            docs = batch_docs[position]
+            ids = search_info["ids"][position]
+            scores = search_info["scores"][position]
+            retrieval.mode = search_info["mode"]
+            if hybrid:
+                docs, scores, _ = self._fuse_with_lexical(retrieval, ids, docs, candidate_k, top_k, snapshot, time.time())
+                retrieval.mode = f"{search_info['mode']}+bm25"
+            retrieval.documents = list(docs)[:top_k]
+            retrieval.scores = list(scores)[:top_k]
+        
+        for retrieval in retrievals:
+            retrieval.record("total", batch_start)
+        elapsed = time.time() - batch_start
+        logger.info(f"배치 검색 완료: 쿼리 {len(queries)}개, {elapsed:.2f}초 (임베딩: {embedding_ms / 1000:.3f}초, "
+                    f"벡터 검색: {vector_ms / 1000:.3f}초, 모드: {search_info['mode']})")
+        return retrievals
+    
+    def _lexical_search(self, retrieval: RetrievalContext, top_k: int,
+                        snapshot: Optional[DocumentSnapshot] = None,
+                        lexical: Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]] = None) -> bool:
+        """
+        BM25 검색 (임베딩 없이 동작하는 폴백 경로)
+        
+        Parameters:
+        - retrieval: 결과를 채울 검색 컨텍스트
+        - top_k: 반환할 최대 문서 수
+        - snapshot: 검색할 문서 스냅샷 (None이면 현재 스냅샷)
+        - lexical: prefetch_lexical에서 미리 검색한 BM25 후보 (있으면 다시 검색하지 않고 상위 top_k개 사용)
+        
+        Returns:
+        - 결과 여부 (BM25 색인이 없거나 일치하는 문서가 없으면 False)
+        """
+        try:
+            stage_start = time.time()
+            if lexical is not None:
+                docs, search_info = lexical
+                docs = docs[:top_k]
+                search_info = dict(search_info, scores=list(search_info["scores"])[:top_k])
+            else:
+                if snapshot is None:
+                    snapshot = self.document_store.snapshot()
+                if snapshot.lexical_index is None or len(snapshot.lexical_index) == 0:
+                    return False
+                docs, search_info = self.document_store.search_lexical_with_info(retrieval.query, top_k, snapshot=snapshot)
+            retrieval.record("lexical_search", stage_start)
+            if not docs:
+                return False
+            retrieval.documents = docs
+            retrieval.scores = search_info["scores"]
+            retrieval.mode = search_info["mode"]
+            return True
+        except Exception as e:
+            logger.error(f"BM25 검색 중 오류 발생: {str(e)}")
+            return False
+    
+    def _random_sample(self, retrieval: RetrievalContext, top_k: int) -> None:
+        """랜덤 문서 샘플 (최후의 폴백)"""
+        try:
+            import random
+            docs = self.document_store.get_documents()
+            if docs:
+                retrieval.documents = random.sample(docs, min(top_k, len(docs)))
+                retrieval.scores = []
+                retrieval.mode = "random"
+        except Exception as fallback_error:
+            logger.error(f"폴백 검색 중 오류 발생: {str(fallback_error)}")
     
     # 간소화된 비용 추적 함수
     def retrieve_with_usage(self, query: str, top_k: int = 3) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
@@ -170,30 +477,15 @@ class Retriever:
         - top_k: 반환할 최대 문서 수
         
         Returns:
-        - 관련 문서 목록, 간략한 사용량 정보
+        - 관련 문서 목록, 간략한 사용량 정보 {estimated_cost, model_id, input_tokens, timestamp}
         """
-        # 빈 쿼리 체크
-        if not query or query.strip() == "":
-            logger.warning("빈 쿼리로 검색 시도됨")
-            return [], {"estimated_cost": "최소"}
-        
-        # 간소화된 로깅
-        logger.info(f"쿼리 검색 시작: '{query[:20]}...'")
-        
         try:
-            # 기존 검색 기능 사용
-            docs = self.retrieve(query, top_k)
-            
-            # 간소화된 비용 정보
-            usage_info = {
-                "estimated_cost": "소량", 
-                "timestamp": time.time()
-            }
-            
-            return docs, usage_info
+            retrieval = self.retrieve_context(query, top_k)
+            retrieval.usage["timestamp"] = time.time()
+            return retrieval.documents, retrieval.usage
         except Exception as e:
             logger.error(f"검색 중 오류: {str(e)}")
-            return [], {"estimated_cost": "오류"}
+            return [], {"estimated_cost": "오류", "model_id": "", "input_tokens": 0}
     
     # 간소화된 벡터 검색 함수
     def _vector_search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
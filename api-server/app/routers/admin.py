@@ -0,0 +1,35 @@
+import os
+import hmac
+import logging
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException
+
+from app.services.rag_service import RagService, get_rag_service
+from app.utils.logger_config import setup_logger
+
+# 관리 라우터용 로거 설정
+logger = setup_logger("app.routers.admin", "logs/admin.log", logging.INFO)
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(default=None)):
+    """X-Admin-Token 헤더를 ADMIN_TOKEN과 비교합니다. (토큰이 설정되지 않으면 관리 API를 사용할 수 없음)"""
+    admin_token = os.environ.get("ADMIN_TOKEN", "")
+    if not admin_token:
+        logger.warning("ADMIN_TOKEN이 설정되지 않아 관리 API 요청을 거부합니다.")
+        raise HTTPException(status_code=403, detail="관리 API가 비활성화되어 있습니다.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode("utf-8"), admin_token.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+
+@router.post("/refresh-index", status_code=202, dependencies=[Depends(verify_admin_token)])
+async def refresh_index(background_tasks: BackgroundTasks, force: bool = False,
+                        rag_service: RagService = Depends(get_rag_service)):
+    """S3 문서를 다시 확인해 새 인덱스를 백그라운드에서 만들고 교체합니다."""
+    logger.info(f"인덱스 갱신 요청 (force={force})")
+    background_tasks.add_task(rag_service.refresh, force)
+    return {"status": "scheduled", "generation": rag_service.index_refresher.current.number}
+
+@router.get("/index-status", dependencies=[Depends(verify_admin_token)])
+async def index_status(rag_service: RagService = Depends(get_rag_service)):
+    """현재 인덱스 세대와 마지막 갱신 결과를 반환합니다."""
+    return rag_service.index_refresher.stats()
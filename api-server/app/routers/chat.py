@@ -1,10 +1,17 @@
+import os
+import asyncio
 import logging
-from typing import List, Dict
-from fastapi import APIRouter, HTTPException, Depends
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from app.services.rag_service import RagService, get_rag_service
+from app.services.rag_service import RagService, get_rag_executor, get_rag_service
+from app.utils.concurrency import BoundedExecutor, ExecutorOverloadedError, ExecutorTimeoutError
 from app.utils.logger_config import setup_logger
+from app.utils.sse import SSE_HEADERS, format_sse, format_sse_comment
 
 # 채팅 라우터용 로거 설정
 logger = setup_logger("app.routers.chat", "logs/chat.log", logging.INFO)
@@ -25,23 +32,129 @@ class ChatResponse(BaseModel):
     sources: List[SourceContent] = []
     session_id: str
 
+# 부하 차단 시 클라이언트에 안내할 재시도 대기 시간(초)
+RETRY_AFTER_SECONDS = "1"
+# 스트리밍 중 다음 이벤트가 이 시간(초) 동안 없으면 연결 유지용 주석 전송
+SSE_KEEPALIVE_SECONDS = float(os.environ.get("SSE_KEEPALIVE_SECONDS", "15"))
+
+def load_shedding_error(error: Exception, executor: BoundedExecutor) -> HTTPException:
+    """작업 풀 거절 오류를 HTTP 오류로 변환 (대기열 가득 참: 429, 대기 시간 초과: 503)"""
+    status_code = 429 if isinstance(error, ExecutorOverloadedError) else 503
+    logger.warning(f"요청 거절 ({status_code}): {str(error)} - 작업 풀 상태: {executor.stats()}")
+    return HTTPException(
+        status_code=status_code,
+        detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+        headers={"Retry-After": RETRY_AFTER_SECONDS}
+    )
+
 @router.post("", response_model=ChatResponse)
-async def chat(request: ChatRequest, rag_service: RagService = Depends(get_rag_service)):
+async def chat(request: ChatRequest, rag_service: RagService = Depends(get_rag_service),
+               executor: BoundedExecutor = Depends(get_rag_executor)):
     """사용자 질문에 대한 응답을 생성합니다."""
     logger.info(f"질문 받음: {request.message}")
     try:
-        response = rag_service.answer_question(request.message)
+        # 검색과 Bedrock 호출은 블로킹이므로 유한 작업 풀에서 실행 (이벤트 루프는 다른 요청 처리)
+        response = await executor.submit(rag_service.answer_question, request.message, request.session_id)
         logger.debug(f"응답 생성 완료: {response['answer'][:50]}...")
         response["session_id"] = request.session_id
         return response
     
+    except (ExecutorOverloadedError, ExecutorTimeoutError) as e:
+        raise load_shedding_error(e, executor)
     except Exception as e:
         logger.error(f"질문 처리 중 오류 발생: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"질문 처리 중 오류 발생: {str(e)}")
 
+class ReleasingStreamingResponse(StreamingResponse):
+    """
+    응답 전송이 어떻게 끝나든(정상 종료, 연결 끊김, 전송 오류) on_close를 호출하는 StreamingResponse
+
+    본문 제너레이터는 클라이언트가 전송 전에 끊으면 시작조차 하지 않으므로,
+    자원 정리는 제너레이터가 아닌 응답 수명에 묶어야 합니다.
+    """
+
+    def __init__(self, content, on_close: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest, http_request: Request,
+                      rag_service: RagService = Depends(get_rag_service),
+                      executor: BoundedExecutor = Depends(get_rag_executor)):
+    """사용자 질문에 대한 응답을 Server-Sent Events로 스트리밍합니다. (token -> sources -> done 이벤트)"""
+    logger.info(f"스트리밍 질문 받음: {request.message}")
+    # 스트림 전체가 실행 슬롯 하나를 사용 - 응답을 시작하기 전에 거절해야 429/503을 보낼 수 있음
+    try:
+        await executor.acquire()
+    except (ExecutorOverloadedError, ExecutorTimeoutError) as e:
+        raise load_shedding_error(e, executor)
+    loop = asyncio.get_running_loop()
+    cancel_event = threading.Event()
+    events = rag_service.stream_answer(request.message, cancel_event, request.session_id)
+    # 작업 풀에서 실행 중인 next(events) - 응답이 취소되어도 스레드는 이 호출이 끝날 때까지 슬롯을 사용
+    in_flight: List[Optional[Future]] = [None]
+    finished = False
+    
+    def close_and_release(_=None) -> None:
+        try:
+            events.close()
+        except ValueError:
+            pass
+        loop.call_soon_threadsafe(executor.release)
+    
+    def finish() -> None:
+        """생성 중단 후, 실행 중인 단계가 끝나면 제너레이터를 닫고 슬롯 반환 (한 번만 실행)"""
+        nonlocal finished
+        if finished:
+            return
+        finished = True
+        cancel_event.set()
+        future = in_flight[0]
+        if future is not None and not future.done():
+            # 실행 중인 제너레이터는 다음 토큰에서 취소 이벤트를 보고 멈춤
+            future.add_done_callback(close_and_release)
+        else:
+            close_and_release()
+    
+    async def event_source():
+        try:
+            while True:
+                if await http_request.is_disconnected():
+                    logger.info("클라이언트 연결이 끊어져 스트리밍을 중단합니다.")
+                    break
+                # 검색과 Bedrock 스트림 읽기는 블로킹 호출이므로 작업 풀에서 한 이벤트씩 처리
+                in_flight[0] = executor.start(next, events, None)
+                pending = asyncio.wrap_future(in_flight[0])
+                # 검색이나 첫 토큰이 늦어지면 주석 줄을 보내 프록시/로드밸런서의 유휴 연결 종료를 막음
+                while not (await asyncio.wait({pending}, timeout=SSE_KEEPALIVE_SECONDS))[0]:
+                    yield format_sse_comment("keep-alive")
+                event = pending.result()
+                if event is None:
+                    break
+                data = event["data"]
+                if event["event"] == "sources":
+                    data["session_id"] = request.session_id
+                yield format_sse(data, event=event["event"])
+        except Exception as e:
+            logger.error(f"스트리밍 처리 중 오류 발생: {str(e)}", exc_info=True)
+            yield format_sse({"message": f"질문 처리 중 오류 발생: {str(e)}"}, event="error")
+    
+    try:
+        return ReleasingStreamingResponse(event_source(), finish, media_type="text/event-stream",
+                                          headers=SSE_HEADERS)
+    except Exception:
+        finish()
+        raise
+
 @router.post("/reset")
-async def reset_chat(rag_service: RagService = Depends(get_rag_service)):
-    """대화 기록을 초기화합니다."""
-    logger.info("대화 기록 초기화 요청")
-    rag_service.reset_conversation()
+async def reset_chat(session_id: Optional[str] = None, rag_service: RagService = Depends(get_rag_service)):
+    """대화 기록을 초기화합니다. (session_id가 없으면 모든 세션)"""
+    logger.info(f"대화 기록 초기화 요청: {session_id or '전체 세션'}")
+    rag_service.reset_conversation(session_id)
     return {"message": "대화 기록이 초기화되었습니다."}
@@ -0,0 +1,205 @@
+import os
+import json
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any
+from botocore.exceptions import ClientError
+from .ingestion import IngestionPipeline
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 매니페스트 포맷 버전 - 페이지 레코드 구조가 바뀌면 올려서 전체 재수집
+MANIFEST_VERSION = 1
+
+
+def list_pdf_objects(s3_client, bucket: str, prefix: str = "") -> List[Dict[str, Any]]:
+    """
+    버킷의 PDF 객체 전체 목록 조회 (1000개 단위 페이지네이션)
+
+    Parameters:
+    - s3_client: boto3 S3 클라이언트
+    - bucket: S3 버킷 이름
+    - prefix: 조회할 키 접두사
+
+    Returns:
+    - PDF 객체 목록 (Key, ETag, Size, LastModified), 키 순서
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    pdf_objects = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if obj['Key'].lower().endswith('.pdf'):
+                pdf_objects.append(obj)
+    return sorted(pdf_objects, key=lambda obj: obj['Key'])
+
+
+def _object_state(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """변경 감지용 객체 상태 (ETag, 크기, 수정 시각)"""
+    last_modified = obj.get('LastModified')
+    if isinstance(last_modified, datetime):
+        last_modified = last_modified.isoformat()
+    return {
+        "etag": obj.get('ETag', '').strip('"'),
+        "size": obj.get('Size', 0),
+        "last_modified": last_modified
+    }
+
+
+class DocumentSync:
+    """
+    매니페스트 기반 증분 S3 동기화
+
+    매니페스트에 키 -> (ETag, 크기, 수정 시각, 페이지 레코드)를 저장해 두고,
+    추가되거나 바뀐 PDF만 다운로드/파싱하며 삭제된 PDF는 제거합니다.
+    매니페스트는 로컬(/tmp)과 S3에 함께 저장되어 웜/콜드 스타트 모두 변경분만 처리합니다.
+    """
+
+    def __init__(self, s3_client, bucket: str, cache_dir: Path, manifest_s3_key: str = ""):
+        """
+        DocumentSync 초기화
+
+        Parameters:
+        - s3_client: boto3 S3 클라이언트
+        - bucket: S3 버킷 이름
+        - cache_dir: 로컬 매니페스트 저장 디렉토리
+        - manifest_s3_key: 매니페스트 S3 키 (비어 있으면 로컬에만 저장)
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.manifest_path = Path(cache_dir) / "manifest.json"
+        self.manifest_s3_key = manifest_s3_key
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.last_stats: Dict[str, Any] = {}
+        # 마지막 동기화에서 수집에 실패한 키와 실제로 반영된 객체 상태 (코퍼스 지문 계산용)
+        self.last_failed_keys: List[str] = []
+        self.last_ingested_objects: List[Dict[str, Any]] = []
+
+    def _load_manifest(self) -> None:
+        """로컬 매니페스트를 읽고, 없으면 S3에서 가져옴"""
+        manifest = None
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except Exception as e:
+                logger.warning(f"로컬 매니페스트를 읽을 수 없습니다: {str(e)}")
+
+        if manifest is None and self.manifest_s3_key:
+            try:
+                response = self.s3_client.get_object(Bucket=self.bucket, Key=self.manifest_s3_key)
+                manifest = json.loads(response['Body'].read().decode("utf-8"))
+                logger.info(f"S3에서 동기화 매니페스트 로드: s3://{self.bucket}/{self.manifest_s3_key}")
+            except ClientError as e:
+                error_code = e.response.get('Error', {}).get('Code', '')
+                if error_code not in ('404', 'NoSuchKey'):
+                    logger.warning(f"매니페스트 S3 다운로드 실패: {str(e)}")
+            except Exception as e:
+                logger.warning(f"매니페스트 S3 다운로드 실패: {str(e)}")
+
+        if manifest and manifest.get("version") == MANIFEST_VERSION:
+            self.files = manifest.get("files", {})
+        else:
+            self.files = {}
+
+    def _save_manifest(self, upload: bool) -> None:
+        """매니페스트를 로컬에 원자적으로 저장하고 필요하면 S3에 업로드"""
+        payload = json.dumps({"version": MANIFEST_VERSION, "files": self.files}, ensure_ascii=False).encode("utf-8")
+        try:
+            os.makedirs(self.manifest_path.parent, exist_ok=True)
+            tmp_path = self.manifest_path.with_name(f".{self.manifest_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            logger.warning(f"로컬 매니페스트 저장 실패: {str(e)}")
+
+        if upload and self.manifest_s3_key:
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.bucket,
+                    Key=self.manifest_s3_key,
+                    Body=payload,
+                    ContentType="application/json"
+                )
+                logger.info(f"동기화 매니페스트 S3 업로드 완료: s3://{self.bucket}/{self.manifest_s3_key}")
+            except Exception as e:
+                logger.warning(f"매니페스트 S3 업로드 실패: {str(e)}")
+
+    def sync(self, pdf_objects: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        현재 S3 목록과 매니페스트를 비교해 변경분만 수집
+
+        Parameters:
+        - pdf_objects: list_pdf_objects 결과
+
+        Returns:
+        - 전체 페이지 문서 목록 (키 순서, 페이지 순서)
+        """
+        self._load_manifest()
+
+        current = {obj['Key']: _object_state(obj) for obj in pdf_objects}
+        removed = [key for key in self.files if key not in current]
+        added = [key for key in current if key not in self.files]
+        changed = [
+            key for key, state in current.items()
+            if key in self.files and (
+                self.files[key].get("etag") != state["etag"] or self.files[key].get("size") != state["size"]
+            )
+        ]
+
+        for key in removed:
+            del self.files[key]
+
+        fetch_keys = sorted(added + changed)
+        fetched_pages = 0
+        failed_keys: List[str] = []
+        ingestion_stats: Dict[str, Any] = {}
+        if fetch_keys:
+            logger.info(f"변경된 PDF 수집: 추가 {len(added)}개, 변경 {len(changed)}개 (유지 {len(current) - len(fetch_keys)}개)")
+            pipeline = IngestionPipeline(self.s3_client, self.bucket)
+            pages_by_key: Dict[str, List[Dict[str, Any]]] = {key: [] for key in fetch_keys}
+            for page in pipeline.run(fetch_keys, {key: current[key]["size"] for key in fetch_keys}):
+                pages_by_key[page['file']].append(page)
+            failed_keys = pipeline.last_failed_keys
+            ingestion_stats = pipeline.last_stats
+
+            for key in fetch_keys:
+                if key in failed_keys:
+                    # 실패한 파일은 이전 ETag를 유지(새 파일은 제외)해 다음 로드 때 다시 시도
+                    # 변경된 파일은 이전 버전의 페이지를 계속 제공
+                    if key in added:
+                        self.files.pop(key, None)
+                    continue
+                self.files[key] = dict(current[key], pages=pages_by_key[key])
+                fetched_pages += len(pages_by_key[key])
+
+        self.last_stats = {
+            "files": len(current),
+            "added": len(added),
+            "changed": len(changed),
+            "removed": len(removed),
+            "unchanged": len(current) - len(fetch_keys),
+            "failed": len(failed_keys),
+            "fetched_pages": fetched_pages,
+            "ingestion": ingestion_stats
+        }
+
+        modified = bool(fetch_keys or removed)
+        if modified or not self.manifest_path.exists():
+            self._save_manifest(upload=modified)
+        logger.info(f"S3 동기화 완료: 전체 {len(current)}개, 추가 {len(added)}개, 변경 {len(changed)}개, "
+                    f"삭제 {len(removed)}개, 실패 {len(failed_keys)}개")
+
+        self.last_failed_keys = failed_keys
+        self.last_ingested_objects = [
+            {"Key": key, "ETag": self.files[key].get("etag", ""), "Size": self.files[key].get("size", 0)}
+            for key in sorted(self.files)
+        ]
+
+        documents = []
+        for key in sorted(self.files):
+            documents.extend(self.files[key].get("pages", []))
+        return documents
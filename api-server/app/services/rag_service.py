@@ -1,14 +1,30 @@
 import os
+import time
 import logging
-from typing import Optional
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
 
 from langchain.chains import ConversationalRetrievalChain
 from langchain.memory import ConversationBufferMemory
 from langchain_aws import BedrockEmbeddings
 from langchain_aws import ChatBedrock
 from langchain_community.vectorstores import FAISS
+from langchain_core.messages import get_buffer_string
+from langchain_core.prompts import format_document
 
-from app.utils.s3_utils import download_and_process_all_pdfs
+from app.aws_clients import get_client
+from app.chunk_store import ChunkStore
+from app.index_artifact import compute_fingerprint
+from app.index_bundle import bundle_etag, fetch_bundle
+from app.index_refresher import IndexRefresher, IndexGeneration
+from app.s3_sync import list_pdf_objects
+from app.utils.concurrency import BoundedExecutor
+from app.utils.s3_utils import download_and_process_all_pdfs, get_s3_client
 from app.utils.logger_config import setup_logger
 
 # RAG 서비스용 로거 설정
@@ -16,20 +32,84 @@ logger = setup_logger("app.services.rag", "logs/rag.log", logging.INFO)
 
 # 싱글톤 인스턴스
 _rag_service_instance = None
+_rag_executor_instance = None
 
-class RagService:
+# 세션을 지정하지 않은 호출이 함께 쓰는 대화 기록 키
+DEFAULT_SESSION_ID = "default"
+
+class SessionMemory:
+    """세션 하나의 대화 기록과, 기록 조회 -> 체인 실행 -> 저장을 묶는 락"""
+    
     def __init__(self):
-        self.qa_chain = None
         # 경고는 있지만 현재 버전에서는 여전히 작동함
-        self.conversation_memory = ConversationBufferMemory(
+        self.memory = ConversationBufferMemory(
             memory_key="chat_history", 
             return_messages=True,
             output_key="answer"
         )
+        self.lock = threading.Lock()
+
+class RagService:
+    def __init__(self):
+        self.index_refresher: Optional[IndexRefresher] = None
+        # 요청이 작업 풀에서 동시에 처리되므로 대화 기록은 세션별로 분리 (오래 쓰지 않은 세션부터 제거)
+        self.max_sessions = int(os.environ.get("RAG_MAX_SESSIONS", "1000"))
+        self._sessions: "OrderedDict[str, SessionMemory]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
         self.initialize_rag_system()
     
+    def _session(self, session_id: Optional[str]) -> SessionMemory:
+        """세션의 대화 기록 반환 (없으면 생성)"""
+        session_id = session_id or DEFAULT_SESSION_ID
+        with self._sessions_lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = SessionMemory()
+                self._sessions[session_id] = session
+                while len(self._sessions) > max(1, self.max_sessions):
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            return session
+    
+    @property
+    def qa_chain(self):
+        """현재 인덱스 세대의 대화형 검색 체인"""
+        return self.index_refresher.current.qa_chain if self.index_refresher is not None else None
+    
     def initialize_rag_system(self):
-        """S3 버킷 내 모든 PDF를 다운로드하고 RAG 시스템을 초기화합니다."""
+        """RAG 시스템을 초기화하고, 설정 시 S3 변경을 주기적으로 확인해 인덱스를 교체합니다."""
+        self.index_refresher = IndexRefresher(
+            self._build_generation(1),
+            self._build_generation,
+            lambda generation: self._source_version() != generation.version,
+            interval_seconds=float(os.environ.get("INDEX_REFRESH_INTERVAL", "0")),
+            name="RAG 인덱스"
+        )
+        self.index_refresher.start()
+    
+    def refresh(self, force: bool = False) -> dict:
+        """S3 원본이 바뀌었으면 새 검색 체인을 만들어 교체합니다. (처리 중인 질문은 이전 체인으로 완료)"""
+        return self.index_refresher.refresh(force=force)
+    
+    def _source_version(self) -> str:
+        """인덱스 원본의 현재 버전 (번들 ETag 또는 PDF ETag 집합 지문)"""
+        bucket_name = os.environ.get("S3_BUCKET_NAME", "")
+        bundle_key = os.environ.get("INDEX_BUNDLE_S3_KEY", "")
+        s3_client = get_s3_client()
+        if bundle_key:
+            etag = bundle_etag(s3_client, bucket_name, bundle_key)
+            if etag:
+                return f"bundle:{etag}"
+        return compute_fingerprint(list_pdf_objects(s3_client, bucket_name), "")
+    
+    def _build_generation(self, number: int) -> IndexGeneration:
+        """새 검색 체인 세대를 만듭니다. (빌드 중 바뀐 원본은 다음 확인 때 반영되도록 버전을 먼저 기록)"""
+        version = self._source_version()
+        return IndexGeneration(number=number, qa_chain=self._build_qa_chain(), version=version)
+    
+    def _build_qa_chain(self):
+        """S3 버킷 내 모든 PDF를 다운로드하고 대화형 검색 체인을 만듭니다."""
         try:
             logger.info("RAG 시스템 초기화 시작")
             
@@ -50,16 +130,30 @@ class RagService:
                 
             logger.debug(f"사용할 S3 버킷: {bucket_name}, 리전: {region}")
             
-            # S3 버킷 내 모든 PDF 처리
-            logger.info("S3 버킷에서 PDF 파일 다운로드 및 처리 시작")
-            chunks = download_and_process_all_pdfs(bucket_name)
+            # 미리 만든 인덱스 번들이 있으면 PDF 처리와 임베딩을 건너뜀
+            bundle = None
+            bundle_key = os.environ.get("INDEX_BUNDLE_S3_KEY", "")
+            if bundle_key:
+                bundle_cache_dir = Path(tempfile.gettempdir()) / "index_bundle"
+                os.makedirs(bundle_cache_dir, exist_ok=True)
+                bundle = fetch_bundle(get_s3_client(), bucket_name, bundle_key, bundle_cache_dir)
+                if bundle is None:
+                    logger.warning(f"인덱스 번들을 사용할 수 없어 PDF를 직접 처리합니다: {bundle_key}")
             
-            if not chunks:
-                error_msg = f"버킷 '{bucket_name}'에서 처리할 PDF 파일이 없습니다."
-                logger.error(error_msg)
-                raise Exception(error_msg)
+            if bundle is None:
+                # S3 버킷 내 모든 PDF 처리
+                logger.info("S3 버킷에서 PDF 파일 다운로드 및 처리 시작")
+                chunks = download_and_process_all_pdfs(bucket_name)
+                
+                if not chunks:
+                    error_msg = f"버킷 '{bucket_name}'에서 처리할 PDF 파일이 없습니다."
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
+                
+                logger.info(f"총 {len(chunks)}개의 청크를 생성했습니다.")
             
-            logger.info(f"총 {len(chunks)}개의 청크를 생성했습니다.")
+            # 임베딩과 LLM이 함께 쓰는 공유 bedrock-runtime 클라이언트 (연결 풀과 TLS 연결 재사용)
+            bedrock_runtime = get_client('bedrock-runtime', region)
             
             # 임베딩 및 벡터 저장소 생성
             logger.info("임베딩 모델 초기화 중")
@@ -71,8 +165,8 @@ class RagService:
                     "amazon.titan-embed-text-v1"
                 ]
                 
-                # 사용할 임베딩 모델 ID
-                embedding_model_id = "amazon.titan-embed-g1-text-02"
+                # 사용할 임베딩 모델 ID (번들은 생성 시 사용한 모델로 쿼리를 임베딩해야 함)
+                embedding_model_id = bundle.header.get("model_id") if bundle is not None else "amazon.titan-embed-g1-text-02"
                 
                 # 모델 ID 실패 시 대체 모델 시도
                 if embedding_model_id not in valid_embedding_models:
@@ -82,7 +176,8 @@ class RagService:
                 logger.info(f"임베딩 모델 초기화 중: {embedding_model_id}")
                 embeddings = BedrockEmbeddings(
                     model_id=embedding_model_id,
-                    region_name=region
+                    region_name=region,
+                    client=bedrock_runtime
                 )
                 logger.info("임베딩 모델 초기화 완료")
             except Exception as e:
@@ -97,7 +192,8 @@ class RagService:
                             logger.warning(f"대체 임베딩 모델로 시도: {fallback_model}")
                             embeddings = BedrockEmbeddings(
                                 model_id=fallback_model,
-                                region_name=region
+                                region_name=region,
+                                client=bedrock_runtime
                             )
                             logger.info(f"대체 임베딩 모델 초기화 완료: {fallback_model}")
                             break
@@ -112,7 +208,13 @@ class RagService:
                     raise
             
             logger.info("벡터 저장소 생성 중")
-            vector_store = FAISS.from_documents(chunks, embeddings)
+            if bundle is not None:
+                try:
+                    vector_store = self._vector_store_from_bundle(bundle, embeddings)
+                finally:
+                    bundle.close()
+            else:
+                vector_store = FAISS.from_documents(chunks, embeddings)
             logger.info("벡터 저장소 생성 완료")
             
             # 대화형 검색 체인 생성
@@ -140,7 +242,8 @@ class RagService:
                         "temperature": 0,
                         "max_tokens": 4096
                     },
-                    region_name=region
+                    region_name=region,
+                    client=bedrock_runtime
                 )
                 logger.info("LLM 모델 초기화 완료")
             except Exception as e:
@@ -159,7 +262,8 @@ class RagService:
                                     "temperature": 0,
                                     "max_tokens": 4096
                                 },
-                                region_name=region
+                                region_name=region,
+                                client=bedrock_runtime
                             )
                             logger.info(f"대체 LLM 모델 초기화 완료: {fallback_model}")
                             break
@@ -175,22 +279,90 @@ class RagService:
              
              
             logger.info("대화형 검색 체인 생성 중")
-            self.qa_chain = ConversationalRetrievalChain.from_llm(
+            qa_chain = ConversationalRetrievalChain.from_llm(
                 llm=llm,
                 retriever=vector_store.as_retriever(search_kwargs={"k": 5}),
-                memory=self.conversation_memory,
+                # 대화 기록은 체인에 두지 않고 요청마다 세션 기록을 chat_history로 전달
                 return_source_documents=True
             )
             
             logger.info("RAG 시스템이 성공적으로 초기화되었습니다.")
+            return qa_chain
             
         except Exception as e:
             logger.critical(f"RAG 시스템 초기화 중 오류 발생: {str(e)}", exc_info=True)
             raise
 
+    def _vector_store_from_bundle(self, bundle, embeddings) -> FAISS:
+        """인덱스 번들의 문서와 임베딩 행렬로 FAISS 저장소를 만듭니다. (임베딩 API 호출 없음)"""
+        header = bundle.header
+        documents = ChunkStore.from_sections(header["chunks"], {
+            name: bundle.section(name) for name in header["sections"] if name.startswith("chunk_")
+        })
+        vectors = np.frombuffer(bundle.section("embeddings"), dtype=np.float32).reshape(header["count"], header["dimension"])
+        
+        # page는 PyPDFLoader와 같이 0부터 시작
+        metadatas = [
+            {'source': doc.get('file', doc.get('source', '')), 'page': doc.get('page', 1) - 1}
+            for doc in documents
+        ]
+        vector_store = FAISS.from_embeddings(
+            zip([doc.get('content', '') for doc in documents], vectors),
+            embeddings,
+            metadatas=metadatas
+        )
+        logger.info(f"인덱스 번들에서 {len(documents)}개 문서 로드 (생성 시각: {header.get('built_at')}, 모델: {header.get('model_id')})")
+        return vector_store
     
-    def answer_question(self, question: str) -> dict:
-        """사용자 질문에 대한 응답을 생성합니다."""
+    def _format_sources(self, source_documents: List[Any]) -> List[Dict[str, Any]]:
+        """검색된 문서를 출처별 내용 목록으로 정리합니다. (긴 내용은 200자로 자름)"""
+        # 출처별 내용을 담을 리스트
+        sources = []
+        
+        if source_documents:
+            unique_sources = {}  # 출처별 내용을 저장하는 사전
+            
+            # 소스 문서 내용 수집
+            for doc in source_documents:
+                source = doc.metadata.get("source", "알 수 없는 소스")
+                content = doc.page_content.strip()
+                
+                # 출처가 처음 등장하면 리스트 생성
+                if source not in unique_sources:
+                    unique_sources[source] = []
+                
+                # 해당 출처에 내용 추가 (중복 방지)
+                if content not in unique_sources[source]:
+                    unique_sources[source].append(content)
+            
+            # 출처별로 정보 추가
+            for source, contents in unique_sources.items():
+                # 너무 긴 내용은 적절히 잘라서 저장
+                formatted_contents = []
+                for content in contents:
+                    if len(content) > 200:
+                        content = content[:200] + "..."
+                    formatted_contents.append(content)
+                
+                # 출처 정보 추가
+                sources.append({
+                    "source": source,
+                    "contents": formatted_contents
+                })
+                logger.debug(f"참고 문서: {source}")
+        
+        # 출처 정보가 비어있으면 기본 출처 추가
+        if not sources:
+            sources.append({
+                "source": "비즈테크아이 경비지침",
+                "contents": ["이 정보는 비즈테크아이 경비지침에서 참조되었습니다."]
+            })
+            logger.warning("출처 정보가 없어 기본 출처를 추가했습니다.")
+        
+        return sources
+    
+    def answer_question(self, question: str, session_id: Optional[str] = None) -> dict:
+        """사용자 질문에 대한 응답을 생성합니다. (대화 기록은 session_id별로 유지)"""
         if self.qa_chain is None:
             error_msg = "RAG 시스템이 초기화되지 않았습니다."
             logger.error(error_msg)
@@ -198,54 +370,20 @@ class RagService:
         
         logger.info(f"질문 처리 중: {question}")
         try:
-            result = self.qa_chain.invoke({"question": question})
+            # 처리 중 인덱스가 교체되어도 이 질문은 같은 체인으로 완료
+            qa_chain = self.qa_chain
+            session = self._session(session_id)
+            # 같은 세션의 동시 요청이 기록을 섞지 않도록 조회 -> 체인 실행 -> 저장을 한 번에 처리
+            with session.lock:
+                chat_history = session.memory.load_memory_variables({})[session.memory.memory_key]
+                result = qa_chain.invoke({"question": question, "chat_history": chat_history})
+                session.memory.save_context({"question": question}, {"answer": result["answer"]})
             
             # 응답 구조화
             answer = result["answer"]
             source_documents = result.get("source_documents", [])
             
-            # 출처별 내용을 담을 리스트
-            sources = []
-            
-            if source_documents:
-                unique_sources = {}  # 출처별 내용을 저장하는 사전
-                
-                # 소스 문서 내용 수집
-                for doc in source_documents:
-                    source = doc.metadata.get("source", "알 수 없는 소스")
-                    content = doc.page_content.strip()
-                    
-                    # 출처가 처음 등장하면 리스트 생성
-                    if source not in unique_sources:
-                        unique_sources[source] = []
-                    
-                    # 해당 출처에 내용 추가 (중복 방지)
-                    if content not in unique_sources[source]:
-                        unique_sources[source].append(content)
-                
-                # 출처별로 정보 추가
-                for source, contents in unique_sources.items():
-                    # 너무 긴 내용은 적절히 잘라서 저장
-                    formatted_contents = []
-                    for content in contents:
-                        if len(content) > 200:
-                            content = content[:200] + "..."
-                        formatted_contents.append(content)
-                    
-                    # 출처 정보 추가
-                    sources.append({
-                        "source": source,
-                        "contents": formatted_contents
-                    })
-                    logger.debug(f"참고 문서: {source}")
-            
-            # 출처 정보가 비어있으면 기본 출처 추가
-            if not sources:
-                sources.append({
-                    "source": "비즈테크아이 경비지침",
-                    "contents": ["이 정보는 비즈테크아이 경비지침에서 참조되었습니다."]
-                })
-                logger.warning("출처 정보가 없어 기본 출처를 추가했습니다.")
+            sources = self._format_sources(source_documents)
             
             logger.info("응답 생성 완료")
             return {
@@ -258,10 +396,103 @@ class RagService:
             raise Exception(f"질문 처리 중 오류 발생: {str(e)}")
 
     
-    def reset_conversation(self):
-        """대화 기록을 초기화합니다."""
-        logger.info("대화 기록 초기화")
-        self.conversation_memory.clear()
+    def stream_answer(self, question: str, cancel_event: Optional[threading.Event] = None,
+                      session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        사용자 질문에 대한 응답을 토큰 단위로 생성합니다. (SSE 스트리밍용)
+        
+        체인의 구성 요소(질문 재구성, 검색기, 문서 결합 프롬프트, LLM)를 순서대로 호출하고
+        최종 답변 LLM 호출만 Bedrock 스트리밍으로 받습니다. cancel_event가 설정되거나
+        제너레이터가 닫히면 Bedrock 스트림을 닫고 생성을 중단합니다.
+        
+        Parameters:
+        - question: 사용자 질문
+        - cancel_event: 클라이언트 연결 종료 등으로 생성을 중단할 때 설정하는 이벤트
+        - session_id: 대화 기록을 구분할 세션 ID (같은 세션의 요청은 스트림이 끝날 때까지 대기)
+        
+        Returns:
+        - 이벤트 제너레이터 {event: token|sources|done, data}
+        """
+        qa_chain = self.qa_chain
+        if qa_chain is None:
+            error_msg = "RAG 시스템이 초기화되지 않았습니다."
+            logger.error(error_msg)
+            raise Exception(error_msg)
+        
+        logger.info(f"스트리밍 질문 처리 중: {question}")
+        session = self._session(session_id)
+        # 기록 조회부터 저장까지 세션 락을 유지 - 제너레이터가 닫히면 finally에서 해제
+        with session.lock:
+            yield from self._stream_with_history(qa_chain, question, session.memory, cancel_event)
+    
+    def _stream_with_history(self, qa_chain, question: str, memory: ConversationBufferMemory,
+                             cancel_event: Optional[threading.Event]) -> Iterator[Dict[str, Any]]:
+        """세션 락을 잡은 상태에서 stream_answer의 생성 단계를 실행합니다."""
+        start_time = time.time()
+        
+        # 대화 기록이 있으면 후속 질문을 독립된 질문으로 재구성 (체인과 같은 단계)
+        chat_history = memory.load_memory_variables({}).get(memory.memory_key, [])
+        standalone_question = question
+        if chat_history:
+            get_chat_history = qa_chain.get_chat_history or get_buffer_string
+            standalone_question = qa_chain.question_generator.invoke(
+                {"question": question, "chat_history": get_chat_history(chat_history)}
+            )["text"]
+        
+        source_documents = qa_chain.retriever.invoke(standalone_question)
+        
+        # 문서 결합 체인의 프롬프트로 LLM 입력 구성
+        combine_chain = qa_chain.combine_docs_chain
+        context = combine_chain.document_separator.join(
+            format_document(doc, combine_chain.document_prompt) for doc in source_documents
+        )
+        answer_question = standalone_question if qa_chain.rephrase_question else question
+        messages = combine_chain.llm_chain.prompt.format_prompt(
+            **{combine_chain.document_variable_name: context, "question": answer_question}
+        ).to_messages()
+        
+        parts: List[str] = []
+        first_token_seconds = None
+        stream = combine_chain.llm_chain.llm.stream(messages)
+        try:
+            for chunk in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    logger.info(f"클라이언트 연결 종료로 응답 생성을 중단합니다. (토큰 {len(parts)}개 전송)")
+                    return
+                content = chunk.content
+                if isinstance(content, list):
+                    # 콘텐츠 블록 형식이면 텍스트 블록만 사용
+                    content = "".join(block.get("text", "") for block in content if isinstance(block, dict))
+                if not content:
+                    continue
+                if first_token_seconds is None:
+                    first_token_seconds = time.time() - start_time
+                    logger.info(f"첫 토큰까지 {first_token_seconds:.2f}초")
+                parts.append(content)
+                yield {"event": "token", "data": {"text": content}}
+        finally:
+            # 중단되었거나 끝난 Bedrock 스트림 정리
+            stream.close()
+        
+        answer = "".join(parts)
+        memory.save_context({"question": question}, {"answer": answer})
+        
+        yield {"event": "sources", "data": {"sources": self._format_sources(source_documents)}}
+        elapsed = time.time() - start_time
+        logger.info(f"스트리밍 응답 생성 완료 ({elapsed:.2f}초)")
+        yield {"event": "done", "data": {
+            "elapsed_seconds": elapsed,
+            "time_to_first_token_seconds": first_token_seconds
+        }}
+    
+    def reset_conversation(self, session_id: Optional[str] = None):
+        """대화 기록을 초기화합니다. (session_id가 없으면 모든 세션)"""
+        logger.info(f"대화 기록 초기화: {session_id or '전체 세션'}")
+        with self._sessions_lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
 
 def get_rag_service() -> RagService:
     """RagService의 싱글톤 인스턴스를 반환합니다."""
@@ -270,3 +501,21 @@ def get_rag_service() -> RagService:
         logger.info("새로운 RAG 서비스 인스턴스 생성")
         _rag_service_instance = RagService()
     return _rag_service_instance
+
+def get_rag_executor() -> BoundedExecutor:
+    """
+    RAG 작업(검색, Bedrock 호출)을 이벤트 루프 밖에서 실행하는 작업 풀의 싱글톤 인스턴스를 반환합니다.
+    
+    RAG_MAX_CONCURRENCY개까지 동시에 실행하고 RAG_MAX_QUEUE개까지 대기시키며,
+    그 이상은 429, RAG_QUEUE_TIMEOUT_SECONDS를 넘겨 기다린 요청은 503으로 거절합니다.
+    """
+    global _rag_executor_instance
+    if _rag_executor_instance is None:
+        _rag_executor_instance = BoundedExecutor(
+            max_concurrency=int(os.environ.get("RAG_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.environ.get("RAG_MAX_QUEUE", "32")),
+            queue_timeout=float(os.environ.get("RAG_QUEUE_TIMEOUT_SECONDS", "30")),
+            name="rag"
+        )
+        logger.info(f"RAG 작업 풀 생성: {_rag_executor_instance.stats()}")
+    return _rag_executor_instance
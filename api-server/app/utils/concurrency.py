@@ -0,0 +1,278 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class AIMDLimiter:
+    """
+    AIMD(가산 증가 / 승산 감소) 동시성 제한기
+
+    요청이 성공할 때마다 동시 요청 한도를 조금씩 늘리고(한도만큼 성공하면 +1),
+    스로틀링이 발생하면 한도를 절반으로 줄입니다.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 16,
+                 decrease_factor: float = 0.5, cooldown: float = 0.5):
+        """
+        AIMDLimiter 초기화
+
+        Parameters:
+        - initial_limit: 초기 동시 요청 한도
+        - min_limit: 최소 동시 요청 한도
+        - max_limit: 최대 동시 요청 한도
+        - decrease_factor: 스로틀링 시 한도에 곱할 비율
+        - cooldown: 연속 감소를 막기 위한 최소 간격(초) - 같은 혼잡으로 여러 번 줄이지 않음
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+
+        self._cond = threading.Condition()
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+
+        # 통계
+        self.success_count = 0
+        self.throttle_count = 0
+        self.peak_in_flight = 0
+
+    @property
+    def limit(self) -> int:
+        """현재 동시 요청 한도"""
+        return max(self.min_limit, int(self._limit))
+
+    def acquire(self) -> None:
+        """한도 안에서 요청 슬롯 획득 (자리가 날 때까지 대기)"""
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+
+    def release(self) -> None:
+        """요청 슬롯 반환"""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def __enter__(self) -> "AIMDLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def on_success(self) -> None:
+        """요청 성공 - 한도를 가산 증가"""
+        with self._cond:
+            self.success_count += 1
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        """스로틀링 발생 - 한도를 승산 감소"""
+        with self._cond:
+            self.throttle_count += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                self._last_decrease = now
+                logger.info(f"스로틀링 감지 - 동시 요청 한도 감소: {self.limit}")
+
+    def stats(self) -> Dict[str, Any]:
+        """현재 제한기 통계"""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "success_count": self.success_count,
+                "throttle_count": self.throttle_count
+            }
+
+
+class ExecutorOverloadedError(Exception):
+    """작업 대기열이 가득 차 요청을 거절함 (429)"""
+    pass
+
+
+class ExecutorTimeoutError(Exception):
+    """대기열에서 제한 시간 안에 실행 슬롯을 얻지 못함 (503)"""
+    pass
+
+
+class BoundedExecutor:
+    """
+    이벤트 루프 밖에서 블로킹 작업을 실행하는 유한 작업 풀 (asyncio용)
+
+    동시에 실행되는 요청은 max_concurrency개로 제한하고, 슬롯을 기다리는 요청은
+    max_queue개까지만 받습니다. 대기열이 가득 차면 즉시 ExecutorOverloadedError를,
+    queue_timeout 안에 슬롯을 얻지 못하면 ExecutorTimeoutError를 발생시켜 빠르게 부하를 덜어냅니다.
+    스레드 풀 크기는 슬롯 수와 같으므로 슬롯을 얻은 작업은 풀 안에서 다시 기다리지 않습니다.
+    """
+
+    def __init__(self, max_concurrency: int = 4, max_queue: int = 16,
+                 queue_timeout: Optional[float] = None, name: str = "worker"):
+        """
+        BoundedExecutor 초기화
+
+        Parameters:
+        - max_concurrency: 동시에 실행할 최대 요청 수 (스레드 수)
+        - max_queue: 슬롯을 기다릴 수 있는 최대 요청 수 (0이면 대기 없이 거절)
+        - queue_timeout: 슬롯 대기 제한 시간(초, None이면 무제한)
+        - name: 스레드 이름 접두사
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout if queue_timeout and queue_timeout > 0 else None
+        self.name = name
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=name)
+        # 루프에 묶이는 세마포어는 처음 사용할 때 생성
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._running = 0
+        self._waiting = 0
+
+        # 통계
+        self.peak_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """실행 슬롯을 기다리는 요청 수"""
+        return self._waiting
+
+    async def acquire(self) -> None:
+        """
+        실행 슬롯 획득 (대기열이 가득 차면 즉시 거절)
+
+        Raises:
+        - ExecutorOverloadedError: 실행 중인 요청과 대기열이 모두 가득 참
+        - ExecutorTimeoutError: queue_timeout 안에 슬롯을 얻지 못함
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # 빈 슬롯이 있고 기다리는 요청이 없으면 대기 없이 바로 획득
+        if self._waiting == 0 and not self._semaphore.locked():
+            await self._semaphore.acquire()
+            self._running += 1
+            return
+
+        # 카운터는 await 전에 갱신되므로 동시에 도착한 요청도 한도를 넘지 않음
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorOverloadedError(
+                f"{self.name} 대기열이 가득 찼습니다 (실행 {self._running}/{self.max_concurrency}, "
+                f"대기 {self._waiting}/{self.max_queue})"
+            )
+
+        self._waiting += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self._waiting)
+        # wait_for는 세마포어를 얻은 순간 시간 초과/취소가 겹치면 획득한 슬롯을 잃어버리므로,
+        # 대기를 별도 태스크로 두고 포기할 때 이미 얻은 슬롯은 돌려줌
+        waiter = asyncio.ensure_future(self._semaphore.acquire())
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        finally:
+            self._waiting -= 1
+        if not done:
+            self._abandon(waiter)
+            self.timed_out += 1
+            raise ExecutorTimeoutError(f"{self.name} 실행 슬롯 대기 시간({self.queue_timeout}초)을 초과했습니다.")
+        self._running += 1
+
+    def _abandon(self, waiter: "asyncio.Future") -> None:
+        """포기한 슬롯 대기 정리 - 취소가 닿기 전에 이미 획득했으면 바로 반환"""
+        waiter.cancel()
+        waiter.add_done_callback(lambda task: None if task.cancelled() else self._semaphore.release())
+
+    def release(self) -> None:
+        """실행 슬롯 반환"""
+        self._running -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    def start(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        슬롯을 이미 가진 호출자가 블로킹 함수 실행을 작업 풀에서 시작
+
+        반환된 Future로 작업이 실제로 끝났는지 확인할 수 있으므로, 요청이 취소되어도
+        실행 중인 작업이 끝난 뒤에 슬롯을 반환할 수 있습니다.
+
+        Parameters:
+        - fn: 실행할 함수
+        - args: 함수 인자
+
+        Returns:
+        - concurrent.futures.Future
+        """
+        return self._pool.submit(fn, *args)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        슬롯을 이미 가진 호출자가 블로킹 함수를 작업 풀에서 실행 (스트리밍처럼 여러 단계를 한 슬롯으로 처리할 때)
+
+        Parameters:
+        - fn: 실행할 함수
+        - args: 함수 인자
+
+        Returns:
+        - 함수 반환값
+        """
+        return await asyncio.wrap_future(self.start(fn, *args))
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        슬롯을 얻어 블로킹 함수를 작업 풀에서 실행
+
+        요청이 취소되어도 이미 시작한 작업은 스레드에서 끝까지 실행되므로,
+        슬롯은 작업이 실제로 끝날 때 반환합니다.
+
+        Parameters:
+        - fn: 실행할 함수
+        - args: 함수 인자
+
+        Returns:
+        - 함수 반환값
+        """
+        await self.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self.release()
+            raise
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self.release))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """작업 풀 종료 (실행 중인 작업은 기다리지 않음)"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """현재 작업 풀 통계"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "peak_queue_depth": self.peak_queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
@@ -1,25 +1,25 @@
 import os
-import tempfile
 import logging
-import boto3
-from typing import List, Dict
+from typing import List, Dict, Iterator
 
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from app.aws_clients import get_client
+from app.pdf_extract import open_s3_pdf, iter_pdf_pages
 from app.utils.logger_config import setup_logger
 
 # S3 유틸리티용 로거 설정
 logger = setup_logger("app.utils.s3", "logs/s3.log", logging.DEBUG)
 
 def get_s3_client():
-    """S3 클라이언트를 생성합니다."""
-    logger.debug("S3 클라이언트 생성 중")
-    return boto3.client(
+    """공유 S3 클라이언트를 반환합니다. (프로세스당 한 번만 생성)"""
+    logger.debug("S3 클라이언트 조회 중")
+    return get_client(
         's3',
-        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", "your-aws-access-key"),
-        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", "your-aws-secret-key"),
-        region_name=os.environ.get("AWS_REGION", "ap-northeast-2")
+        os.environ.get("AWS_REGION", "ap-northeast-2"),
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY")
     )
 
 def list_all_pdfs_in_bucket(bucket_name: str) -> List[str]:
@@ -43,6 +43,14 @@ def list_all_pdfs_in_bucket(bucket_name: str) -> List[str]:
     logger.info(f"총 {len(pdf_files)}개의 PDF 파일을 찾았습니다.")
     return pdf_files
 
+def _iter_page_documents(pdf_buffer, pdf_key: str) -> Iterator[Document]:
+    """PDF 페이지를 LangChain Document로 하나씩 변환합니다. (page는 PyPDFLoader와 같이 0부터 시작)"""
+    for page in iter_pdf_pages(pdf_buffer, pdf_key):
+        yield Document(
+            page_content=page['content'],
+            metadata={'source': pdf_key, 'page': page['page'] - 1}
+        )
+
 def download_and_process_all_pdfs(bucket_name: str) -> List[Dict]:
     """S3 버킷 내 모든 PDF 파일을 다운로드하고 처리합니다."""
     logger.info(f"버킷 '{bucket_name}'의 모든 PDF 처리 시작")
@@ -61,25 +69,11 @@ def download_and_process_all_pdfs(bucket_name: str) -> List[Dict]:
         try:
             logger.info(f"처리 중: {pdf_key}")
             
-            # S3에서 PDF 파일 가져오기
-            response = s3_client.get_object(Bucket=bucket_name, Key=pdf_key)
-            pdf_content = response['Body'].read()
-            
-            # 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                temp_path = temp_file.name
-                temp_file.write(pdf_content)
+            # S3에서 PDF 파일을 임시 파일 없이 버퍼로 가져오기
+            pdf_buffer = open_s3_pdf(s3_client, bucket_name, pdf_key)
             
             # PDF 처리
             try:
-                # PDF 로드
-                loader = PyPDFLoader(temp_path)
-                documents = loader.load()
-                
-                # 메타데이터에 파일 이름 추가
-                for doc in documents:
-                    doc.metadata['source'] = pdf_key
-                
                 # 텍스트 분할
                 text_splitter = RecursiveCharacterTextSplitter(
                     chunk_size=1000,
@@ -87,7 +81,8 @@ def download_and_process_all_pdfs(bucket_name: str) -> List[Dict]:
                     separators=["\n\n", "\n", ".", " ", ""],
                     length_function=len
                 )
-                chunks = text_splitter.split_documents(documents)
+                # 페이지를 하나씩 읽어 바로 분할
+                chunks = text_splitter.split_documents(_iter_page_documents(pdf_buffer, pdf_key))
                 all_chunks.extend(chunks)
                 
                 logger.info(f"'{pdf_key}' 파일에서 {len(chunks)}개의 청크를 생성했습니다.")
@@ -96,10 +91,7 @@ def download_and_process_all_pdfs(bucket_name: str) -> List[Dict]:
                 logger.error(f"'{pdf_key}' 파일 처리 중 오류 발생: {str(e)}", exc_info=True)
             
             finally:
-                # 임시 파일 삭제
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                    logger.debug(f"임시 파일 삭제: {temp_path}")
+                pdf_buffer.close()
         
         except Exception as e:
             logger.error(f"'{pdf_key}' 파일 다운로드 중 오류 발생: {str(e)}", exc_info=True)
@@ -0,0 +1,34 @@
+import json
+from typing import Any, Optional
+
+# SSE 응답 헤더 - 프록시(nginx) 버퍼링과 캐시를 끄고 연결을 유지
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
+def format_sse(data: Any, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """
+    Server-Sent Events 메시지 한 건을 직렬화합니다.
+
+    Parameters:
+    - data: 전송할 데이터 (JSON으로 직렬화)
+    - event: 이벤트 이름 (없으면 기본 message 이벤트)
+    - event_id: 이벤트 ID
+
+    Returns:
+    - 빈 줄로 끝나는 SSE 메시지 문자열
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    # JSON은 줄바꿈을 이스케이프하므로 data 줄 하나로 충분
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+def format_sse_comment(comment: str = "") -> str:
+    """연결 유지용 SSE 주석 줄 (클라이언트는 무시)"""
+    return f": {comment}\n\n"
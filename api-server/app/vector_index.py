@@ -0,0 +1,781 @@
+import copy
+import heapq
+import logging
+import math
+import operator
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Lambda 번들에는 NumPy가 포함되지 않음
+    np = None
+
+# 로깅 설정
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+HAS_NUMPY = np is not None
+
+# 지원하는 양자화 모드
+QUANTIZATION_MODES = ("none", "float16", "int8")
+
+# 양자화 코드를 float32로 펼칠 때의 블록 크기 (임시 메모리 제한)
+_BLOCK_ROWS = 1024
+# 배치 검색에서 한 번에 만드는 점수 행렬의 최대 원소 수 (쿼리 수 × 문서 수, float32 64MB)
+_BATCH_SCORE_ELEMENTS = 1 << 24
+
+
+def _fit_dimension(vector: Sequence[float], dimension: int) -> List[float]:
+    """벡터 길이를 차원에 맞게 자르거나 0으로 채움"""
+    if len(vector) == dimension:
+        return list(vector)
+    if len(vector) > dimension:
+        return list(vector[:dimension])
+    return list(vector) + [0.0] * (dimension - len(vector))
+
+
+def _top_k(similarities, top_k: int, ids=None) -> Tuple[List[int], List[float]]:
+    """
+    유사도 상위 K개 선택 (NumPy는 argpartition, 그 외에는 heapq)
+
+    Parameters:
+    - similarities: 유사도 배열 또는 리스트
+    - top_k: 선택할 개수
+    - ids: 유사도 위치에 대응하는 문서 인덱스 (None이면 위치 그대로)
+
+    Returns:
+    - 문서 인덱스 목록, 유사도 목록 (유사도 내림차순)
+    """
+    count = len(similarities)
+    top_k = min(top_k, count)
+    if top_k <= 0:
+        return [], []
+
+    if HAS_NUMPY and isinstance(similarities, np.ndarray):
+        if top_k < count:
+            best = np.argpartition(-similarities, top_k - 1)[:top_k]
+        else:
+            best = np.arange(count)
+        best = best[np.argsort(-similarities[best], kind="stable")]
+        chosen = np.asarray(ids)[best] if ids is not None else best
+        return chosen.tolist(), similarities[best].tolist()
+
+    best = heapq.nlargest(top_k, range(count), key=similarities.__getitem__)
+    chosen = [ids[i] for i in best] if ids is not None else best
+    return [int(i) for i in chosen], [float(similarities[i]) for i in best]
+
+
+def _top_k_rows(similarities, top_k: int) -> Tuple[List[List[int]], List[List[float]]]:
+    """
+    점수 행렬의 행(쿼리)별 상위 K개를 한 번에 선택 (NumPy 전용)
+
+    Parameters:
+    - similarities: (쿼리 수, 문서 수) 점수 행렬
+    - top_k: 선택할 개수
+
+    Returns:
+    - 쿼리별 문서 인덱스 목록, 쿼리별 유사도 목록 (유사도 내림차순)
+    """
+    rows, count = similarities.shape
+    top_k = min(top_k, count)
+    if top_k <= 0:
+        return [[] for _ in range(rows)], [[] for _ in range(rows)]
+
+    if top_k < count:
+        best = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+    else:
+        best = np.broadcast_to(np.arange(count), (rows, count))
+    best_scores = np.take_along_axis(similarities, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return (np.take_along_axis(best, order, axis=1).tolist(),
+            np.take_along_axis(best_scores, order, axis=1).tolist())
+
+
+class VectorMatrix:
+    """
+    정규화된 임베딩 행렬 - 코사인 유사도 검색을 내적 한 번으로 처리
+
+    NumPy가 있으면 연속된 float32 행렬을 사용하고,
+    없으면 표준 라이브러리 array('f') 행으로 동작합니다.
+    양자화 모드(float16, int8)에서는 압축 코드로 후보를 고른 뒤
+    float32 원본(보통 mmap된 인덱스 아티팩트)으로 상위 후보만 정확히 재정렬합니다.
+    """
+
+    def __init__(self, dimension: int, quantization: str = "none"):
+        """
+        VectorMatrix 초기화
+
+        Parameters:
+        - dimension: 임베딩 차원
+        - quantization: 저장 방식 (none, float16, int8)
+        """
+        self.dimension = dimension
+        self.quantization = quantization
+        self.backend = "numpy" if HAS_NUMPY else "array"
+        # 재정렬 시 top_k 대비 추가로 고를 후보 배수
+        self.rerank_factor = 4
+        # NumPy: float32/float16 행렬 또는 int8 코드
+        self._matrix = None
+        # int8: 벡터별 스케일 (원본 ≈ 코드 × 스케일)
+        self._scales = None
+        # 표준 라이브러리 백엔드의 행 목록
+        self._rows: List = []
+        # 재정렬용 float32 원본 (VectorMatrix)
+        self._exact: Optional["VectorMatrix"] = None
+
+    @classmethod
+    def from_embeddings(cls, embeddings: Sequence[Sequence[float]]) -> "VectorMatrix":
+        """
+        임베딩 목록으로 정규화된 행렬 생성
+
+        Parameters:
+        - embeddings: 임베딩 벡터 목록
+
+        Returns:
+        - VectorMatrix 인스턴스
+        """
+        dimension = len(embeddings[0]) if len(embeddings) else 0
+        index = cls(dimension)
+
+        if any(len(vec) != dimension for vec in embeddings):
+            logger.warning(f"임베딩 길이가 일정하지 않아 {dimension}차원으로 맞춥니다.")
+            embeddings = [_fit_dimension(vec, dimension) for vec in embeddings]
+
+        if HAS_NUMPY:
+            matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), dimension)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+            index._matrix = np.ascontiguousarray(matrix)
+        else:
+            for vec in embeddings:
+                norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+                index._rows.append(array('f', (x / norm for x in vec)))
+
+        return index
+
+    @classmethod
+    def from_buffer(cls, buffer, count: int, dimension: int) -> "VectorMatrix":
+        """
+        이미 정규화된 float32 버퍼(mmap 등)를 복사 없이 행렬로 사용
+
+        Parameters:
+        - buffer: float32 행 우선 바이트 버퍼
+        - count: 벡터 개수
+        - dimension: 임베딩 차원
+
+        Returns:
+        - VectorMatrix 인스턴스
+        """
+        index = cls(dimension)
+        if HAS_NUMPY:
+            index._matrix = np.frombuffer(buffer, dtype=np.float32, count=count * dimension).reshape(count, dimension)
+        else:
+            flat = memoryview(buffer).cast('B').cast('f')
+            index._rows = [flat[i * dimension:(i + 1) * dimension] for i in range(count)]
+        return index
+
+    @classmethod
+    def from_code_buffers(cls, codes, scales, count: int, dimension: int, quantization: str,
+                          exact: Optional["VectorMatrix"] = None) -> "VectorMatrix":
+        """
+        저장된 양자화 코드 버퍼를 복사 없이 행렬로 사용
+
+        Parameters:
+        - codes: 양자화 코드 바이트 버퍼 (float16 또는 int8)
+        - scales: int8 스케일 바이트 버퍼 (float16이면 None)
+        - count: 벡터 개수
+        - dimension: 임베딩 차원
+        - quantization: 양자화 모드
+        - exact: 재정렬용 float32 원본
+
+        Returns:
+        - VectorMatrix 인스턴스
+        """
+        if quantization == "float16" and not HAS_NUMPY:
+            # array 백엔드에는 float16 타입이 없음 - 호출자가 float32 원본을 사용해야 함
+            raise ValueError("NumPy 없이 float16 코드를 읽을 수 없습니다.")
+        index = cls(dimension, quantization)
+        index._exact = exact
+        if HAS_NUMPY:
+            dtype = np.float16 if quantization == "float16" else np.int8
+            index._matrix = np.frombuffer(codes, dtype=dtype, count=count * dimension).reshape(count, dimension)
+            if quantization == "int8":
+                index._scales = np.frombuffer(scales, dtype=np.float32, count=count)
+        else:
+            flat = memoryview(codes).cast('B').cast('b')
+            index._rows = [flat[i * dimension:(i + 1) * dimension] for i in range(count)]
+            index._scales = memoryview(scales).cast('B').cast('f')
+        return index
+
+    def quantized(self, quantization: str, exact: Optional["VectorMatrix"] = None) -> "VectorMatrix":
+        """
+        float32 행렬을 압축 코드로 변환한 새 행렬 생성
+
+        Parameters:
+        - quantization: 양자화 모드 (float16: 2바이트/차원, int8: 1바이트/차원 + 벡터별 스케일)
+        - exact: 재정렬용 float32 원본 (None이면 재정렬 없이 근사 점수 사용)
+
+        Returns:
+        - 양자화된 VectorMatrix
+        """
+        if quantization == "none" or quantization == self.quantization:
+            return self
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"지원하지 않는 양자화 모드: {quantization}")
+        if quantization == "float16" and not HAS_NUMPY:
+            logger.warning("NumPy가 없어 float16 양자화 대신 float32 행렬을 사용합니다.")
+            return self
+
+        index = VectorMatrix(self.dimension, quantization)
+        index._exact = exact
+        count = len(self)
+
+        if HAS_NUMPY:
+            if quantization == "float16":
+                index._matrix = np.empty((count, self.dimension), dtype=np.float16)
+            else:
+                index._matrix = np.empty((count, self.dimension), dtype=np.int8)
+                index._scales = np.empty(count, dtype=np.float32)
+            for start in range(0, count, _BLOCK_ROWS):
+                stop = min(start + _BLOCK_ROWS, count)
+                block = self._dense_block(start, stop)
+                if quantization == "float16":
+                    index._matrix[start:stop] = block.astype(np.float16)
+                else:
+                    scales = np.abs(block).max(axis=1) / 127.0
+                    scales[scales == 0] = 1.0
+                    index._matrix[start:stop] = np.clip(np.rint(block / scales[:, None]), -127, 127).astype(np.int8)
+                    index._scales[start:stop] = scales
+        else:
+            index._scales = array('f')
+            for i in range(count):
+                row = self._dense_row(i)
+                scale = max(abs(x) for x in row) / 127.0 or 1.0
+                index._rows.append(array('b', (max(-127, min(127, int(round(x / scale)))) for x in row)))
+                index._scales.append(scale)
+
+        return index
+
+    @property
+    def exact(self) -> Optional["VectorMatrix"]:
+        """재정렬용 float32 원본 (없으면 None)"""
+        return self._exact
+
+    def set_exact(self, exact: Optional["VectorMatrix"]) -> None:
+        """재정렬용 float32 원본 교체 (예: 메모리 사본을 mmap 아티팩트로 대체)"""
+        self._exact = exact
+
+    def with_exact(self, exact: Optional["VectorMatrix"]) -> "VectorMatrix":
+        """재정렬용 원본만 바꾼 새 행렬 (벡터 데이터는 공유, 게시된 행렬은 변경하지 않음)"""
+        index = copy.copy(self)
+        index._exact = exact
+        return index
+
+    def freeze(self) -> "VectorMatrix":
+        """
+        행렬을 읽기 전용으로 고정 - 스냅샷에 게시한 뒤 실수로 수정되지 않도록 함
+
+        Returns:
+        - 자기 자신
+        """
+        if self._matrix is not None:
+            self._matrix.flags.writeable = False
+            if self._scales is not None and HAS_NUMPY and isinstance(self._scales, np.ndarray):
+                self._scales.flags.writeable = False
+        elif isinstance(self._rows, list):
+            self._rows = tuple(self._rows)
+        return self
+
+    def __len__(self) -> int:
+        if self._matrix is not None:
+            return int(self._matrix.shape[0])
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        """상주 메모리에 올라가는 벡터 데이터 크기 (재정렬용 원본 제외)"""
+        if self._matrix is not None:
+            scales = self._scales.nbytes if self._scales is not None else 0
+            return int(self._matrix.nbytes + scales)
+        itemsize = 1 if self.quantization == "int8" else 4
+        scales = len(self._scales) * 4 if self._scales is not None else 0
+        return len(self._rows) * self.dimension * itemsize + scales
+
+    def _dense_block(self, start: int, stop: int):
+        """[start, stop) 구간을 float32 행렬로 반환 (NumPy 전용, 양자화 코드는 복원)"""
+        block = self._matrix[start:stop]
+        if self.quantization == "int8":
+            return block.astype(np.float32) * self._scales[start:stop, None]
+        return block.astype(np.float32, copy=False)
+
+    def _dense_rows(self, ids):
+        """지정한 행들을 float32 행렬로 반환 (NumPy 전용)"""
+        rows = self._matrix[ids]
+        if self.quantization == "int8":
+            return rows.astype(np.float32) * self._scales[ids, None]
+        return rows.astype(np.float32, copy=False)
+
+    def _dense_row(self, i: int):
+        """표준 라이브러리 백엔드에서 한 행을 float 시퀀스로 반환"""
+        row = self._rows[i]
+        if self.quantization == "int8":
+            scale = self._scales[i]
+            return [x * scale for x in row]
+        return row
+
+    def _normalize_query(self, query_embedding: Sequence[float]):
+        """쿼리 벡터를 차원에 맞추고 정규화"""
+        if len(query_embedding) != self.dimension:
+            logger.warning(f"벡터 길이가 일치하지 않습니다: {len(query_embedding)} vs {self.dimension}")
+            query_embedding = _fit_dimension(query_embedding, self.dimension)
+
+        if HAS_NUMPY:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(query))
+            return query / norm if norm else query
+
+        norm = math.sqrt(sum(x * x for x in query_embedding)) or 1.0
+        return array('f', (x / norm for x in query_embedding))
+
+    def _scores_normalized(self, query):
+        """정규화된 쿼리에 대한 전체 문서 점수 (양자화 모드에서는 근사 점수)"""
+        if self._matrix is not None:
+            if self.quantization == "none":
+                return self._matrix @ query
+            # 압축 코드를 블록 단위로 펼쳐 임시 메모리 사용을 제한
+            count = len(self)
+            similarities = np.empty(count, dtype=np.float32)
+            for start in range(0, count, _BLOCK_ROWS):
+                stop = min(start + _BLOCK_ROWS, count)
+                similarities[start:stop] = self._matrix[start:stop].astype(np.float32) @ query
+            if self.quantization == "int8":
+                similarities *= self._scales
+            return similarities
+
+        if self.quantization == "int8":
+            return [scale * sum(map(operator.mul, row, query)) for row, scale in zip(self._rows, self._scales)]
+        return [sum(map(operator.mul, row, query)) for row in self._rows]
+
+    def score_ids(self, ids, query):
+        """
+        정규화된 쿼리에 대해 지정한 문서들의 점수 계산
+
+        Parameters:
+        - ids: 문서 인덱스 목록
+        - query: 정규화된 쿼리 벡터
+
+        Returns:
+        - 문서별 점수 (양자화 모드에서는 근사 점수)
+        """
+        if self._matrix is not None:
+            return self._dense_rows(ids) @ query
+        return [sum(map(operator.mul, self._dense_row(i), query)) for i in ids]
+
+    def refine(self, ids: List[int], scores: List[float], query, top_k: int) -> Tuple[List[int], List[float]]:
+        """
+        후보를 float32 원본으로 다시 채점해 상위 K개 선택
+
+        원본에 없는 행(증분 삽입분)은 근사 점수를 그대로 사용합니다.
+
+        Parameters:
+        - ids: 후보 문서 인덱스 목록
+        - scores: 후보의 근사 점수
+        - query: 정규화된 쿼리 벡터
+        - top_k: 반환할 최대 문서 수
+
+        Returns:
+        - 문서 인덱스 목록, 유사도 목록 (유사도 내림차순)
+        """
+        if self._exact is None or not ids:
+            return ids[:top_k], scores[:top_k]
+
+        exact_count = len(self._exact)
+        covered = [i for i in ids if i < exact_count]
+        exact_scores = dict(zip(covered, self._exact.score_ids(covered, query))) if covered else {}
+        rescored = [float(exact_scores.get(i, score)) for i, score in zip(ids, scores)]
+        best = heapq.nlargest(min(top_k, len(ids)), range(len(ids)), key=rescored.__getitem__)
+        return [ids[i] for i in best], [rescored[i] for i in best]
+
+    def scores(self, query_embedding: Sequence[float]):
+        """
+        모든 문서에 대한 코사인 유사도 계산
+
+        Parameters:
+        - query_embedding: 쿼리 임베딩
+
+        Returns:
+        - 문서별 유사도 (NumPy 배열 또는 리스트, 양자화 모드에서는 근사값)
+        """
+        return self._scores_normalized(self._normalize_query(query_embedding))
+
+    def _normalize_queries(self, query_embeddings: Sequence[Sequence[float]]):
+        """쿼리 벡터들을 차원에 맞추고 행별로 정규화한 (쿼리 수, 차원) 행렬 (NumPy 전용)"""
+        if HAS_NUMPY and isinstance(query_embeddings, np.ndarray) and query_embeddings.ndim == 2 \
+                and query_embeddings.shape[1] == self.dimension:
+            queries = query_embeddings.astype(np.float32)
+        else:
+            if any(len(vec) != self.dimension for vec in query_embeddings):
+                logger.warning(f"벡터 길이가 일치하지 않는 쿼리를 {self.dimension}차원으로 맞춥니다.")
+                query_embeddings = [_fit_dimension(vec, self.dimension) for vec in query_embeddings]
+            queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), self.dimension)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return queries / norms
+
+    def _scores_matrix(self, queries):
+        """정규화된 쿼리 행렬에 대한 (쿼리 수, 문서 수) 점수 행렬 - 행렬-행렬 곱 한 번 (양자화 코드는 블록 단위)"""
+        if self.quantization == "none":
+            return queries @ self._matrix.T
+        count = len(self)
+        similarities = np.empty((len(queries), count), dtype=np.float32)
+        for start in range(0, count, _BLOCK_ROWS):
+            stop = min(start + _BLOCK_ROWS, count)
+            similarities[:, start:stop] = queries @ self._matrix[start:stop].astype(np.float32).T
+        if self.quantization == "int8":
+            similarities *= self._scales
+        return similarities
+
+    def search_batch(self, query_embeddings: Sequence[Sequence[float]],
+                     top_k: int) -> Tuple[List[List[int]], List[List[float]]]:
+        """
+        여러 쿼리의 유사도 상위 K개 문서를 한 번에 검색
+
+        NumPy 백엔드는 쿼리 행렬과 문서 행렬의 곱으로 모든 점수를 구하고 행별 argpartition으로
+        상위 K개를 고릅니다. 점수 행렬이 커지지 않도록 쿼리를 블록으로 나눠 처리합니다.
+
+        Parameters:
+        - query_embeddings: 쿼리 임베딩 목록 또는 (쿼리 수, 차원) 행렬
+        - top_k: 쿼리별 반환할 최대 문서 수
+
+        Returns:
+        - 쿼리별 문서 인덱스 목록, 쿼리별 유사도 목록 (유사도 내림차순)
+        """
+        query_count = len(query_embeddings)
+        if top_k <= 0 or not len(self) or not query_count:
+            return [[] for _ in range(query_count)], [[] for _ in range(query_count)]
+
+        if self._matrix is None:
+            # 표준 라이브러리 백엔드는 쿼리별 검색
+            results = [self.search(query, top_k) for query in query_embeddings]
+            return [ids for ids, _ in results], [scores for _, scores in results]
+
+        queries = self._normalize_queries(query_embeddings)
+        candidate_k = top_k if self._exact is None else top_k * self.rerank_factor
+        block = max(1, _BATCH_SCORE_ELEMENTS // len(self))
+        all_ids: List[List[int]] = []
+        all_scores: List[List[float]] = []
+        for start in range(0, query_count, block):
+            block_queries = queries[start:start + block]
+            ids, scores = _top_k_rows(self._scores_matrix(block_queries), candidate_k)
+            if self._exact is not None:
+                # 압축 코드로 고른 후보를 쿼리별로 원본에서 재정렬
+                refined = [self.refine(i, s, query, top_k) for i, s, query in zip(ids, scores, block_queries)]
+                ids, scores = [i for i, _ in refined], [s for _, s in refined]
+            all_ids.extend(ids)
+            all_scores.extend(scores)
+        return all_ids, all_scores
+
+    def search(self, query_embedding: Sequence[float], top_k: int) -> Tuple[List[int], List[float]]:
+        """
+        유사도 상위 K개 문서 검색
+
+        Parameters:
+        - query_embedding: 쿼리 임베딩
+        - top_k: 반환할 최대 문서 수
+
+        Returns:
+        - 문서 인덱스 목록, 유사도 목록 (유사도 내림차순)
+        """
+        if top_k <= 0 or not len(self):
+            return [], []
+
+        query = self._normalize_query(query_embedding)
+        similarities = self._scores_normalized(query)
+
+        if self._exact is None:
+            return _top_k(similarities, top_k)
+
+        # 압축 코드로 후보를 넉넉히 고른 뒤 원본으로 재정렬
+        ids, scores = _top_k(similarities, top_k * self.rerank_factor)
+        return self.refine(ids, scores, query, top_k)
+
+    def to_bytes(self) -> bytes:
+        """float32 원본(없으면 복원한 값)을 행 우선 바이트로 직렬화"""
+        if self._exact is not None and len(self._exact) == len(self):
+            return self._exact.to_bytes()
+        if self._matrix is not None:
+            if self.quantization == "none":
+                return np.ascontiguousarray(self._matrix, dtype=np.float32).tobytes()
+            return b"".join(self._dense_block(start, min(start + _BLOCK_ROWS, len(self))).tobytes()
+                            for start in range(0, len(self), _BLOCK_ROWS))
+        return b"".join(array('f', self._dense_row(i)).tobytes() for i in range(len(self)))
+
+    def code_bytes(self) -> Tuple[bytes, Optional[bytes]]:
+        """양자화 코드와 스케일을 바이트로 직렬화 (스케일은 int8 모드에서만)"""
+        if self._matrix is not None:
+            scales = self._scales.tobytes() if self._scales is not None else None
+            return np.ascontiguousarray(self._matrix).tobytes(), scales
+        codes = b"".join(array('b', row).tobytes() for row in self._rows)
+        return codes, array('f', self._scales).tobytes()
+
+    def appended(self, embeddings: Sequence[Sequence[float]]) -> "VectorMatrix":
+        """
+        벡터를 추가한 새 행렬 생성 (기존 행렬은 그대로 두는 copy-on-write 증분 삽입)
+
+        Parameters:
+        - embeddings: 추가할 임베딩 벡터 목록
+
+        Returns:
+        - 새 VectorMatrix (재정렬용 원본은 공유)
+        """
+        index = copy.copy(self)
+        index.extend(embeddings)
+        return index
+
+    def extend(self, embeddings: Sequence[Sequence[float]]) -> None:
+        """
+        정규화된 벡터를 행렬 끝에 추가 (증분 삽입, 기존 배열은 수정하지 않고 새 배열로 교체)
+
+        Parameters:
+        - embeddings: 추가할 임베딩 벡터 목록
+        """
+        if not len(embeddings):
+            return
+        if self.dimension:
+            embeddings = [_fit_dimension(vec, self.dimension) for vec in embeddings]
+        added = VectorMatrix.from_embeddings(embeddings).quantized(self.quantization)
+        self.dimension = added.dimension
+
+        if added._matrix is not None:
+            self._matrix = added._matrix if self._matrix is None else np.vstack([self._matrix, added._matrix])
+            if added._scales is not None:
+                self._scales = added._scales if self._scales is None else np.concatenate([self._scales, added._scales])
+        else:
+            self._rows = list(self._rows) + added._rows
+            if added._scales is not None:
+                self._scales = array('f', self._scales or []) + added._scales
+
+
+class IVFIndex:
+    """
+    IVF(Inverted File) 근사 최근접 이웃 인덱스
+
+    구면 k-means로 만든 nlist개의 중심점에 벡터를 배정하고,
+    검색 시 쿼리와 가까운 nprobe개 리스트의 벡터만 정확히 비교합니다.
+    nprobe를 키우면 재현율이 오르고 지연 시간이 늘어납니다. (NumPy 필요)
+    """
+
+    def __init__(self, vectors: VectorMatrix, nlist: int = 0, nprobe: int = 8,
+                 train_iterations: int = 10, seed: int = 0):
+        """
+        IVFIndex 초기화
+
+        Parameters:
+        - vectors: 정규화된 벡터 행렬 (인덱스와 공유)
+        - nlist: 중심점 개수 (0이면 sqrt(N) 기준 자동 결정)
+        - nprobe: 검색 시 탐색할 리스트 수 기본값
+        - train_iterations: k-means 반복 횟수
+        - seed: 난수 시드
+        """
+        if not HAS_NUMPY:
+            raise RuntimeError("IVF 인덱스에는 NumPy가 필요합니다.")
+        self.vectors = vectors
+        self.nlist = nlist or max(1, int(math.sqrt(len(vectors))))
+        self.nlist = min(self.nlist, max(1, len(vectors)))
+        self.nprobe = max(1, nprobe)
+        self.train_iterations = train_iterations
+        self._rng = np.random.default_rng(seed)
+        self.centroids = None
+        self._lists: List = []
+
+    def train(self) -> None:
+        """구면 k-means로 중심점 학습 후 전체 벡터 배정"""
+        count = len(self.vectors)
+
+        # 리스트당 최대 256개 샘플로 학습
+        sample_size = min(count, self.nlist * 256)
+        if sample_size < count:
+            sample = self.vectors._dense_rows(np.sort(self._rng.choice(count, sample_size, replace=False)))
+        else:
+            sample = self.vectors._dense_block(0, count)
+        centroids = sample[self._rng.choice(len(sample), self.nlist, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            updated = np.zeros_like(centroids)
+            np.add.at(updated, assign, sample)
+            empty = np.flatnonzero(~updated.any(axis=1))
+            if len(empty):
+                # 빈 클러스터는 임의의 샘플로 재시드
+                updated[empty] = sample[self._rng.choice(len(sample), len(empty))]
+            norms = np.linalg.norm(updated, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (updated / norms).astype(np.float32)
+
+        self.centroids = centroids
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(self.nlist)]
+        self.add(0, count)
+
+    def _assign(self, start: int, stop: int):
+        """벡터 구간을 가장 가까운 중심점에 배정 (메모리 사용을 줄이기 위해 블록 단위)"""
+        parts = []
+        for i in range(start, stop, _BLOCK_ROWS):
+            rows = self.vectors._dense_block(i, min(i + _BLOCK_ROWS, stop))
+            parts.append(np.argmax(rows @ self.centroids.T, axis=1))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def add(self, start: int, count: int) -> None:
+        """
+        공유 행렬의 [start, start+count) 구간 벡터를 인덱스에 삽입
+
+        Parameters:
+        - start: 시작 행 번호
+        - count: 삽입할 벡터 수
+        """
+        if count <= 0:
+            return
+        assign = self._assign(start, start + count)
+        ids = np.arange(start, start + count, dtype=np.int64)
+        order = np.argsort(assign, kind="stable")
+        boundaries = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+        for list_id in range(self.nlist):
+            members = ids[order[boundaries[list_id]:boundaries[list_id + 1]]]
+            if len(members):
+                self._lists[list_id] = np.concatenate([self._lists[list_id], members])
+
+    def appended(self, vectors: VectorMatrix, start: int, count: int) -> "IVFIndex":
+        """
+        벡터를 추가한 행렬에 맞춰 새 인덱스 생성 (중심점은 공유, 기존 인덱스는 그대로 유지)
+
+        Parameters:
+        - vectors: 추가분이 반영된 새 벡터 행렬
+        - start: 추가된 첫 행 번호
+        - count: 추가된 벡터 수
+
+        Returns:
+        - 새 IVFIndex
+        """
+        index = copy.copy(self)
+        index.vectors = vectors
+        # 리스트 컨테이너만 복사 (add는 리스트 항목을 새 배열로 교체하므로 기존 배열은 공유해도 안전)
+        index._lists = list(self._lists)
+        index.add(start, count)
+        return index
+
+    def with_vectors(self, vectors: VectorMatrix) -> "IVFIndex":
+        """같은 행을 가진 다른 행렬(예: 재정렬 원본만 바꾼 행렬)을 쓰는 새 인덱스 (중심점과 리스트는 공유)"""
+        index = copy.copy(self)
+        index.vectors = vectors
+        return index
+
+    def to_sections(self) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+        """
+        인덱스 번들 저장용 직렬화 - 중심점 행렬과 리스트별 문서 ID(오프셋으로 구분)
+
+        Returns:
+        - 헤더 메타데이터 {nlist, nprobe}, 섹션 이름 -> 바이트
+        """
+        offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in self._lists])
+        ids = np.concatenate(self._lists) if self._lists else np.empty(0, dtype=np.int64)
+        meta = {"nlist": self.nlist, "nprobe": self.nprobe}
+        sections = {
+            "ivf_centroids": np.ascontiguousarray(self.centroids, dtype=np.float32).tobytes(),
+            "ivf_offsets": offsets.tobytes(),
+            "ivf_ids": ids.astype(np.int64).tobytes()
+        }
+        return meta, sections
+
+    @classmethod
+    def from_sections(cls, vectors: VectorMatrix, meta: Dict[str, Any], sections: Dict[str, Any],
+                      nprobe: Optional[int] = None) -> "IVFIndex":
+        """
+        to_sections 결과로 학습 없이 인덱스 복원 (리스트는 섹션 버퍼 위의 뷰)
+
+        Parameters:
+        - vectors: 인덱스와 공유할 벡터 행렬
+        - meta: to_sections의 헤더 메타데이터
+        - sections: 섹션 이름 -> 바이트 또는 memoryview
+        - nprobe: 검색 시 탐색할 리스트 수 (None이면 저장된 값)
+
+        Returns:
+        - IVFIndex 인스턴스
+        """
+        index = cls(vectors, nlist=meta["nlist"], nprobe=nprobe or meta.get("nprobe", 8))
+        index.nlist = meta["nlist"]
+        index.centroids = np.frombuffer(sections["ivf_centroids"], dtype=np.float32).reshape(index.nlist, vectors.dimension)
+        offsets = np.frombuffer(sections["ivf_offsets"], dtype=np.int64)
+        ids = np.frombuffer(sections["ivf_ids"], dtype=np.int64)
+        index._lists = [ids[offsets[i]:offsets[i + 1]] for i in range(index.nlist)]
+        return index
+
+    def search(self, query_embedding: Sequence[float], top_k: int,
+               nprobe: int = None) -> Tuple[List[int], List[float], int]:
+        """
+        근사 상위 K개 검색
+
+        Parameters:
+        - query_embedding: 쿼리 임베딩
+        - top_k: 반환할 최대 문서 수
+        - nprobe: 탐색할 리스트 수 (None이면 기본값)
+
+        Returns:
+        - 문서 인덱스 목록, 유사도 목록, 비교한 후보 수
+        """
+        query = self.vectors._normalize_query(query_embedding)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        centroid_scores = self.centroids @ query
+        if nprobe < self.nlist:
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probes = np.arange(self.nlist)
+        return self._search_lists(query, probes, top_k)
+
+    def search_batch(self, query_embeddings: Sequence[Sequence[float]], top_k: int,
+                     nprobe: int = None) -> Tuple[List[List[int]], List[List[float]], int]:
+        """
+        여러 쿼리의 근사 상위 K개 검색 (중심점 점수는 행렬 곱 한 번으로 계산)
+
+        Parameters:
+        - query_embeddings: 쿼리 임베딩 목록 또는 (쿼리 수, 차원) 행렬
+        - top_k: 쿼리별 반환할 최대 문서 수
+        - nprobe: 탐색할 리스트 수 (None이면 기본값)
+
+        Returns:
+        - 쿼리별 문서 인덱스 목록, 쿼리별 유사도 목록, 비교한 후보 수 합계
+        """
+        if not len(query_embeddings):
+            return [], [], 0
+        queries = self.vectors._normalize_queries(query_embeddings)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        centroid_scores = queries @ self.centroids.T
+        if nprobe < self.nlist:
+            probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(self.nlist), (len(queries), self.nlist))
+
+        all_ids, all_scores, total = [], [], 0
+        for query, query_probes in zip(queries, probes):
+            ids, scores, candidates = self._search_lists(query, query_probes, top_k)
+            all_ids.append(ids)
+            all_scores.append(scores)
+            total += candidates
+        return all_ids, all_scores, total
+
+    def _search_lists(self, query, probes, top_k: int) -> Tuple[List[int], List[float], int]:
+        """정규화된 쿼리로 지정한 리스트의 벡터만 비교해 상위 K개 선택"""
+        candidates = np.concatenate([self._lists[i] for i in probes])
+        if not len(candidates):
+            return [], [], 0
+
+        similarities = self.vectors.score_ids(candidates, query)
+        if self.vectors._exact is None:
+            ids, scores = _top_k(similarities, top_k, candidates)
+        else:
+            ids, scores = _top_k(similarities, top_k * self.vectors.rerank_factor, candidates)
+            ids, scores = self.vectors.refine(ids, scores, query, top_k)
+        return ids, scores, int(len(candidates))
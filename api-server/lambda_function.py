@@ -3,10 +3,16 @@ import logging
 import os
 import traceback
 import time
-from typing import Dict, Any, Optional
+import base64
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+from urllib.parse import unquote_plus
 
 from app.chat_service import ChatService
 from app.utils.cost_tracker import CostTracker
+from app.utils.sse import SSE_HEADERS, format_sse
 
 # 로깅 설정
 logger = logging.getLogger()
@@ -42,6 +48,12 @@ ENV = validate_environment()
 # 챗봇 서비스 인스턴스 - 지연 초기화 패턴 적용
 _chat_service = None
 
+# 비동기 파이프라인의 블로킹 단계를 실행할 스레드 풀 - 호출마다 새로 만들지 않도록 컨테이너 수명 동안 재사용
+_pipeline_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CHAT_PIPELINE_WORKERS", "4")),
+    thread_name_prefix="chat-pipeline"
+)
+
 def get_chat_service():
     """ChatService 인스턴스를 가져옵니다. 없으면 생성합니다."""
     global _chat_service
@@ -121,6 +133,46 @@ def error_response(message, headers, status_code=400):
         })
     }
 
+def is_refresh_event(event: Dict[str, Any]) -> bool:
+    """인덱스 갱신 이벤트 여부 (EventBridge {"action": "refresh_index"} 또는 S3 객체 변경 알림)"""
+    if event.get('action') == 'refresh_index':
+        return True
+    records = event.get('Records') or []
+    return bool(records) and all(record.get('eventSource') == 'aws:s3' for record in records)
+
+def is_index_source_key(key: str) -> bool:
+    """
+    인덱스 원본 객체 여부 (PDF 또는 인덱스 번들)
+    
+    매니페스트, 임베딩 캐시, 아티팩트 미러처럼 갱신 과정에서 같은 버킷에 다시 쓰는 객체는
+    제외해야 버킷 전체 알림이 스스로를 다시 호출하지 않습니다.
+    """
+    bundle_key = os.environ.get("INDEX_BUNDLE_S3_KEY", "")
+    return key.lower().endswith('.pdf') or (bool(bundle_key) and key == bundle_key)
+
+def handle_refresh_event(event: Dict[str, Any], request_id: str) -> Dict[str, Any]:
+    """새 인덱스 세대를 만들어 교체하고 결과 반환"""
+    records = event.get('Records') or []
+    keys = [unquote_plus(record.get('s3', {}).get('object', {}).get('key', '')) for record in records]
+    if records and not any(is_index_source_key(key) for key in keys):
+        logger.info(f"인덱스 원본이 아닌 S3 객체 알림이므로 무시합니다: {keys[:5]}")
+        result = {"status": "ignored", "keys": len(keys)}
+    else:
+        chat_service = get_chat_service()
+        if not hasattr(chat_service, 'refresh_index'):
+            result = {"status": "failed", "error": "service_initialization_failed"}
+        else:
+            # S3 알림도 지문 확인을 거침 - 같은 변경에 대한 중복 알림은 unchanged로 끝남
+            result = chat_service.refresh_index(force=bool(event.get('force')))
+    logger.info(f"인덱스 갱신 결과: {result}")
+    
+    _cost_tracker.stop()
+    _cost_tracker.log_costs(request_id=request_id, request_type="refresh_index")
+    return {
+        'statusCode': 500 if result.get('status') == 'failed' else 200,
+        'body': json.dumps(result, ensure_ascii=False)
+    }
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     AWS Lambda 핸들러 함수 (간소화됨)
@@ -162,6 +214,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
     
     try:
+        # 인덱스 갱신 이벤트는 HTTP 요청이 아님
+        if is_refresh_event(event):
+            return handle_refresh_event(event, request_id)
+        
         # 서비스 초기화
         chat_service = get_chat_service()
         
@@ -193,8 +249,13 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     session_id = str(uuid.uuid4())
                     logger.info(f"새 세션 ID 생성: {session_id}")
                 
-                # 채팅 응답 생성
-                response = chat_service.process_message(user_message, session_id)
+                # 채팅 응답 생성 - 임베딩과 BM25 후보 검색을 동시에 실행하는 비동기 파이프라인 사용
+                if hasattr(chat_service, 'aprocess_message'):
+                    response = asyncio.run(
+                        chat_service.aprocess_message(user_message, session_id, executor=_pipeline_executor)
+                    )
+                else:
+                    response = chat_service.process_message(user_message, session_id)
                 
                 # 응답에 session_id 추가
                 if isinstance(response, dict):
@@ -262,4 +323,190 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'error': '서버 내부 오류가 발생했습니다.',
                 'message': str(e)
             })
-        } 
\ No newline at end of file
+        }
+
+# Function URL 응답 스트리밍 - HTTP 메타데이터(JSON)와 본문 사이 구분자 (NUL 8바이트)
+HTTP_INTEGRATION_DELIMITER = b"\x00" * 8
+
+class BufferedResponseStream:
+    """
+    응답 스트림을 메모리에 모으는 구현
+    
+    로컬 테스트에서 stream_chat_handler의 출력을 확인할 때 사용합니다.
+    write/close만 있으면 되므로 실제 응답 스트림이나 소켓 래퍼로 바꿔 끼울 수 있습니다.
+    """
+    
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+    
+    def write(self, data: bytes) -> None:
+        if self.closed:
+            raise ValueError("닫힌 응답 스트림입니다.")
+        self.chunks.append(data)
+    
+    def close(self) -> None:
+        self.closed = True
+    
+    def to_response(self) -> Dict[str, Any]:
+        """
+        모은 데이터를 Function URL/API Gateway 응답 객체로 변환
+        
+        Returns:
+        - 응답 {statusCode, headers, body}
+        """
+        data = b"".join(self.chunks)
+        metadata: Dict[str, Any] = {}
+        if HTTP_INTEGRATION_DELIMITER in data:
+            prelude, data = data.split(HTTP_INTEGRATION_DELIMITER, 1)
+            metadata = json.loads(prelude.decode('utf-8'))
+        return {
+            'statusCode': metadata.get('statusCode', 200),
+            'headers': metadata.get('headers', {}),
+            'body': data.decode('utf-8')
+        }
+
+def open_http_response_stream(response_stream: Any, status_code: int, headers: Dict[str, str]) -> None:
+    """
+    응답 스트림에 HTTP 메타데이터(상태 코드, 헤더)를 씁니다. 이후 쓰는 데이터는 응답 본문이 됩니다.
+    
+    Parameters:
+    - response_stream: write(bytes)를 지원하는 응답 스트림
+    - status_code: HTTP 상태 코드
+    - headers: 응답 헤더
+    """
+    prelude = json.dumps({'statusCode': status_code, 'headers': headers}).encode('utf-8')
+    response_stream.write(prelude + HTTP_INTEGRATION_DELIMITER)
+
+def parse_http_event(event: Dict[str, Any]) -> Tuple[str, str, str]:
+    """
+    API Gateway(REST) 또는 Function URL(페이로드 2.0) 이벤트에서 요청 정보 추출
+    
+    Parameters:
+    - event: Lambda 이벤트 객체
+    
+    Returns:
+    - HTTP 메서드, 경로, 본문 문자열
+    """
+    http_context = event.get('requestContext', {}).get('http', {})
+    http_method = event.get('httpMethod') or http_context.get('method', '')
+    path = event.get('path') or event.get('rawPath', '')
+    body = event.get('body') or ''
+    if body and event.get('isBase64Encoded'):
+        body = base64.b64decode(body).decode('utf-8')
+    return http_method.upper(), path, body
+
+def _write_json_response(response_stream: Any, status_code: int, headers: Dict[str, str],
+                         payload: Dict[str, Any]) -> None:
+    """스트리밍 핸들러에서 일반 JSON 응답을 한 번에 씁니다."""
+    open_http_response_stream(response_stream, status_code, {**headers, 'Content-Type': 'application/json'})
+    response_stream.write(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+def _fallback_stream_events(chat_service: Any, user_message: str, session_id: str):
+    """stream_message가 없는 폴백 서비스의 응답을 스트리밍 이벤트로 변환"""
+    response = chat_service.process_message(user_message, session_id)
+    yield {"event": "token", "data": {"text": response.get("answer") or response.get("response", "")}}
+    yield {"event": "sources", "data": {"sources": response.get("sources", [])}}
+    yield {"event": "done", "data": {"error": response.get("error")}}
+
+def stream_chat_handler(event: Dict[str, Any], response_stream: Any, context: Any) -> None:
+    """
+    응답 스트리밍 핸들러 (Function URL RESPONSE_STREAM 형식)
+    
+    HTTP 메타데이터를 먼저 쓰고, 답변 조각을 Server-Sent Events로 생성되는 즉시 쓴 뒤
+    출처(sources)와 완료(done) 이벤트를 마지막에 붙입니다. 스트림 쓰기가 실패하면(연결 종료)
+    생성을 중단해 Bedrock 스트림도 닫습니다.
+    
+    Parameters:
+    - event: Lambda 이벤트 객체 (Function URL 또는 API Gateway)
+    - response_stream: write(bytes)/close()를 지원하는 응답 스트림
+    - context: Lambda 컨텍스트 객체
+    """
+    request_id = context.aws_request_id if context else "unknown"
+    logger.info(f"스트리밍 요청 ID: {request_id}")
+    
+    lambda_memory = int(os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", "1024"))
+    _cost_tracker.start(lambda_memory_mb=lambda_memory)
+    request_type = "chat_stream"
+    
+    cors_headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'OPTIONS,POST',
+        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,X-Requested-With'
+    }
+    
+    events = None
+    try:
+        http_method, path, raw_body = parse_http_event(event)
+        
+        if http_method == 'OPTIONS':
+            request_type = "options"
+            _write_json_response(response_stream, 200, cors_headers, {'message': 'CORS enabled'})
+            return
+        if http_method != 'POST':
+            request_type = "unknown_method"
+            _write_json_response(response_stream, 405, cors_headers, {'error': f'지원되지 않는 HTTP 메서드: {http_method}'})
+            return
+        # Function URL은 경로 없이 호출하므로 루트도 채팅으로 처리
+        if path not in ('', '/') and not path.endswith(('/chat', '/chat/stream')):
+            request_type = "unknown_path"
+            _write_json_response(response_stream, 404, cors_headers, {'error': f'지원되지 않는 경로: {path}'})
+            return
+        
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+        except json.JSONDecodeError as e:
+            logger.error(f"JSON 파싱 오류: {str(e)}")
+            request_type = "json_error"
+            _write_json_response(response_stream, 400, cors_headers, {'error': '잘못된 JSON 형식입니다.'})
+            return
+        
+        user_message = body.get('message', '')
+        session_id = body.get('session_id', '') or str(uuid.uuid4())
+        if not user_message:
+            request_type = "empty_message"
+            _write_json_response(response_stream, 400, cors_headers, {'error': '메시지가 제공되지 않았습니다.'})
+            return
+        
+        chat_service = get_chat_service()
+        if hasattr(chat_service, 'stream_message'):
+            events = chat_service.stream_message(user_message, session_id)
+        else:
+            events = _fallback_stream_events(chat_service, user_message, session_id)
+        
+        open_http_response_stream(response_stream, 200, {
+            **cors_headers,
+            **SSE_HEADERS,
+            'Content-Type': 'text/event-stream; charset=utf-8'
+        })
+        for item in events:
+            data = item["data"]
+            if item["event"] == "sources":
+                data = {**data, "session_id": session_id}
+            response_stream.write(format_sse(data, event=item["event"]).encode('utf-8'))
+    except (BrokenPipeError, ConnectionError) as e:
+        # 클라이언트 연결 종료 - 제너레이터를 닫아 생성 중단
+        logger.warning(f"응답 스트림 연결 종료: {str(e)}")
+        request_type = "chat_stream_disconnected"
+    except Exception as e:
+        logger.error(f"스트리밍 처리 중 오류 발생: {str(e)}")
+        logger.error(traceback.format_exc())
+        request_type = "error"
+        try:
+            if events is None:
+                _write_json_response(response_stream, 500, cors_headers, {
+                    'error': '서버 내부 오류가 발생했습니다.',
+                    'message': str(e)
+                })
+            else:
+                # 이미 200 헤더를 보냈으므로 오류 이벤트로 알림
+                response_stream.write(format_sse({'error': '서버 내부 오류가 발생했습니다.', 'message': str(e)},
+                                                 event="error").encode('utf-8'))
+        except Exception as write_error:
+            logger.error(f"오류 응답 쓰기 실패: {str(write_error)}")
+    finally:
+        if events is not None:
+            events.close()
+        response_stream.close()
+        _cost_tracker.stop()
+        _cost_tracker.log_costs(request_id=request_id, request_type=request_type)
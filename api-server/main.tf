@@ -97,6 +97,7 @@ resource "aws_iam_policy" "s3_policy" {
       {
         Action = [
           "s3:GetObject",
+          "s3:PutObject",
           "s3:ListBucket"
         ]
         Effect   = "Allow"
@@ -159,11 +160,26 @@ resource "null_resource" "install_dependencies" {
     requirements_hash = filemd5("${local.src_dir}/requirements-lambda.txt")
     src_hash = filemd5("${local.src_dir}/lambda_function.py")
     app_hash = filemd5("${local.src_dir}/app/chat_service.py")
+    answer_cache_hash = filemd5("${local.src_dir}/app/answer_cache.py")
     embeddings_hash = filemd5("${local.src_dir}/app/embeddings.py")
+    embedding_cache_hash = filemd5("${local.src_dir}/app/embedding_cache.py")
     document_store_hash = filemd5("${local.src_dir}/app/document_store.py")
+    chunker_hash = filemd5("${local.src_dir}/app/chunker.py")
+    dedup_hash = filemd5("${local.src_dir}/app/dedup.py")
+    ingestion_hash = filemd5("${local.src_dir}/app/ingestion.py")
+    s3_sync_hash = filemd5("${local.src_dir}/app/s3_sync.py")
+    pdf_extract_hash = filemd5("${local.src_dir}/app/pdf_extract.py")
+    vector_index_hash = filemd5("${local.src_dir}/app/vector_index.py")
+    index_artifact_hash = filemd5("${local.src_dir}/app/index_artifact.py")
+    index_bundle_hash = filemd5("${local.src_dir}/app/index_bundle.py")
+    index_refresher_hash = filemd5("${local.src_dir}/app/index_refresher.py")
+    chunk_store_hash = filemd5("${local.src_dir}/app/chunk_store.py")
     retriever_hash = filemd5("${local.src_dir}/app/retriever.py")
+    lexical_index_hash = filemd5("${local.src_dir}/app/lexical_index.py")
     bedrock_client_hash = filemd5("${local.src_dir}/app/bedrock_client.py")
     cost_tracker_hash = filemd5("${local.src_dir}/app/utils/cost_tracker.py")
+    concurrency_hash = filemd5("${local.src_dir}/app/utils/concurrency.py")
+    aws_clients_hash = filemd5("${local.src_dir}/app/aws_clients.py")
   }
 
   provisioner "local-exec" {
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# app 패키지와 lambda_function을 api-server 루트에서 가져오도록 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, tmp_path):
+    """테스트마다 빈 로컬 캐시 디렉토리를 사용하고, PDF 추출은 스레드로 실행"""
+    monkeypatch.setenv("DOCUMENT_CACHE_DIR", str(tmp_path / "document_cache"))
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", str(tmp_path / "embedding_cache"))
+    monkeypatch.setenv("INGEST_USE_PROCESSES", "false")
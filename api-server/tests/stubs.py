@@ -0,0 +1,155 @@
+"""테스트용 S3/Bedrock 클라이언트 스텁 (boto3 클라이언트에서 앱이 쓰는 메서드만 구현)"""
+import hashlib
+import io
+import json
+import random
+from typing import Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """페이지마다 주어진 텍스트 한 줄이 들어간 최소 PDF"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for i, text in enumerate(pages):
+        content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{obj}\nendobj\n".encode())
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+class StreamingBody(io.BytesIO):
+    """botocore StreamingBody 대용"""
+
+    def iter_chunks(self, chunk_size: int = 1024):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class StubS3:
+    """
+    메모리 버킷
+
+    Parameters:
+    - objects: 키 -> 내용
+    - failing_keys: get_object가 실패하는 키 (다운로드 실패 재현)
+
+    list_calls_before_failure를 설정하면 그 횟수만큼 목록 조회에 성공한 뒤 실패합니다.
+    """
+
+    def __init__(self, objects: Dict[str, bytes] = None, failing_keys: Iterable[str] = ()):
+        self.objects = dict(objects or {})
+        self.failing_keys = set(failing_keys)
+        self.downloads: List[str] = []
+        self.list_calls_before_failure: Optional[int] = None
+
+    def _meta(self, key: str) -> Dict[str, object]:
+        data = self.objects[key]
+        return {'Key': key, 'ETag': f'"{hashlib.md5(data).hexdigest()}"', 'Size': len(data),
+                'LastModified': '2024-01-01T00:00:00'}
+
+    def _missing(self, key: str, operation: str) -> ClientError:
+        return ClientError({'Error': {'Code': 'NoSuchKey', 'Message': key}}, operation)
+
+    def head_bucket(self, Bucket, **kwargs):
+        return {}
+
+    def list_objects_v2(self, Bucket, Prefix="", **kwargs):
+        if self.list_calls_before_failure is not None:
+            if self.list_calls_before_failure <= 0:
+                raise ClientError({'Error': {'Code': 'InternalError', 'Message': 'list failed'}}, 'ListObjectsV2')
+            self.list_calls_before_failure -= 1
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        response = {'KeyCount': len(keys)}
+        if keys:
+            response['Contents'] = [self._meta(key) for key in keys]
+        return response
+
+    def get_paginator(self, name):
+        stub = self
+
+        class Paginator:
+            def paginate(self, Bucket, **kwargs):
+                yield stub.list_objects_v2(Bucket=Bucket, **kwargs)
+
+        return Paginator()
+
+    def head_object(self, Bucket, Key, **kwargs):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404', 'Message': Key}}, 'HeadObject')
+        return {'ContentLength': len(self.objects[Key]), 'ETag': self._meta(Key)['ETag']}
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        if Key in self.failing_keys:
+            raise ClientError({'Error': {'Code': 'InternalError', 'Message': Key}}, 'GetObject')
+        if Key not in self.objects:
+            raise self._missing(Key, 'GetObject')
+        self.downloads.append(Key)
+        data = self.objects[Key]
+        response = {'ETag': self._meta(Key)['ETag']}
+        if Range:
+            start, end = (int(value) for value in Range.split('=')[1].split('-'))
+            response['ContentRange'] = f"bytes {start}-{min(end, len(data) - 1)}/{len(data)}"
+            data = data[start:end + 1]
+        response.update({'Body': StreamingBody(data), 'ContentLength': len(data)})
+        return response
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body if isinstance(Body, bytes) else Body.read()
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        with open(Filename, 'rb') as f:
+            self.objects[Key] = f.read()
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404', 'Message': Key}}, 'HeadObject')
+        with open(Filename, 'wb') as f:
+            f.write(self.objects[Key])
+
+
+class StubBedrock:
+    """임베딩은 텍스트별 고정 난수 벡터, 스트리밍 응답은 answer_pieces를 content_block_delta 이벤트로 반환"""
+
+    def __init__(self, dimension: int = 16, answer_pieces: List[str] = ()):
+        self.dimension = dimension
+        self.answer_pieces = list(answer_pieces)
+        self.embedding_calls = 0
+        self.stream_requests: List[Dict[str, object]] = []
+
+    def invoke_model(self, modelId, contentType, accept, body):
+        request = json.loads(body)
+        if 'inputText' not in request:
+            raise ClientError({'Error': {'Code': 'ValidationException', 'Message': 'unsupported'}}, 'InvokeModel')
+        self.embedding_calls += 1
+        rng = random.Random(hashlib.md5(request['inputText'].encode()).hexdigest())
+        embedding = [rng.gauss(0, 1) for _ in range(self.dimension)]
+        return {'body': io.BytesIO(json.dumps({'embedding': embedding}).encode())}
+
+    def invoke_model_with_response_stream(self, modelId, contentType, accept, body):
+        self.stream_requests.append(json.loads(body))
+        events = [{'type': 'message_start', 'message': {'usage': {'input_tokens': 12}}}]
+        events += [{'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': piece}}
+                   for piece in self.answer_pieces]
+        events += [{'type': 'message_delta', 'usage': {'output_tokens': 6}}, {'type': 'message_stop'}]
+        return {'body': iter([{'chunk': {'bytes': json.dumps(event).encode()}} for event in events])}
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import chat
+from app.services import rag_service
+from app.utils.concurrency import BoundedExecutor
+
+
+class StubRagService:
+    """
+    stream_answer만 흉내 내는 RAG 서비스
+
+    첫 이벤트 전에 first_event_delay초 쉬거나, gate가 주어지면 gate가 열릴 때까지 next()를 붙잡습니다.
+    """
+
+    def __init__(self, first_event_delay: float = 0.0, gate: threading.Event = None):
+        self.first_event_delay = first_event_delay
+        self.gate = gate
+        self.started = threading.Event()
+        self.closed = threading.Event()
+        self.cancel_event = None
+
+    def stream_answer(self, question, cancel_event=None, session_id=None):
+        self.cancel_event = cancel_event
+        try:
+            self.started.set()
+            if self.gate is not None:
+                self.gate.wait(5)
+            time.sleep(self.first_event_delay)
+            for text in ("출장비 ", "한도"):
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield {"event": "token", "data": {"text": text}}
+            yield {"event": "sources", "data": {"sources": []}}
+            yield {"event": "done", "data": {}}
+        finally:
+            self.closed.set()
+
+
+def wait_until(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor(max_concurrency=1, max_queue=0, queue_timeout=0.5, name="test-rag")
+    app.dependency_overrides[rag_service.get_rag_executor] = lambda: executor
+    yield executor
+    app.dependency_overrides.clear()
+    executor.shutdown()
+
+
+def use_service(service: StubRagService) -> None:
+    app.dependency_overrides[rag_service.get_rag_service] = lambda: service
+
+
+def test_chat_stream_sends_keep_alive_while_first_event_is_late(executor, monkeypatch):
+    monkeypatch.setattr(chat, "SSE_KEEPALIVE_SECONDS", 0.2)
+    service = StubRagService(first_event_delay=0.3)
+    use_service(service)
+
+    with TestClient(app).stream("POST", "/chat/stream", json={"message": "출장비?", "session_id": "s1"}) as response:
+        assert response.status_code == 200
+        body = "".join(response.iter_text())
+
+    # 첫 이벤트 전에 주석 한 번, 이후 토큰 -> 출처 -> 완료
+    assert body.count(": keep-alive\n\n") == 1
+    assert body.index(": keep-alive") < body.index("event: token")
+    assert body.index("event: token") < body.index("event: sources") < body.index("event: done")
+    assert '"session_id": "s1"' in body
+    assert wait_until(lambda: executor.stats()["running"] == 0)
+    assert service.closed.is_set()
+
+
+def test_chat_stream_releases_slot_after_disconnect_during_next(executor):
+    gate = threading.Event()
+    service = StubRagService(gate=gate)
+    use_service(service)
+    body = json.dumps({"message": "출장비?", "session_id": "s1"}).encode()
+    scope = {
+        "type": "http", "method": "POST", "path": "/chat/stream", "raw_path": b"/chat/stream",
+        "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": ("test", 1), "root_path": ""
+    }
+
+    async def scenario():
+        request_sent = False
+        messages = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # 작업 풀에서 첫 next(events)가 실행 중일 때 연결 종료
+            while not service.started.is_set():
+                await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        await app(scope, receive, send)
+
+        # 실행 중인 next()가 끝날 때까지는 스레드가 슬롯을 쓰고 있음
+        assert executor.stats()["running"] == 1
+        assert service.cancel_event.is_set()
+        assert not service.closed.is_set()
+
+        gate.set()
+        deadline = time.time() + 2
+        while executor.stats()["running"] and time.time() < deadline:
+            await asyncio.sleep(0.01)
+        return messages
+
+    messages = asyncio.run(scenario())
+
+    assert executor.stats()["running"] == 0
+    assert service.closed.is_set()
+    sent = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+    assert b"event: token" not in sent
+
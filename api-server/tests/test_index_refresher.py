@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from app import bedrock_client, document_store, embeddings
+from app.chat_service import ChatService
+from app.index_refresher import IndexGeneration, IndexRefresher
+from stubs import StubBedrock, StubS3, make_pdf
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "false")
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "false")
+    monkeypatch.setenv("INDEX_REFRESH_INTERVAL", "0")
+    s3 = StubS3({"docs/a.pdf": make_pdf(["travel allowance alpha"])})
+    bedrock = StubBedrock()
+    monkeypatch.setattr(document_store.DocumentStore, "_create_s3_client", lambda self, region: s3)
+    monkeypatch.setattr(embeddings.EmbeddingService, "_create_bedrock_client", lambda self, region: bedrock)
+    monkeypatch.setattr(bedrock_client.BedrockClient, "_create_bedrock_client", lambda self, region: bedrock)
+    return s3, bedrock
+
+
+def test_refresh_failing_mid_build_keeps_previous_generation(stubs):
+    s3, _ = stubs
+    service = ChatService("bucket", "ap-northeast-2")
+    previous = service.index_refresher.current
+    assert previous.number == 1
+    assert [document['file'] for document in service.document_store.documents] == ["docs/a.pdf"]
+
+    # 변경 확인의 목록 조회는 성공하고, 새 세대를 만드는 중의 목록 조회는 실패
+    s3.objects["docs/b.pdf"] = make_pdf(["meal allowance bravo"])
+    s3.list_calls_before_failure = 1
+
+    result = service.refresh_index()
+
+    assert result["status"] == "failed"
+    assert s3.list_calls_before_failure == 0
+    assert service.index_refresher.current is previous
+    assert service.index_refresher.stats()["failures"] == 1
+    # 이전 세대가 계속 검색에 응답
+    assert [document['file'] for document in service.document_store.documents] == ["docs/a.pdf"]
+    assert service.retriever.is_embedding_initialized
+    assert service.retriever.retrieve_context("travel allowance alpha").documents[0]['file'] == "docs/a.pdf"
+
+    # 원본이 여전히 바뀐 상태이므로 다음 갱신에서 새 세대로 교체
+    s3.list_calls_before_failure = None
+    result = service.refresh_index()
+
+    assert result["status"] == "refreshed"
+    assert service.index_refresher.current.number == 2
+    assert sorted(document['file'] for document in service.document_store.documents) == ["docs/a.pdf", "docs/b.pdf"]
+
+
+def test_refresh_skips_while_a_build_is_running():
+    started = threading.Event()
+    release = threading.Event()
+
+    def build(number):
+        started.set()
+        release.wait(5)
+        return IndexGeneration(number, version=f"v{number}")
+
+    refresher = IndexRefresher(IndexGeneration(1, version="v1"), build, lambda generation: True)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(refresher.refresh()))
+    worker.start()
+    assert started.wait(5)
+
+    assert refresher.refresh()["status"] == "in_progress"
+    # 빌드 중에도 이전 세대를 그대로 제공
+    assert refresher.current.number == 1
+
+    release.set()
+    worker.join(5)
+    assert results[0]["status"] == "refreshed"
+    assert refresher.current.version == "v2"
@@ -0,0 +1,89 @@
+from app.s3_sync import DocumentSync, list_pdf_objects
+from stubs import StubS3, make_pdf
+
+
+BUCKET = "bucket"
+
+
+def sync_once(s3, cache_dir, manifest_s3_key=""):
+    """새 DocumentSync로 한 번 동기화 (컨테이너가 새로 뜬 것처럼 매니페스트를 다시 읽음)"""
+    document_sync = DocumentSync(s3, BUCKET, cache_dir, manifest_s3_key=manifest_s3_key)
+    documents = document_sync.sync(list_pdf_objects(s3, BUCKET))
+    return document_sync, documents
+
+
+def contents(documents):
+    return sorted((document['file'], document['content'].strip()) for document in documents)
+
+
+def test_second_sync_classifies_added_changed_removed_and_failed(tmp_path):
+    s3 = StubS3({
+        "docs/a.pdf": make_pdf(["alpha one"]),
+        "docs/b.pdf": make_pdf(["bravo one"]),
+        "docs/keep.pdf": make_pdf(["keep one"]),
+        "docs/c.pdf": make_pdf(["charlie one"]),
+        "notes.txt": b"not a pdf"
+    }, failing_keys=["docs/c.pdf"])
+
+    first, documents = sync_once(s3, tmp_path)
+
+    assert {key: first.last_stats[key] for key in ("files", "added", "changed", "removed", "unchanged", "failed")} == {
+        "files": 4, "added": 4, "changed": 0, "removed": 0, "unchanged": 0, "failed": 1
+    }
+    assert first.last_failed_keys == ["docs/c.pdf"]
+    # 실패한 새 파일은 매니페스트에 넣지 않아 다음 동기화 때 다시 추가로 처리
+    assert sorted(first.files) == ["docs/a.pdf", "docs/b.pdf", "docs/keep.pdf"]
+    assert contents(documents) == [("docs/a.pdf", "alpha one"), ("docs/b.pdf", "bravo one"), ("docs/keep.pdf", "keep one")]
+
+    s3.failing_keys.clear()
+    s3.downloads.clear()
+    del s3.objects["docs/a.pdf"]
+    s3.objects["docs/b.pdf"] = make_pdf(["bravo two"])
+    s3.objects["docs/d.pdf"] = make_pdf(["delta one"])
+
+    second, documents = sync_once(s3, tmp_path)
+
+    assert {key: second.last_stats[key] for key in ("files", "added", "changed", "removed", "unchanged", "failed")} == {
+        "files": 4, "added": 2, "changed": 1, "removed": 1, "unchanged": 1, "failed": 0
+    }
+    # 바뀌지 않은 파일은 다시 받지 않음
+    assert sorted(s3.downloads) == ["docs/b.pdf", "docs/c.pdf", "docs/d.pdf"]
+    assert contents(documents) == [
+        ("docs/b.pdf", "bravo two"), ("docs/c.pdf", "charlie one"),
+        ("docs/d.pdf", "delta one"), ("docs/keep.pdf", "keep one")
+    ]
+    assert [obj["Key"] for obj in second.last_ingested_objects] == sorted(second.files)
+
+
+def test_failed_change_keeps_previous_pages_until_retry(tmp_path):
+    s3 = StubS3({"docs/a.pdf": make_pdf(["alpha one"])})
+    first, _ = sync_once(s3, tmp_path)
+    previous_etag = first.files["docs/a.pdf"]["etag"]
+
+    s3.objects["docs/a.pdf"] = make_pdf(["alpha two"])
+    s3.failing_keys.add("docs/a.pdf")
+    second, documents = sync_once(s3, tmp_path)
+
+    assert (second.last_stats["changed"], second.last_stats["failed"]) == (1, 1)
+    assert contents(documents) == [("docs/a.pdf", "alpha one")]
+    assert second.files["docs/a.pdf"]["etag"] == previous_etag
+
+    s3.failing_keys.clear()
+    third, documents = sync_once(s3, tmp_path)
+
+    assert (third.last_stats["changed"], third.last_stats["failed"]) == (1, 0)
+    assert contents(documents) == [("docs/a.pdf", "alpha two")]
+
+
+def test_cold_start_reads_manifest_from_s3(tmp_path):
+    s3 = StubS3({"docs/a.pdf": make_pdf(["alpha one"])})
+    sync_once(s3, tmp_path / "first", manifest_s3_key="index-cache/manifest.json")
+    s3.downloads.clear()
+
+    # 로컬 매니페스트가 없는 새 컨테이너
+    cold, documents = sync_once(s3, tmp_path / "second", manifest_s3_key="index-cache/manifest.json")
+
+    assert cold.last_stats["unchanged"] == 1
+    # 매니페스트만 받고 PDF는 다시 받지 않음
+    assert s3.downloads == ["index-cache/manifest.json"]
+    assert contents(documents) == [("docs/a.pdf", "alpha one")]
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from app import bedrock_client, document_store, embeddings
+from app.chat_service import ChatService
+import lambda_function
+from stubs import StubBedrock, StubS3
+
+
+ANSWER_PIECES = ["출장비 ", "한도는 ", "10만원입니다."]
+
+
+class Context:
+    aws_request_id = 'test-request'
+
+
+def parse_sse(body):
+    """SSE 본문을 (event, data) 목록으로 변환 (주석 줄은 무시)"""
+    events = []
+    for block in body.split("\n\n"):
+        name, data = "message", []
+        for line in block.splitlines():
+            if line.startswith("event:"):
+                name = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data.append(line[len("data:"):].strip())
+        if data:
+            events.append((name, json.loads("\n".join(data))))
+    return events
+
+
+@pytest.fixture
+def bedrock(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "false")
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "false")
+    monkeypatch.setenv("INDEX_REFRESH_INTERVAL", "0")
+    monkeypatch.setattr(document_store.DocumentStore, "_create_s3_client", lambda self, region: StubS3())
+    stub = StubBedrock(answer_pieces=ANSWER_PIECES)
+    monkeypatch.setattr(embeddings.EmbeddingService, "_create_bedrock_client", lambda self, region: stub)
+    monkeypatch.setattr(bedrock_client.BedrockClient, "_create_bedrock_client", lambda self, region: stub)
+    monkeypatch.setattr(lambda_function, "_chat_service", ChatService("bucket", "ap-northeast-2"))
+    return stub
+
+
+def test_stream_chat_handler_writes_prelude_then_sse_events(bedrock):
+    event = {
+        'requestContext': {'http': {'method': 'POST'}},
+        'rawPath': '/',
+        'body': json.dumps({'message': '출장비 한도는?', 'session_id': 's1'})
+    }
+    stream = lambda_function.BufferedResponseStream()
+
+    lambda_function.stream_chat_handler(event, stream, Context())
+
+    assert stream.closed
+    # 첫 쓰기는 HTTP 메타데이터 JSON + NUL 8바이트 구분자
+    prelude, delimiter = stream.chunks[0][:-8], stream.chunks[0][-8:]
+    assert delimiter == lambda_function.HTTP_INTEGRATION_DELIMITER
+    metadata = json.loads(prelude.decode('utf-8'))
+    assert metadata['statusCode'] == 200
+    assert metadata['headers']['Content-Type'].startswith('text/event-stream')
+
+    # 구분자 뒤로는 조각마다 token 이벤트, 마지막에 sources와 done
+    events = parse_sse(b"".join(stream.chunks[1:]).decode('utf-8'))
+    names = [name for name, _ in events]
+    assert names == ["token"] * len(ANSWER_PIECES) + ["sources", "done"]
+    assert [data['text'] for name, data in events if name == "token"] == ANSWER_PIECES
+    assert events[-2][1]['session_id'] == 's1'
+    assert len(bedrock.stream_requests) == 1
+
+    # 완료된 답변은 대화 기록에 남음
+    history = lambda_function._chat_service.conversations['s1']
+    assert history[-1] == {"role": "assistant", "content": "".join(ANSWER_PIECES)}
+
+
+def test_stream_chat_handler_rejects_empty_message(bedrock):
+    stream = lambda_function.BufferedResponseStream()
+
+    lambda_function.stream_chat_handler({'httpMethod': 'POST', 'path': '/chat/stream', 'body': '{}'}, stream, Context())
+
+    response = stream.to_response()
+    assert response['statusCode'] == 400
+    assert bedrock.stream_requests == []